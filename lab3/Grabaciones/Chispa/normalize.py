@@ -1,22 +1,22 @@
 import os
+import sys
 import argparse
 import math
 import numpy as np
 import soundfile as sf
 from scipy.signal import resample_poly
 
+# framing.py vive en la raíz de lab3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import framing
+
 
 def rms_envelope(x: np.ndarray, win_len: int, hop: int) -> np.ndarray:
-	# compute RMS envelope with frames of win_len and hop
-	n = len(x)
-	frames = 1 + max(0, (n - win_len) // hop)
-	rms = []
-	for i in range(0, n - win_len + 1, hop):
-		w = x[i:i+win_len]
-		rms.append(np.sqrt(np.mean(w.astype('float64')**2)))
+	# compute RMS envelope with frames of win_len and hop (strided view, no copies)
+	rms = framing.rms_envelope(x, win_len, hop)
 	if len(rms) == 0:
 		return np.array([0.0], dtype=float)
-	return np.array(rms, dtype=float)
+	return rms
 
 
 def detect_active_region(x: np.ndarray, sr: int, win_ms=20, hop_ms=10, thresh_factor=3.0):
@@ -24,10 +24,8 @@ def detect_active_region(x: np.ndarray, sr: int, win_ms=20, hop_ms=10, thresh_fa
 	hop = max(1, int(sr * hop_ms / 1000))
 	env = rms_envelope(x, win, hop)
 	# estimate noise floor as median of lowest 20% frames
-	sorted_env = np.sort(env)
-	n = len(sorted_env)
-	noise_med = float(np.median(sorted_env[:max(1, n//5)])) if n>0 else 0.0
-	thresh = max(noise_med * thresh_factor, noise_med + 1e-8)
+	noise_med = framing.noise_floor(env)
+	thresh = framing.activity_threshold(noise_med, thresh_factor)
 	active_idx = np.where(env > thresh)[0]
 	if active_idx.size == 0:
 		# fallback: use entire signal
@@ -0,0 +1,130 @@
+"""
+Compara los extractores de características ("filterbank" vs "fft"):
+exactitud leave-one-out con el clasificador de distancia mínima, latencia
+media por frame y cuánto se parecen las características de ambos modos.
+
+El frame de cada archivo es el que clasificaría el reconocimiento en vivo:
+N muestras alrededor del ataque de la palabra (rt_utils.onset_frame), no
+las primeras N del WAV, que suelen ser silencio.
+
+Uso: python benchmark_modos.py [carpeta_grabaciones] [comando1 comando2 ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from dsp_utils import FEATURE_MODES, extract_subband_energies
+from framing import activity_threshold, energy_envelope, noise_floor, rms_envelope
+from model_utils import decide_label_by_min_dist
+from rt_utils import onset_frame
+
+FS = 32768
+N = 4096
+K = 4
+WINDOW = "hamming"
+
+
+def speech_frame(x: np.ndarray, fs: int, N: int, onset_frames: int = 2) -> np.ndarray:
+    """
+    Frame de N muestras con la palabra: ataque con el mismo criterio que
+    UtteranceSegmenter (marcos de 20 ms cada 10 ms por encima de 3 veces el
+    piso de ruido, onset_frames seguidos) y onset_frame. Si no hay
+    actividad, el frame de N muestras de mayor energía.
+    """
+    win, hop = int(fs * 0.020), int(fs * 0.010)
+    env = rms_envelope(x, win, hop)
+    active = env > activity_threshold(noise_floor(env))
+    run = np.convolve(active, np.ones(onset_frames, dtype=int), mode="valid") == onset_frames
+    if env.size >= onset_frames and run.any():
+        return onset_frame(x, int(np.argmax(run)) * hop, N)
+    if x.size <= N:
+        return onset_frame(x, 0, N)
+    start = int(np.argmax(energy_envelope(x, N, N // 8))) * (N // 8)
+    return x[start:start + N]
+
+
+def _load_corpus(recordings_dir: str, commands: list) -> tuple:
+    frames, labels = [], []
+    for label in commands:
+        folder = os.path.join(recordings_dir, label)
+        for f in sorted(os.listdir(folder)):
+            if f.lower().endswith(".wav"):
+                x, _ = sf.read(os.path.join(folder, f), dtype="float32")
+                if x.ndim > 1:
+                    x = x.mean(axis=1)
+                frames.append(speech_frame(x, FS, N))
+                labels.append(label)
+    return frames, labels
+
+
+def extract_all(frames: list, mode: str) -> np.ndarray:
+    return np.vstack([extract_subband_energies(x, FS, N, K, WINDOW, mode)[0] for x in frames])
+
+
+def evaluate_mode(frames: list, labels: list, mode: str, repeats: int = 5) -> dict:
+    # Latencia: extracción repetida sobre todo el corpus (cachés ya calientes tras la primera)
+    extract_subband_energies(frames[0], FS, N, K, WINDOW, mode)
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        feats = extract_all(frames, mode)
+    latency_ms = (time.perf_counter() - t0) / (repeats * len(frames)) * 1e3
+
+    # Exactitud leave-one-out
+    labels_arr = np.array(labels)
+    preds = []
+    for i in range(len(frames)):
+        mask = np.arange(len(frames)) != i
+        model = {"commands": {}}
+        for label in np.unique(labels_arr):
+            sel = feats[mask & (labels_arr == label)]
+            model["commands"][label] = {"mean": sel.mean(axis=0).tolist(), "std": sel.std(axis=0).tolist()}
+        pred, _ = decide_label_by_min_dist(feats[i], model)
+        preds.append(pred)
+    accuracy = float(np.mean(np.array(preds) == labels_arr))
+
+    return {"mode": mode, "accuracy": accuracy, "latency_ms": latency_ms, "features": feats, "predictions": preds}
+
+
+def _ranks(a: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(a, axis=0), axis=0)
+
+
+def compare_features(fa: np.ndarray, fb: np.ndarray) -> dict:
+    """
+    Parecido entre las características de dos modos sobre los mismos frames:
+    correlación de rangos (Spearman) entre archivos por banda, y diferencia
+    relativa mediana de la energía relativa de cada banda (E / suma de E).
+    """
+    ra, rb = _ranks(fa).astype(float), _ranks(fb).astype(float)
+    ra -= ra.mean(axis=0)
+    rb -= rb.mean(axis=0)
+    spearman = (ra * rb).sum(axis=0) / np.sqrt((ra ** 2).sum(axis=0) * (rb ** 2).sum(axis=0))
+    pa = fa / fa.sum(axis=1, keepdims=True)
+    pb = fb / fb.sum(axis=1, keepdims=True)
+    rel = np.abs(pa - pb) / np.maximum(np.maximum(pa, pb), 1e-12)
+    return {"spearman": spearman, "median_rel_diff": float(np.median(rel))}
+
+
+if __name__ == "__main__":
+    recordings_dir = sys.argv[1] if len(sys.argv) > 1 else "recordings"
+    commands = sys.argv[2:] if len(sys.argv) > 2 else ["casa", "chispa"]
+
+    frames, labels = _load_corpus(recordings_dir, commands)
+    print(f"Corpus: {len(frames)} archivos ({', '.join(commands)}), fs={FS}, N={N}, K={K}, ventana={WINDOW}")
+    print(f"{'modo':<12}{'exactitud':>10}{'ms/frame':>10}")
+    results = {}
+    for mode in FEATURE_MODES:
+        r = evaluate_mode(frames, labels, mode)
+        results[mode] = r
+        print(f"{r['mode']:<12}{r['accuracy']*100:>9.1f}%{r['latency_ms']:>10.3f}")
+
+    fb, ff = results["filterbank"], results["fft"]
+    c = compare_features(fb["features"], ff["features"])
+    same = np.mean(np.array(fb["predictions"]) == np.array(ff["predictions"]))
+    print(f"\nfilterbank vs fft: Spearman por banda {np.round(c['spearman'], 3).tolist()}, "
+          f"diferencia relativa mediana {c['median_rel_diff']*100:.1f}%, "
+          f"misma predicción en {same*100:.1f}% de los archivos")
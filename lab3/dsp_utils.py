@@ -2,6 +2,7 @@
 Funciones de DSP: subbandas por FFT, espectro, RMS y utilidades.
 """
 
+from functools import lru_cache
 from typing import Tuple, List
 import numpy as np
 from scipy.signal import get_window, butter, sosfilt
@@ -49,17 +50,68 @@ def _design_sos_for_band(fs: int, f0: float, f1: float, order: int = 6):
     return sos
 
 
+@lru_cache(maxsize=16)
+def _cached_window(window: str, N: int) -> np.ndarray:
+    """Ventana de longitud N (solo lectura, compartida entre llamadas)."""
+    if window is None or window.lower() == "none" or window == "rect":
+        w = np.ones(N)
+    else:
+        w = get_window(window, N, fftbins=True)
+    w.setflags(write=False)
+    return w
+
+
+class SubbandFilterBank:
+    """
+    Banco de K filtros Butterworth precalculado para (fs, N, K, window, order).
+
+    Como cada frame tiene longitud fija N y los filtros parten de estado cero,
+    sosfilt(sos_b, x)[:N] es exactamente la convolución de x con los N
+    primeros términos de la respuesta al impulso h_b. Se guarda rFFT(h_b)
+    (tamaño 2N, sin aliasing circular) y las K bandas se filtran, enventanan
+    y transforman con una sola rFFT/irFFT por lotes sobre una matriz (K, N).
+    """
+
+    def __init__(self, fs: int, N: int, K: int, window: str = "hamming", order: int = 6):
+        self.fs, self.N, self.K, self.order = fs, N, K, order
+        self.window = _cached_window(window, N)
+        self.freqs = np.fft.rfftfreq(N, d=1.0 / fs)
+        self.bands_hz = np.array(_linear_subband_edges(fs, K))
+
+        impulse = np.zeros(N)
+        impulse[0] = 1.0
+        h = np.empty((K, N))
+        self.sos = []
+        for i, (f0, f1) in enumerate(self.bands_hz):
+            sos = _design_sos_for_band(fs, f0, f1, order)
+            self.sos.append(sos)
+            h[i] = impulse if sos is None else sosfilt(sos, impulse)
+        self.H = np.fft.rfft(h, n=2 * N, axis=1)
+
+    def filter_bands(self, xN: np.ndarray) -> np.ndarray:
+        """Devuelve la matriz (K, N) con el frame filtrado por cada banda."""
+        X = np.fft.rfft(xN, n=2 * self.N)
+        return np.fft.irfft(self.H * X, n=2 * self.N, axis=1)[:, :self.N]
+
+    def energies(self, xN: np.ndarray) -> np.ndarray:
+        xb = self.filter_bands(xN) * self.window
+        P = np.abs(np.fft.rfft(xb, n=self.N, axis=1)) ** 2
+        return P.sum(axis=1) / self.N
+
+
+@lru_cache(maxsize=8)
+def get_filter_bank(fs: int, N: int, K: int, window: str = "hamming", order: int = 6) -> SubbandFilterBank:
+    """Banco de filtros compartido; se diseña una vez por configuración (LRU)."""
+    return SubbandFilterBank(fs, N, K, window, order)
+
+
 def compute_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str = "hamming") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Nueva versión: segmenta la señal en K bandas (filtro en el dominio del tiempo) y
     luego calcula la energía de cada banda vía rFFT y suma de |X|^2 / N.
     Retorna: (E[K], bands[Kx2] en Hz, freqs rFFT estándar para N)
     """
-    # Ventana
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(N)
-    else:
-        w = get_window(window, N, fftbins=True)
+    bank = get_filter_bank(int(fs), int(N), int(K), window)
 
     # Preparar frame tamaño N
     if x.size < N:
@@ -67,30 +119,52 @@ def compute_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str
     else:
         xN = x[:N]
 
+    Es = bank.energies(xN)
+    return Es, bank.bands_hz.copy(), bank.freqs
+
+
+@lru_cache(maxsize=16)
+def _fft_band_starts(N: int, K: int) -> np.ndarray:
+    """Índice inicial de cada grupo de bins (partition_equal_bins) para np.add.reduceat."""
+    starts = np.array([b0 for b0, _ in partition_equal_bins(N // 2 + 1, K)])
+    starts.setflags(write=False)
+    return starts
+
+
+def compute_subband_energies_fft(x: np.ndarray, fs: int, N: int, K: int, window: str = "hamming") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Modo de una sola FFT: enventana el frame, calcula una rFFT de longitud N
+    y suma |X|^2 / N sobre K grupos contiguos de bins (partition_equal_bins).
+    Misma salida que compute_subband_energies: (E[K], bands[Kx2] en Hz, freqs).
+    """
+    w = _cached_window(window, N)
+    xN = x[:N] if x.size >= N else np.pad(x, (0, N - x.size))
+    P = np.abs(np.fft.rfft(xN * w, n=N)) ** 2
+    starts = _fft_band_starts(int(N), int(K))
+    Es = np.add.reduceat(P, starts) / N
+
     freqs = np.fft.rfftfreq(N, d=1.0 / fs)
-    bands_hz = _linear_subband_edges(fs, K)
+    ends = np.append(starts[1:], freqs.size) - 1
+    bands_hz = np.stack((freqs[starts], freqs[ends]), axis=1)
+    return Es, bands_hz, freqs
+
 
-    Es = np.zeros(K, dtype=float)
-    for i, (f0, f1) in enumerate(bands_hz):
-        sos = _design_sos_for_band(fs, f0, f1)
-        if sos is None:
-            xb = xN.copy()
-        else:
-            xb = sosfilt(sos, xN)
-        xw = xb * w
-        Xb = np.fft.rfft(xw, n=N)
-        P = (np.abs(Xb)) ** 2
-        Es[i] = float(np.sum(P) / N)
+# Extractores seleccionables por el campo "mode" del modelo JSON
+FEATURE_MODES = {
+    "filterbank": compute_subband_energies,
+    "fft": compute_subband_energies_fft,
+}
 
-    return Es, np.array(bands_hz), freqs
+
+def extract_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str = "hamming", mode: str = "filterbank") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if mode not in FEATURE_MODES:
+        raise ValueError(f"Modo de características desconocido: {mode!r} (opciones: {list(FEATURE_MODES)})")
+    return FEATURE_MODES[mode](x, fs, N, K, window)
 
 
 def compute_spectrum_db(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
     """Devuelve (freqs, mag_db) del espectro de magnitud de x (rFFT) con ventana."""
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(N)
-    else:
-        w = get_window(window, N, fftbins=True)
+    w = _cached_window(window, N)
     xw = (x[:N] if x.size >= N else np.pad(x, (0, N - x.size))) * w
     X = np.abs(np.fft.rfft(xw, n=N))
     freqs = np.fft.rfftfreq(N, d=1.0 / fs)
@@ -100,10 +174,7 @@ def compute_spectrum_db(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
 
 def compute_spectrum_mag(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
     """Devuelve (freqs_Hz, |X(k)|) del espectro de magnitud (rFFT) con ventana."""
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(N)
-    else:
-        w = get_window(window, N, fftbins=True)
+    w = _cached_window(window, N)
     xw = (x[:N] if x.size >= N else np.pad(x, (0, N - x.size))) * w
     X = np.abs(np.fft.rfft(xw, n=N))
     freqs = np.fft.rfftfreq(N, d=1.0 / fs)
@@ -11,12 +11,10 @@ Funciones principales del lab:
 """
 
 import os
-import json
 import time
 from typing import List, Tuple, Dict
 import queue
 import threading
-from collections import deque
 
 import numpy as np
 import sounddevice as sd
@@ -25,8 +23,9 @@ from scipy.signal import get_window
 
 # Utils separadas
 from audio_utils import ensure_dir, record_fixed_length, load_and_prepare_wav, enumerate_input_devices, parse_device_index
-from dsp_utils import compute_subband_energies, compute_spectrum_mag, rms, dbfs_from_rms
-from model_utils import train_from_folder, load_model, decide_label_by_min_dist
+from dsp_utils import extract_subband_energies, FEATURE_MODES, compute_spectrum_mag, rms, dbfs_from_rms
+from model_utils import train_from_folder, load_model, save_model, decide_label_by_min_dist
+from rt_utils import SPSCRingBuffer, SlidingEnergy, UtteranceSegmenter, onset_frame
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -40,7 +39,8 @@ N = 4096           # tamaño FFT por defecto
 K = 4              # subbandas por defecto
 M = 8              # grabaciones por defecto
 WINDOW = "hamming" # ventana por defecto
-MODEL_PATH = "lab2_model.json"
+MODE = "filterbank" # extractor: "filterbank" (K filtros) o "fft" (una sola rFFT)
+MODEL_PATH = "lab2_model.npz"
 RECORDINGS_DIR = "recordings"  # carpeta para guardar grabaciones
 # ---------------------------
 
@@ -57,6 +57,7 @@ class Lab2GUI:
         self.K_var = tk.IntVar(value=K)
         self.M_var = tk.IntVar(value=M)
         self.window_var = tk.StringVar(value=WINDOW)
+        self.mode_var = tk.StringVar(value=MODE)
         self.dir_var = tk.StringVar(value=RECORDINGS_DIR)
         self.labA_var = tk.StringVar(value="A")
         self.labB_var = tk.StringVar(value="B")
@@ -73,13 +74,11 @@ class Lab2GUI:
         # Ring buffer y reconocimiento RT
         self.ring_seconds = 5.0
         self.ring_chunk = 0.1  # s
-        self.ring_buf = deque(maxlen=int(self.ring_seconds / self.ring_chunk))
-        self.ring_lock = threading.Lock()
+        self.ring = SPSCRingBuffer(int(self.ring_seconds * FS))
+        self.rt_hop = int(self.ring_chunk * FS)  # el worker despierta cada rt_hop muestras nuevas
         self._thr = threading
         self.recognizer_thread = None
         self.recognizer_stop = threading.Event()
-        self.prev_rms = 0.0
-        self.noise_rms = 0.0
         self.pred_label_var = tk.StringVar(value='-')
         self.pred_dists_var = tk.StringVar(value='-')
         # Silencio: parámetros y estado
@@ -112,6 +111,8 @@ class Lab2GUI:
         ttk.Entry(params, textvariable=self.M_var, width=5).grid(row=0, column=7, padx=4)
         ttk.Label(params, text="Ventana").grid(row=0, column=8, sticky='w', padx=4)
         ttk.Combobox(params, values=["hamming","hann","rect"], textvariable=self.window_var, state='readonly', width=10).grid(row=0, column=9, padx=4)
+        ttk.Label(params, text="Modo").grid(row=0, column=10, sticky='w', padx=4)
+        ttk.Combobox(params, values=list(FEATURE_MODES), textvariable=self.mode_var, state='readonly', width=10).grid(row=0, column=11, padx=4)
 
         ttk.Label(params, text="Grabaciones dir").grid(row=1, column=0, sticky='w', padx=4, pady=(6,0))
         ttk.Entry(params, textvariable=self.dir_var, width=40).grid(row=1, column=1, columnspan=7, padx=4, pady=(6,0), sticky='we')
@@ -215,22 +216,21 @@ class Lab2GUI:
         base = self.dir_var.get().strip()
         mapping = {self.labA_var.get().strip(): self.labA_var.get().strip(),
                    self.labB_var.get().strip(): self.labB_var.get().strip()}
-        self.model = train_from_folder(mapping, fs, N, K, M, self.window_var.get(), base, MODEL_PATH)
+        self.model = train_from_folder(mapping, fs, N, K, M, self.window_var.get(), base, MODEL_PATH, self.mode_var.get())
         self._log("Modelo entrenado.")
 
     def _save_model_dialog(self):
         if self.model is None:
             messagebox.showwarning('Sin modelo', 'Entrene o cargue un modelo primero')
             return
-        path = filedialog.asksaveasfilename(title='Guardar modelo JSON', defaultextension='.json', filetypes=[('JSON','*.json')])
+        path = filedialog.asksaveasfilename(title='Guardar modelo', defaultextension='.npz', filetypes=[('Modelo binario','*.npz'), ('JSON','*.json')])
         if not path:
             return
-        with open(path, 'w') as f:
-            json.dump(self.model, f, indent=2)
+        save_model(self.model, path)
         self._log(f"Modelo guardado en {path}")
 
     def _load_model_dialog(self):
-        path = filedialog.askopenfilename(title='Cargar modelo JSON', filetypes=[('JSON','*.json')])
+        path = filedialog.askopenfilename(title='Cargar modelo', filetypes=[('Modelos','*.npz *.json'), ('Modelo binario','*.npz'), ('JSON','*.json')])
         if not path:
             return
         self.model = load_model(path)
@@ -247,7 +247,7 @@ class Lab2GUI:
         sd.wait()
         x = data.flatten()
         x = x[:N] if len(x) >= N else np.pad(x, (0, N - len(x)))
-        Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
+        Es, bands, freqs = extract_subband_energies(x, fs, N, K, window, self.model.get('mode', 'filterbank'))
         label, dists = decide_label_by_min_dist(Es, self.model)
         self._log(f"Predicción: {label}  Distancias: {dists}")
         self._update_plots(x, fs, N, window, freqs, Es, label)
@@ -275,7 +275,7 @@ class Lab2GUI:
             messagebox.showerror('Fs incompatible', f'El WAV tiene fs={fsf} y el modelo espera fs={fs}. Remuestrea/normaliza antes.')
             return
         x = x[:N] if len(x) >= N else np.pad(x, (0, N - len(x)))
-        Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
+        Es, bands, freqs = extract_subband_energies(x, fs, N, K, window, self.model.get('mode', 'filterbank'))
         label, dists = decide_label_by_min_dist(Es, self.model)
         self._log(f"Archivo: {os.path.basename(path)}  Predicción: {label}  Distancias: {dists}")
         self._update_plots(x, fs, N, window, freqs, Es, label)
@@ -353,6 +353,9 @@ class Lab2GUI:
         fs = int(self.fs_var.get())
         dev = parse_device_index(self.device_var.get())
         block = max(32, int(self.ring_chunk * fs))  # tamaño del chunk para ring (~100 ms)
+        self.ring = SPSCRingBuffer(int(self.ring_seconds * fs))
+        self.rt_hop = block
+        ring = self.ring
 
         def cb(indata, frames, time_info, status):
             if status:
@@ -361,12 +364,8 @@ class Lab2GUI:
             # RMS
             r = rms(x)
             self.latest_rms = r
-            # almacenar en buffer circular
-            try:
-                with (self.ring_lock or self._nullcontext()):
-                    self.ring_buf.append(x.copy())
-            except Exception:
-                pass
+            # almacenar en buffer circular (copia directa al arreglo preasignado, sin lock)
+            ring.write(x)
 
         try:
             self.in_stream = sd.InputStream(samplerate=fs, channels=1, callback=cb, blocksize=block, device=dev)
@@ -411,7 +410,6 @@ class Lab2GUI:
             return
         self.pred_label_var.set('-'); self.pred_dists_var.set('-')
         self.recognizer_stop.clear()
-        self.prev_rms = 0.0; self.noise_rms = 0.0
         self.recognizer_thread = self._thr.Thread(target=self._rt_worker, daemon=True)
         self.recognizer_thread.start()
         self._log('Reconocimiento RT iniciado')
@@ -419,42 +417,39 @@ class Lab2GUI:
     def _stop_rt(self):
         if self.recognizer_thread and self.recognizer_thread.is_alive():
             self.recognizer_stop.set()
+            self.ring.wake()
             self.recognizer_thread.join(timeout=1.0)
         self._log('Reconocimiento RT detenido')
 
-    def _assemble_last(self, num_samples: int) -> np.ndarray:
-        with (self.ring_lock or self._nullcontext()):
-            if len(self.ring_buf) == 0:
-                return np.array([], dtype='float32')
-            arr = np.concatenate(list(self.ring_buf)) if len(self.ring_buf) > 1 else self.ring_buf[0].copy()
-        return arr[-num_samples:] if arr.size >= num_samples else arr
-
     def _rt_worker(self):
         fs = int(self.fs_var.get()); N = int(self.N_var.get()); K = int(self.K_var.get()); window = self.window_var.get()
+        mode = self.model.get('mode', 'filterbank')
         frame_len = N  # muestras por frame
-        # pequeña fase de estabilización para baseline (~0.5s)
-        t0 = time.time()
-        while (time.time() - t0) < 0.5 and not self.recognizer_stop.is_set():
-            time.sleep(0.05)
         last_pred_time = 0.0
+        ring = None
+        energy = SlidingEnergy(frame_len)
+        # detector de extremos: una clasificación por palabra completa (el piso de ruido se estima en ~0.5 s)
+        segmenter = UtteranceSegmenter(fs, min_rms=10 ** (self.silence_db_threshold / 20.0))
         while not self.recognizer_stop.is_set():
-            buf = self._assemble_last(frame_len)
+            if ring is not self.ring:
+                # el medidor se reinició (p. ej. otro dispositivo o fs): empezar desde el presente
+                ring = self.ring; pos = ring.written; energy.reset(); segmenter.reset(pos)
+            # despertar cuando el callback haya escrito un hop más (timeout solo para revisar la parada)
+            if not ring.wait_for(pos + self.rt_hop, timeout=0.25):
+                continue
+            # palabras completas cerradas por el segmentador con las muestras nuevas
+            new, written = ring.since(segmenter.next_pos)
+            now = time.time()
+            for start, end, onset in segmenter.feed(new, written):
+                self._classify_utterance(ring.since(start)[0][:end - start], onset - start, fs, N, K, window, mode)
+                last_pred_time = now
+            # energía (RMS) del frame actual, actualizada solo con las muestras nuevas
+            buf, pos, r = energy.slide(ring, pos)
             if buf.size < frame_len:
-                time.sleep(0.05)
                 continue
-            # energía (RMS) del frame actual
-            r = rms(buf)
             db = dbfs_from_rms(r)
-            # baseline con suavizado
-            if self.noise_rms == 0.0:
-                self.noise_rms = r
-            self.noise_rms = 0.95*self.noise_rms + 0.05*r
-            # criterio de cambio: subida significativa vs baseline o vs prev
-            changed = (r > max(self.noise_rms*1.8, self.prev_rms*1.25))
-            self.prev_rms = 0.9*self.prev_rms + 0.1*r if self.prev_rms>0 else r
-            now = time.time()
-            # Estado de silencio: dB muy bajos durante un tiempo
-            is_silence = (db < self.silence_db_threshold)
+            # Estado de silencio: dB muy bajos durante un tiempo (y ninguna palabra en curso)
+            is_silence = (db < self.silence_db_threshold) and not segmenter.in_speech
             if is_silence:
                 # Si estamos en silencio sostenido más allá del umbral, mostrar "Silencio".
                 if (now - self.last_activity_time) > self.silence_min_time:
@@ -462,34 +457,28 @@ class Lab2GUI:
                     self.pred_dists_var.set('-')
                     # Mostrar placeholder de silencio
                     self._update_plots(buf, fs, N, window, np.linspace(0, fs/2, N//2+1), np.zeros(K), '', mode="silence")
-                else:
-                    # Silencio reciente: deja el label en blanco
+                elif (now - last_pred_time) > self.silence_min_time:
+                    # Silencio reciente: deja el label en blanco (sin borrar una predicción recién emitida)
                     self.pred_label_var.set('')
                     self.pred_dists_var.set('')
-                time.sleep(0.05)
-                continue
             else:
                 # actividad detectada
                 self.last_activity_time = now
-            if changed and (now - last_pred_time) > 0.25:  # evitar exceso de triggers
-                try:
-                    Es, bands, freqs = compute_subband_energies(buf, fs, N, K, window)
-                    label, dists = decide_label_by_min_dist(Es, self.model)
-                    self.pred_label_var.set(label)
-                    self.pred_dists_var.set(str({k:f"{v:.2f}" for k,v in dists.items()}))
-                    self._log(f"RT: {label}  {dists}")
-                    self._update_plots(buf, fs, N, window, freqs, Es, label)
-                    last_pred_time = now
-                except Exception as e:
-                    self._log(f"Error RT: {e}")
-            time.sleep(0.05)
-
-    # nullcontext helper (for optional locks)
-    class _nullcontext:
-        def __enter__(self):
-            return None
-        def __exit__(self, exc_type, exc, tb):
-            return False
+
+    def _classify_utterance(self, x_utt: np.ndarray, onset: int, fs: int, N: int, K: int, window: str, mode: str):
+        # Como en un WAV, N muestras que contienen el comienzo de la palabra: el
+        # pre-roll puede ser más largo que N, así que el marco se ubica respecto
+        # del ataque (a lo sumo N/2 antes) y no del inicio de x_utt
+        x = onset_frame(x_utt, onset, N)
+        try:
+            Es, bands, freqs = extract_subband_energies(x, fs, N, K, window, mode)
+            label, dists = decide_label_by_min_dist(Es, self.model)
+            self.pred_label_var.set(label)
+            self.pred_dists_var.set(str({k:f"{v:.2f}" for k,v in dists.items()}))
+            self._log(f"RT: {label}  {dists}  ({x_utt.size/fs:.2f} s)")
+            self._update_plots(x, fs, N, window, freqs, Es, label)
+        except Exception as e:
+            self._log(f"Error RT: {e}")
 
 
 if __name__ == "__main__":
@@ -4,19 +4,70 @@ Modelo: entrenamiento desde carpetas, carga y decisión por distancia mínima.
 
 import os
 import json
-from typing import Dict, Tuple
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 import numpy as np
 
 from audio_utils import load_and_prepare_wav
-from dsp_utils import compute_subband_energies
+from dsp_utils import extract_subband_energies
 
+FEATURE_CACHE_DIR = ".feature_cache"
 
-def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int, window: str, recordings_dir: str, model_path: str = "lab2_model.json") -> dict:
+
+def _feature_cache_path(cache_dir: str, wpath: str, params: tuple) -> str:
+    """Ruta de caché: clave = ruta absoluta + mtime + tamaño + parámetros de extracción."""
+    st = os.stat(wpath)
+    key = repr((os.path.abspath(wpath), st.st_mtime_ns, st.st_size, params))
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npy")
+
+
+def _extract_file_features(wpath: str, fs: int, N: int, K: int, window: str, mode: str) -> np.ndarray:
+    x = load_and_prepare_wav(wpath, N)
+    Es, _, _ = extract_subband_energies(x, fs, N, K, window, mode)
+    return Es
+
+
+def extract_features(wpaths: List[str], fs: int, N: int, K: int, window: str, mode: str = "filterbank", workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR) -> List[np.ndarray]:
+    """
+    E[K] para cada WAV, en el mismo orden. Lo que ya está en la caché (mismo
+    archivo, mtime y parámetros) no se vuelve a procesar; el resto se reparte
+    en un pool de procesos (workers=1: secuencial, cache_dir=None: sin caché).
+    """
+    params = (fs, N, K, window, mode)
+    results: List = [None] * len(wpaths)
+    pending = []
+    for i, wpath in enumerate(wpaths):
+        if cache_dir is not None:
+            cpath = _feature_cache_path(cache_dir, wpath, params)
+            if os.path.exists(cpath):
+                results[i] = np.load(cpath)
+                continue
+        pending.append(i)
+
+    if pending:
+        args = [(wpaths[i], fs, N, K, window, mode) for i in pending]
+        if workers == 1 or len(pending) < 4:
+            computed = [_extract_file_features(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(_extract_file_features, *zip(*args), chunksize=8))
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        for i, Es in zip(pending, computed):
+            results[i] = Es
+            if cache_dir is not None:
+                np.save(_feature_cache_path(cache_dir, wpaths[i], params), Es)
+    return results
+
+
+def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int, window: str, recordings_dir: str, model_path: str = "lab2_model.npz", mode: str = "filterbank", workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR) -> dict:
     model = {
         "fs": fs,
         "N": N,
         "K": K,
         "window": window,
+        "mode": mode,
         "commands": {}
     }
     for label, subdir in commands.items():
@@ -24,32 +75,125 @@ def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int,
         wavs = sorted([os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".wav")])
         if len(wavs) < M:
             raise RuntimeError(f"Para '{label}' se requieren al menos M={M} wavs en {folder}. Encontradas: {len(wavs)}")
-        Es_all = []
-        for wpath in wavs[:M]:
-            x = load_and_prepare_wav(wpath, N)
-            Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
-            Es_all.append(Es)
-        Es_all = np.vstack(Es_all)
+        Es_all = np.vstack(extract_features(wavs[:M], fs, N, K, window, mode, workers=workers, cache_dir=cache_dir))
         E_mean = Es_all.mean(axis=0).tolist()
         E_std = Es_all.std(axis=0).tolist()
         model["commands"][label] = {"mean": E_mean, "std": E_std, "count": int(Es_all.shape[0])}
         print(f"Entrenado '{label}': mean={E_mean}, std={E_std}")
-    with open(model_path, "w") as f:
-        json.dump(model, f, indent=2)
+    save_model(model, model_path)
     print(f"Modelo guardado en {model_path}")
     return model
 
 
+# ========== Formato de modelo (binario .npz, JSON como importación/exportación) ==========
+
+MODEL_FORMAT = "lab3-model"
+MODEL_FORMAT_VERSION = 1
+
+
+def _json_default(obj):
+    """Arreglos y escalares NumPy (modelos cargados del formato binario) a tipos JSON."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} no es serializable a JSON")
+
+
+def save_model(model: dict, path: str) -> None:
+    """Guarda en el formato binario versionado si la extensión es .npz; si no, exporta JSON."""
+    if not path.lower().endswith(".npz"):
+        with open(path, "w") as f:
+            json.dump(model, f, indent=2, default=_json_default)
+        return
+    prepared = prepare_model(model)
+    meta = {
+        "format": MODEL_FORMAT,
+        "version": MODEL_FORMAT_VERSION,
+        "fs": int(model["fs"]),
+        "N": int(model["N"]),
+        "K": int(model["K"]),
+        "window": model["window"],
+        "mode": model.get("mode", "filterbank"),
+        "labels": prepared.labels,
+        "counts": [int(model["commands"][l].get("count", 0)) for l in prepared.labels],
+    }
+    stds = np.array([model["commands"][l]["std"] for l in prepared.labels], dtype=float)
+    with open(path, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), means=prepared.means, stds=stds)
+
+
+def _load_model_npz(path: str) -> dict:
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("format") != MODEL_FORMAT:
+            raise RuntimeError(f"{path} no es un modelo del lab3")
+        if meta["version"] > MODEL_FORMAT_VERSION:
+            raise RuntimeError(f"{path} usa la versión {meta['version']} del formato (se soporta hasta {MODEL_FORMAT_VERSION})")
+        means, stds = data["means"], data["stds"]
+    model = {key: meta[key] for key in ("fs", "N", "K", "window", "mode")}
+    model["commands"] = {label: {"mean": means[i], "std": stds[i], "count": meta["counts"][i]}
+                         for i, label in enumerate(meta["labels"])}
+    return model
+
+
 def load_model(path: str) -> dict:
-    with open(path, "r") as f:
-        return json.load(f)
+    """
+    Carga un modelo .npz o JSON (se detecta por el contenido) y deja su
+    clasificador preparado en caché. Si el .npz pedido no existe pero sí su
+    .json hermano (modelos anteriores al formato binario), se importa ese.
+    """
+    if path.lower().endswith(".npz") and not os.path.exists(path):
+        legacy = path[:-4] + ".json"
+        if os.path.exists(legacy):
+            path = legacy
+    with open(path, "rb") as f:
+        is_npz = f.read(4) == b"PK\x03\x04"
+    if is_npz:
+        model = _load_model_npz(path)
+    else:
+        with open(path, "r") as f:
+            model = json.load(f)
+    # Modelos anteriores al campo "mode" se entrenaron con el banco de filtros
+    model.setdefault("mode", "filterbank")
+    prepare_model(model)
+    return model
+
+
+class PreparedModel:
+    """Medias de todos los comandos en una matriz (C, K), armada una sola vez por modelo."""
+
+    def __init__(self, model: dict):
+        self.model = model
+        self.labels = list(model["commands"].keys())
+        self.means = np.ascontiguousarray([model["commands"][l]["mean"] for l in self.labels], dtype=float)
+
+    def distances(self, E: np.ndarray) -> np.ndarray:
+        """Distancia euclídea de E a la media de cada comando (mismo orden que labels)."""
+        return np.linalg.norm(np.asarray(E, dtype=float)[None, :] - self.means, axis=1)
+
+    def decide(self, E: np.ndarray) -> Tuple[str, dict]:
+        d = self.distances(E)
+        dists = {label: float(v) for label, v in zip(self.labels, d)}
+        return self.labels[int(np.argmin(d))], dists
+
+
+_PREPARED_CACHE: Dict[int, tuple] = {}
+
+
+def prepare_model(model) -> PreparedModel:
+    """Clasificador preparado del modelo (cacheado por objeto; tratar el modelo como de solo lectura)."""
+    if isinstance(model, PreparedModel):
+        return model
+    entry = _PREPARED_CACHE.get(id(model))
+    if entry is not None and entry[0] is model:
+        return entry[1]
+    prepared = PreparedModel(model)
+    if len(_PREPARED_CACHE) >= 8:
+        _PREPARED_CACHE.pop(next(iter(_PREPARED_CACHE)))
+    _PREPARED_CACHE[id(model)] = (model, prepared)
+    return prepared
 
 
 def decide_label_by_min_dist(E: np.ndarray, model: dict) -> Tuple[str, dict]:
-    dists = {}
-    for label, info in model["commands"].items():
-        mean = np.array(info["mean"], dtype=float)
-        d = np.linalg.norm(E - mean)
-        dists[label] = float(d)
-    best = min(dists.items(), key=lambda kv: kv[1])[0]
-    return best, dists
+    return prepare_model(model).decide(E)
@@ -1,45 +1,85 @@
-import struct, wave
+import wave
+
+import numpy as np
 
 try:
     import pyaudio
 except Exception:
     pyaudio = None
 
-def _float_a_pcm16(x):
-    if x>1.0: x=1.0
-    if x<-1.0: x=-1.0
-    return int(x*32767.0)
+# formato -> (bytes por muestra, escala de lectura, escala de escritura)
+_FORMATOS_PCM = {
+    "int16": (2, 32768.0, 32767.0),
+    "int24": (3, 8388608.0, 8388607.0),
+    "int32": (4, 2147483648.0, 2147483647.0),
+    "float32": (4, 1.0, 1.0),
+}
+
+
+def _formato_pyaudio(formato):
+    return {"int16": pyaudio.paInt16, "int24": pyaudio.paInt24,
+            "int32": pyaudio.paInt32, "float32": pyaudio.paFloat32}[formato]
+
 
-def _pcm16_a_float(i): return float(i)/32768.0
+def _bytes_a_floats(b, formato="int16", out=None):
+    """Bytes PCM little-endian -> ndarray float32 en [-1, 1), sin pasar por listas."""
+    ancho, escala, _ = _FORMATOS_PCM[formato]
+    if formato == "float32":
+        vals = np.frombuffer(b, dtype="<f4")
+    elif formato == "int24":
+        crudo = np.frombuffer(b, dtype=np.uint8)[: len(b) // 3 * 3].reshape(-1, 3)
+        # Se coloca cada muestra en los 3 bytes altos de un int32 y se desplaza (extiende signo)
+        ext = np.zeros((crudo.shape[0], 4), dtype=np.uint8)
+        ext[:, 1:] = crudo
+        vals = ext.view("<i4").ravel() >> 8
+    else:
+        vals = np.frombuffer(b, dtype="<i2" if ancho == 2 else "<i4")
 
-def _bytes_a_floats(b):
-    N=len(b)//2; vals=struct.unpack("<"+"h"*N, b)
-    return [_pcm16_a_float(v) for v in vals]
+    if out is None:
+        out = np.empty(vals.size, dtype=np.float32)
+    np.multiply(vals, 1.0 / escala, out=out, casting="unsafe")
+    return out
 
-def _floats_a_bytes(vs):
-    ints=[_float_a_pcm16(v) for v in vs]
-    return struct.pack("<"+"h"*len(ints), *ints)
 
-def grabar_voz(segundos, fs, canales=1, frames_por_buffer=1024):
+def _floats_a_bytes(vs, formato="int16"):
+    """ndarray (o secuencia) de floats -> bytes PCM little-endian con recorte vectorizado."""
+    _, _, escala = _FORMATOS_PCM[formato]
+    x = np.clip(np.asarray(vs, dtype=np.float64).ravel(), -1.0, 1.0)
+    if formato == "float32":
+        return x.astype("<f4").tobytes()
+    if formato == "int16":
+        return (x * escala).astype("<i2").tobytes()
+    enteros = (x * escala).astype("<i4")
+    if formato == "int24":
+        return enteros.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return enteros.tobytes()
+
+
+def grabar_voz(segundos, fs, canales=1, frames_por_buffer=1024, formato="int16"):
     if pyaudio is None: raise RuntimeError("PyAudio no está disponible. pip install pyaudio")
     pa=pyaudio.PyAudio()
-    st=pa.open(format=pyaudio.paInt16, channels=canales, rate=fs, input=True, frames_per_buffer=frames_por_buffer)
-    frames=[]; total=int((fs*segundos)/frames_por_buffer)
-    for _ in range(total):
-        frames.append(st.read(frames_por_buffer))
+    st=pa.open(format=_formato_pyaudio(formato), channels=canales, rate=fs, input=True, frames_per_buffer=frames_por_buffer)
+    total=int((fs*segundos)/frames_por_buffer)
+    paso=frames_por_buffer*canales
+    senal=np.empty(total*paso, dtype=np.float32)
+    for k in range(total):
+        _bytes_a_floats(st.read(frames_por_buffer), formato, out=senal[k*paso:(k+1)*paso])
     st.stop_stream(); st.close(); pa.terminate()
-    return _bytes_a_floats(b"".join(frames))
+    return senal
 
-def reproducir_audio(senal, fs, canales=1, frames_por_buffer=1024):
+def reproducir_audio(senal, fs, canales=1, frames_por_buffer=1024, formato="int16"):
     if pyaudio is None: raise RuntimeError("PyAudio no está disponible. pip install pyaudio")
     pa=pyaudio.PyAudio()
-    st=pa.open(format=pyaudio.paInt16, channels=canales, rate=fs, output=True, frames_per_buffer=frames_por_buffer)
-    i=0; N=len(senal)
-    while i<N:
-        st.write(_floats_a_bytes(senal[i:i+frames_por_buffer])); i+=frames_por_buffer
+    st=pa.open(format=_formato_pyaudio(formato), channels=canales, rate=fs, output=True, frames_per_buffer=frames_por_buffer)
+    datos=_floats_a_bytes(senal, formato)
+    paso=frames_por_buffer*canales*_FORMATOS_PCM[formato][0]
+    for i in range(0, len(datos), paso):
+        st.write(datos[i:i+paso])
     st.stop_stream(); st.close(); pa.terminate()
-    
-def guardar_wav(ruta, senal, fs, canales=1):
+
+def guardar_wav(ruta, senal, fs, canales=1, formato="int16"):
+    if formato == "float32":
+        raise ValueError("El módulo wave solo escribe PCM entero (int16/int24/int32)")
     with wave.open(ruta, "wb") as w:
-        w.setnchannels(canales); w.setsampwidth(2); w.setframerate(fs)
-        w.writeframes(_floats_a_bytes(senal))
+        w.setnchannels(canales); w.setsampwidth(_FORMATOS_PCM[formato][0]); w.setframerate(fs)
+        w.writeframes(_floats_a_bytes(senal, formato))
@@ -1,3 +1,38 @@
+import numpy as np
+
+try:
+    from scipy.signal import lfilter, lfiltic, sosfilt
+except Exception:
+    lfilter = None
+    lfiltic = None
+    sosfilt = None
+
+
+def _filtrar_con_estado(b, a, senal, x_delay, y_delay, muestra_a_muestra):
+    """
+    Filtra un bloque completo (ndarray) en C con lfilter, arrancando desde el
+    estado de forma directa I [x(n-1), x(n-2), ...] / [y(n-1), y(n-2), ...]
+    y devolviendo el estado actualizado, para que bloques sucesivos den
+    exactamente la misma salida que el camino muestra a muestra.
+    """
+    x = np.asarray(senal, dtype=np.float64).ravel()
+    if x.size == 0:
+        return np.zeros(0), list(x_delay), list(y_delay)
+
+    if lfilter is None:
+        # Sin SciPy: mismo resultado con la recursión en Python
+        y = np.fromiter((muestra_a_muestra(v) for v in x), dtype=np.float64, count=x.size)
+        return y, None, None
+
+    zi = lfiltic(b, a, y_delay, x_delay)
+    y, _ = lfilter(b, a, x, zi=zi)
+
+    orden = len(x_delay)
+    x_hist = np.concatenate((np.asarray(x_delay[::-1], dtype=np.float64), x))[-orden:][::-1]
+    y_hist = np.concatenate((np.asarray(y_delay[::-1], dtype=np.float64), y))[-orden:][::-1]
+    return y, x_hist.tolist(), y_hist.tolist()
+
+
 class FiltroBiquadOrden4:
     def __init__(self, coeficiente_b0, coeficiente_b1, coeficiente_b2, coeficiente_a1, coeficiente_a2):
         self.b0 = float(coeficiente_b0); self.b1 = float(coeficiente_b1); self.b2 = float(coeficiente_b2)
@@ -9,10 +44,21 @@ class FiltroBiquadOrden4:
         self.x2, self.x1 = self.x1, x
         self.y2, self.y1 = self.y1, y
         return y
-    
+
     def filtrar_bloque(self, senal):
-        return [self.filtrar_muestra(v) for v in senal] 
-    
+        return [self.filtrar_muestra(v) for v in senal]
+
+    def procesar_bloque(self, senal):
+        """Versión vectorizada de filtrar_bloque: ndarray de entrada y salida, conserva el estado."""
+        b = [self.b0, self.b1, self.b2]
+        a = [1.0, self.a1, self.a2]
+        y, x_hist, y_hist = _filtrar_con_estado(b, a, senal, [self.x1, self.x2], [self.y1, self.y2],
+                                                self.filtrar_muestra)
+        if x_hist is not None:
+            self.x1, self.x2 = x_hist
+            self.y1, self.y2 = y_hist
+        return y
+
     def clonar_reseteado(self):
         return FiltroBiquadOrden4(self.b0, self.b1, self.b2, self.a1, self.a2)
 
@@ -47,7 +93,103 @@ class FiltroButterworthPasabandaOrden4:
     def filtrar_bloque(self, senal):
         return [self.filtrar_muestra(v) for v in senal]
 
+    def procesar_bloque(self, senal):
+        """Versión vectorizada de filtrar_bloque: ndarray de entrada y salida, conserva el estado."""
+        b = [self.A0, 0.0, -self.A2, 0.0, self.A4]
+        a = [self.B0, self.B1, self.B2, self.B3, self.B4]
+        y, x_hist, y_hist = _filtrar_con_estado(b, a, senal, self._x_delay, self._y_delay,
+                                                self.filtrar_muestra)
+        if x_hist is not None:
+            self._x_delay = x_hist
+            self._y_delay = y_hist
+        return y
+
     def clonar_reseteado(self):
         return FiltroButterworthPasabandaOrden4(self.A0, self.A2, self.A4,
                                                 self.B0, self.B1, self.B2,
                                                 self.B3, self.B4)
+
+
+class FiltroSOS:
+    """
+    Cascada de secciones de segundo orden (filas [b0, b1, b2, 1, a1, a2]).
+    Procesa bloques completos con sosfilt; cada sección recursa solo en
+    orden 2, así que admite buffers float32 y bandas estrechas sin la
+    pérdida de precisión de la forma directa de orden 4.
+    """
+
+    def __init__(self, sos, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.sos = np.array(sos, dtype=self.dtype).reshape(-1, 6)
+        self._zi = np.zeros((self.sos.shape[0], 2), dtype=self.dtype)
+        self._secciones = [FiltroBiquadOrden4(b0, b1, b2, a1 / a0, a2 / a0)
+                           for b0, b1, b2, a0, a1, a2 in self.sos.astype(np.float64)]
+
+    def procesar_bloque(self, senal):
+        x = np.asarray(senal, dtype=self.dtype).ravel()
+        if sosfilt is None:
+            for seccion in self._secciones:
+                x = seccion.procesar_bloque(x).astype(self.dtype)
+            return x
+        y, self._zi = sosfilt(self.sos, x, zi=self._zi)
+        return y
+
+    def filtrar_muestra(self, x):
+        return float(self.procesar_bloque([x])[0])
+
+    def filtrar_bloque(self, senal):
+        return self.procesar_bloque(senal).tolist()
+
+    def clonar_reseteado(self):
+        return FiltroSOS(self.sos, dtype=self.dtype)
+
+
+# ========================= Prueba de equivalencia =========================
+
+if __name__ == "__main__":
+    import time
+    from diseno_bilineal import disenar_butterworth_pasabanda_bilineal_teorico
+
+    fs = 44100
+    coef = disenar_butterworth_pasabanda_bilineal_teorico(2000, 4000, fs)[:8]
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1.0, 1.0, 3 * fs)
+
+    ref = FiltroButterworthPasabandaOrden4(*coef)
+    t0 = time.perf_counter()
+    y_ref = np.array(ref.filtrar_bloque(x.tolist()))
+    t_ref = time.perf_counter() - t0
+
+    # Bloques de tamaño irregular (incluye bloques más cortos que el orden)
+    vec = FiltroButterworthPasabandaOrden4(*coef)
+    cortes = [0, 1, 3, 1024, 1027, 50000, x.size]
+    t0 = time.perf_counter()
+    y_vec = np.concatenate([vec.procesar_bloque(x[i:j]) for i, j in zip(cortes[:-1], cortes[1:])])
+    t_vec = time.perf_counter() - t0
+
+    # Mezclar ambos caminos sobre el mismo estado
+    mix = FiltroButterworthPasabandaOrden4(*coef)
+    y_mix = np.concatenate([mix.procesar_bloque(x[:777]),
+                            np.array(mix.filtrar_bloque(x[777:800].tolist())),
+                            mix.procesar_bloque(x[800:])])
+
+    err = max(np.max(np.abs(y_vec - y_ref)), np.max(np.abs(y_mix - y_ref)))
+    print(f"Error máximo bloque vs muestra: {err:.3e}")
+    print(f"Muestra a muestra: {t_ref*1e3:.1f} ms | Bloque: {t_vec*1e3:.1f} ms")
+    assert err < 1e-9, "El motor por bloques no coincide con el camino muestra a muestra"
+
+    bq = FiltroBiquadOrden4(0.2, 0.0, -0.2, -1.5, 0.8)
+    y_bq_ref = np.array(bq.clonar_reseteado().filtrar_bloque(x[:5000].tolist()))
+    y_bq = np.concatenate([bq.procesar_bloque(x[:1]), bq.procesar_bloque(x[1:5000])])
+    assert np.max(np.abs(y_bq - y_bq_ref)) < 1e-12
+
+    from diseno_bilineal import disenar_butterworth_pasabanda_bilineal_sos
+    sos = disenar_butterworth_pasabanda_bilineal_sos(2000, 4000, fs)
+    f_sos = FiltroSOS(sos)
+    y_sos = np.concatenate([f_sos.procesar_bloque(x[:1000]), f_sos.procesar_bloque(x[1000:])])
+    err_sos = np.max(np.abs(y_sos - y_ref))
+    y_sos32 = FiltroSOS(sos, dtype=np.float32).procesar_bloque(x)
+    err_sos32 = np.max(np.abs(y_sos32 - y_ref))
+    print(f"Error SOS float64: {err_sos:.3e} | SOS float32: {err_sos32:.3e}")
+    assert err_sos < 1e-9 and err_sos32 < 1e-4
+    print("OK")
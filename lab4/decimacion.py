@@ -0,0 +1,136 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _reducir(a, factor, ufunc):
+    """Agrupa `a` de a `factor` elementos (rellenando con el borde) y aplica ufunc.reduce."""
+    resto = (-a.size) % factor
+    if resto:
+        a = np.concatenate((a, np.full(resto, a[-1])))
+    return ufunc.reduce(a.reshape(-1, factor), axis=1)
+
+
+def envolvente_min_max(mins, maxs, n_cubos):
+    """
+    Reduce (mins, maxs) a lo sumo n_cubos cubos contiguos conservando el
+    mínimo y el máximo de cada uno (ningún pico se pierde). Devuelve
+    (índice central de cada cubo, mins, maxs).
+    """
+    n = mins.size
+    if n <= n_cubos:
+        return np.arange(n) + 0.5, mins, maxs
+    bordes = np.unique(np.linspace(0, n, int(n_cubos) + 1).astype(np.int64)[:-1])
+    centros = (bordes + np.append(bordes[1:], n)) / 2.0
+    return centros, np.minimum.reduceat(mins, bordes), np.maximum.reduceat(maxs, bordes)
+
+
+class PiramideMinMax:
+    """
+    Pirámide de envolventes min/max precalculada una sola vez por señal:
+    el nivel 0 es la señal cruda y cada nivel siguiente agrupa `factor`
+    cubos del anterior. La entrada flotante conserva su dtype (float32 no se
+    copia si es contigua); solo la entera se convierte a float64. Cualquier
+    vista (tamaño del canvas o zoom) se sirve desde el nivel más grueso que
+    aún tiene resolución suficiente.
+    """
+
+    def __init__(self, x, factor=4, min_cubos=512):
+        x = np.asarray(x)
+        if not np.issubdtype(x.dtype, np.floating):
+            x = x.astype(np.float64)
+        x = x.ravel()
+        self.n = x.size
+        self.niveles = [(1, x, x)]  # (muestras por cubo, mins, maxs)
+        mins = maxs = x
+        tam = 1
+        while mins.size > min_cubos:
+            mins = _reducir(mins, factor, np.minimum)
+            maxs = _reducir(maxs, factor, np.maximum)
+            tam *= factor
+            self.niveles.append((tam, mins, maxs))
+
+    def consultar(self, n_pix, inicio=0, fin=None):
+        """Envolvente de [inicio, fin) en n_pix columnas: (índice de muestra, mins, maxs)."""
+        fin = self.n if fin is None else min(int(fin), self.n)
+        inicio = max(int(inicio), 0)
+        if fin <= inicio:
+            vacio = np.zeros(0)
+            return vacio, vacio, vacio
+
+        por_pix = (fin - inicio) / max(int(n_pix), 1)
+        tam, mins, maxs = self.niveles[0]
+        for nivel in self.niveles[1:]:
+            if nivel[0] > por_pix:
+                break
+            tam, mins, maxs = nivel
+
+        i0 = inicio // tam
+        i1 = -(-fin // tam)
+        centros, m, M = envolvente_min_max(mins[i0:i1], maxs[i0:i1], n_pix)
+        return (i0 + centros) * tam, m, M
+
+    def rango(self):
+        _, mins, maxs = self.niveles[-1]
+        if mins.size == 0:
+            return 0.0, 0.0
+        return float(np.min(mins)), float(np.max(maxs))
+
+
+class CachePiramides:
+    """LRU de pirámides por objeto señal (guarda la referencia para que id() no se reutilice)."""
+
+    def __init__(self, max_entradas=8):
+        self.max_entradas = int(max_entradas)
+        self._datos = OrderedDict()
+
+    def obtener(self, senal, **opciones):
+        clave = (id(senal), len(senal))
+        entrada = self._datos.get(clave)
+        if entrada is not None and entrada[0] is senal:
+            self._datos.move_to_end(clave)
+            return entrada[1]
+        piramide = PiramideMinMax(senal, **opciones)
+        self._datos[clave] = (senal, piramide)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+        return piramide
+
+
+def coords_envolvente(xs_pix, ys_min_pix, ys_max_pix):
+    """Coordenadas planas [x0, ymax0, x0, ymin0, x1, ymax1, ...] para create_line/coords."""
+    pts = np.empty((xs_pix.size, 4))
+    pts[:, 0] = xs_pix
+    pts[:, 1] = ys_max_pix
+    pts[:, 2] = xs_pix
+    pts[:, 3] = ys_min_pix
+    return pts.ravel().tolist()
+
+
+def coords_linea(xs_pix, ys_pix):
+    pts = np.empty((xs_pix.size, 2))
+    pts[:, 0] = xs_pix
+    pts[:, 1] = ys_pix
+    return pts.ravel().tolist()
+
+
+if __name__ == "__main__":
+    import time
+
+    x = np.random.default_rng(0).standard_normal(10 * 60 * 44100)
+    x[12345678] = 25.0  # pico aislado que no debe perderse
+    t0 = time.perf_counter()
+    p = PiramideMinMax(x)
+    t_pir = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for ancho in (400, 800, 1600):
+        idx, m, M = p.consultar(ancho)
+        assert M.max() == 25.0 and m.min() == x.min() and idx.size <= ancho
+    idx, m, M = p.consultar(800, 12_000_000, 12_500_000)
+    assert M.max() == 25.0
+    t_cons = (time.perf_counter() - t0) / 4
+    x32 = x[:100_000].astype(np.float32)
+    p32 = PiramideMinMax(x32)
+    assert np.shares_memory(p32.niveles[0][1], x32) and p32.niveles[-1][1].dtype == np.float32
+    assert PiramideMinMax(np.arange(10, dtype=np.int16)).niveles[0][1].dtype == np.float64
+    print(f"Pirámide: {t_pir*1e3:.0f} ms (una vez) | consulta: {t_cons*1e3:.2f} ms")
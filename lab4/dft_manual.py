@@ -1,10 +1,12 @@
 import numpy as np
+from functools import lru_cache
 from math import sqrt
 
 
 def calcular_dft_real(senal, frecuencia_muestreo_hz):
+    """Devuelve (freqs, magnitud) como ndarrays contiguos."""
     if senal is None or len(senal) == 0:
-        return []
+        return np.zeros(0), np.zeros(0)
 
     x = np.asarray(senal, dtype=np.float64)
     N = x.size
@@ -16,23 +18,63 @@ def calcular_dft_real(senal, frecuencia_muestreo_hz):
     # Vector de frecuencias correspondiente (Hz)
     freqs = np.fft.rfftfreq(N, d=1.0 / float(frecuencia_muestreo_hz))
 
-    return list(zip(freqs.tolist(), magnitud.tolist()))
+    return freqs, magnitud
+
+
+def secciones_de_filtro(filtro):
+    """
+    Coeficientes del filtro como tupla de secciones ((b...), (a...)) en z^-1,
+    hashable para poder usarse como clave de caché.
+    """
+    if hasattr(filtro, "sos"):
+        return tuple((tuple(map(float, fila[:3])), tuple(map(float, fila[3:]))) for fila in filtro.sos)
+    if hasattr(filtro, "B0"):
+        return (((filtro.A0, 0.0, -filtro.A2, 0.0, filtro.A4),
+                 (filtro.B0, filtro.B1, filtro.B2, filtro.B3, filtro.B4)),)
+    return (((filtro.b0, filtro.b1, filtro.b2), (1.0, filtro.a1, filtro.a2)),)
+
+
+@lru_cache(maxsize=32)
+def _respuesta_cacheada(secciones, frecuencia_muestreo_hz, n_puntos):
+    freqs = np.linspace(0.0, frecuencia_muestreo_hz / 2.0, n_puntos)
+    z_inv = np.exp(-2j * np.pi * freqs / frecuencia_muestreo_hz)
+
+    H = np.ones(n_puntos, dtype=np.complex128)
+    for b, a in secciones:
+        # polyval usa potencias decrecientes; los coeficientes vienen en z^-1 creciente
+        H *= np.polyval(b[::-1], z_inv) / np.polyval(a[::-1], z_inv)
+
+    magnitud = np.abs(H)
+    freqs.setflags(write=False)
+    magnitud.setflags(write=False)
+    return freqs, magnitud
+
+
+def respuesta_en_frecuencia(filtro, frecuencia_muestreo_hz, n_puntos=1025):
+    """
+    |H(e^jw)| evaluada analíticamente a partir de los coeficientes, en
+    n_puntos frecuencias de 0 a fs/2. Memoizada por (coeficientes, fs,
+    n_puntos); los arrays devueltos son de solo lectura.
+    """
+    if filtro is None:
+        return np.zeros(0), np.zeros(0)
+    return _respuesta_cacheada(secciones_de_filtro(filtro), float(frecuencia_muestreo_hz), int(n_puntos))
 
 
 def respuesta_en_frecuencia_por_impulso(filtro_biquad, frecuencia_muestreo_hz, longitud=2048):
     if filtro_biquad is None:
-        return []
+        return np.zeros(0), np.zeros(0)
 
     # Generar impulso unitario (delta[n])
     h = np.zeros(int(longitud))
     h[0] = 1.0
 
-    # Filtrar el impulso con el biquad
-    resp = np.array(filtro_biquad.filtrar_bloque(h.tolist()))
+    # Filtrar el impulso con una copia sin estado (no altera el filtro original)
+    resp = filtro_biquad.clonar_reseteado().procesar_bloque(h)
 
     # FFT del resultado
     X = np.fft.rfft(resp)
     magnitud = np.abs(X)
     freqs = np.fft.rfftfreq(len(resp), d=1.0 / float(frecuencia_muestreo_hz))
 
-    return list(zip(freqs.tolist(), magnitud.tolist()))
+    return freqs, magnitud
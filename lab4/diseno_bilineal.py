@@ -1,4 +1,7 @@
 from math import pi, tan, sqrt
+from cmath import exp as cexp, sqrt as csqrt
+
+import numpy as np
 
 
 # ========================= 1. Funciones base =========================
@@ -54,7 +57,39 @@ def disenar_butterworth_pasabanda_bilineal_teorico(fc1_hz, fc2_hz, fs_hz):
     return A0, A2, A4, B0, B1, B2, B3, B4, a, b, c, d, e, omega0, BW, T
 
 
-# ========================= 5. Prueba de validación =========================
+# ========================= 5. Diseño en secciones de segundo orden (SOS) =========================
+
+def secciones_sos(omega0, BW, fs_hz):
+    """
+    Mismo filtro que coeficientes_diferencias, pero factorizado en dos
+    secciones bicuadráticas [b0, b1, b2, 1, a1, a2] (formato SOS de SciPy).
+
+    Cada polo del prototipo pasabajos Butterworth de orden 2 (p = e^{±j3π/4})
+    se lleva a pasabanda con s² - p·BW·s + ω0² = 0, se agrupa con su
+    conjugado y a cada sección analógica BW·s / (s² + p1·s + p0) se le
+    aplica la bilineal por separado.
+    """
+    K = 2.0 * fs_hz
+    p = cexp(1j * 3.0 * pi / 4.0)
+    disc = csqrt((p * BW) ** 2 - 4.0 * omega0 ** 2)
+    polos = ((p * BW + disc) / 2.0, (p * BW - disc) / 2.0)
+
+    sos = np.zeros((2, 6))
+    for i, s_k in enumerate(polos):
+        p1 = -2.0 * s_k.real
+        p0 = abs(s_k) ** 2
+        a0 = K**2 + p1*K + p0
+        g = BW * K / a0
+        sos[i] = [g, 0.0, -g, 1.0, (2*p0 - 2*K**2) / a0, (K**2 - p1*K + p0) / a0]
+    return sos
+
+
+def disenar_butterworth_pasabanda_bilineal_sos(fc1_hz, fc2_hz, fs_hz):
+    omega0, BW = obtener_parametros_analogicos(fc1_hz, fc2_hz, fs_hz)
+    return secciones_sos(omega0, BW, fs_hz)
+
+
+# ========================= 6. Prueba de validación =========================
 
 if __name__ == "__main__":
     fs = 44100
@@ -73,3 +108,16 @@ if __name__ == "__main__":
 
     print("\nEcuación de diferencias final:")
     print("y[n] = (1/B0)*(A0*x[n] - A2*x[n-2] + A4*x[n-4] - B1*y[n-1] - B2*y[n-2] - B3*y[n-3] - B4*y[n-4])")
+
+    sos = disenar_butterworth_pasabanda_bilineal_sos(fc1, fc2, fs)
+    print("\n=== Secciones SOS [b0, b1, b2, 1, a1, a2] ===")
+    for fila in sos:
+        print("  " + ", ".join(f"{v:.6e}" for v in fila))
+
+    # La cascada debe reproducir el polinomio directo de orden 4
+    num = np.polymul(sos[0, :3], sos[1, :3])
+    den = np.polymul(sos[0, 3:], sos[1, 3:])
+    num_ref = np.array([A0, 0.0, -A2, 0.0, A4]) / B0
+    den_ref = np.array([B0, B1, B2, B3, B4]) / B0
+    err = max(np.max(np.abs(num - num_ref)), np.max(np.abs(den - den_ref)))
+    print(f"\nError cascada SOS vs forma directa: {err:.3e}")
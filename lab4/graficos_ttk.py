@@ -2,81 +2,105 @@
 import tkinter as tk
 from math import log10
 
+import numpy as np
 
-def trazar_espectros_dobles(canvas, espectro_original, espectro_filtrada):
+from decimacion import CachePiramides, coords_envolvente, coords_linea
+
+
+def _espectro_como_arrays(espectro):
     """
-    Dibuja dos espectros (original y filtrado) en el mismo canvas, uno arriba
-    y otro abajo. Acepta tanto listas de magnitudes como listas de pares
-    (frecuencia, magnitud) y muestra ejes con valores numéricos.
+    Normaliza un espectro a (freqs, mags) ndarray. Acepta la tupla de arrays
+    de calcular_dft_real, listas de pares (f, mag) o listas de magnitudes.
+    """
+    if espectro is None:
+        return np.zeros(0), np.zeros(0)
+    if isinstance(espectro, tuple) and len(espectro) == 2 and all(isinstance(v, np.ndarray) for v in espectro):
+        return np.asarray(espectro[0], dtype=np.float64), np.asarray(espectro[1], dtype=np.float64)
+    datos = np.asarray(espectro, dtype=np.float64)
+    if datos.ndim == 2 and datos.shape[1] >= 2:
+        return datos[:, 0], datos[:, 1]
+    datos = datos.ravel()
+    return np.arange(datos.size, dtype=np.float64), datos
+
+
+class LienzoLOD:
+    """
+    Estado de dibujo asociado a un tk.Canvas: las curvas se crean una vez y
+    luego solo se actualizan con canvas.coords(); el fondo (rejilla, ejes,
+    etiquetas) se regenera únicamente cuando cambia su clave (tamaño, escalas).
     """
 
-    # --- Limpieza y validaciones ---
-    canvas.delete("all")
-    espectro_original = list(espectro_original or [])
-    espectro_filtrada = list(espectro_filtrada or [])
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items = {}
+        self.clave_fondo = None
+
+    def reiniciar(self):
+        self.canvas.delete("all")
+        self.items = {}
+        self.clave_fondo = None
+
+    def fondo(self, clave, dibujar):
+        if clave == self.clave_fondo:
+            return
+        self.canvas.delete("fondo")
+        antes = set(self.canvas.find_all())
+        dibujar()
+        for item in set(self.canvas.find_all()) - antes:
+            self.canvas.addtag_withtag("fondo", item)
+        self.canvas.tag_lower("fondo")
+        self.clave_fondo = clave
+
+    def linea(self, nombre, pts, **opciones):
+        estado = "normal"
+        if len(pts) < 4:
+            pts = [0, 0, 0, 0]
+            estado = "hidden"
+        item = self.items.get(nombre)
+        if item is None:
+            self.items[nombre] = self.canvas.create_line(pts, state=estado, **opciones)
+        else:
+            self.canvas.coords(item, *pts)
+            self.canvas.itemconfigure(item, state=estado)
 
-    if len(espectro_original) == 0 or len(espectro_filtrada) == 0:
-        canvas.create_text(
-            20,
-            20,
-            text="No hay datos para mostrar",
-            fill="#b3b9c5",
-            anchor="w",
-        )
-        return
 
-    # Permitir espectros como [mag] o [(f, mag)]
-    def _split_espectro(espectro):
-        if espectro and isinstance(espectro[0], (tuple, list)) and len(espectro[0]) >= 2:
-            freqs = [float(p[0]) for p in espectro]
-            mags = [float(p[1]) for p in espectro]
-        else:
-            mags = [float(v) for v in espectro]
-            freqs = list(range(len(mags)))
-        return freqs, mags
+_cache_piramides = CachePiramides(max_entradas=8)
+
+
+def _lienzo(canvas):
+    lienzo = getattr(canvas, "_lienzo_lod", None)
+    if lienzo is None:
+        lienzo = LienzoLOD(canvas)
+        canvas._lienzo_lod = lienzo
+    return lienzo
+
+
+def _sin_datos(canvas):
+    _lienzo(canvas).reiniciar()
+    canvas.create_text(20, 20, text="No hay datos para mostrar", fill="#b3b9c5", anchor="w", tags="fondo")
+
 
-    freqs_o, mags_o = _split_espectro(espectro_original)
-    freqs_f, mags_f = _split_espectro(espectro_filtrada)
+def trazar_espectros_dobles(canvas, espectro_original, espectro_filtrada):
+    """
+    Dibuja dos espectros (original y filtrado) en el mismo canvas, uno arriba
+    y otro abajo. Acepta tanto listas de magnitudes como listas de pares
+    (frecuencia, magnitud) y muestra ejes con valores numéricos. Las curvas
+    salen de la pirámide min/max de cada espectro y se actualizan en sitio.
+    """
+
+    # --- Validaciones ---
+    freqs_o, mags_o = _espectro_como_arrays(espectro_original)
+    freqs_f, mags_f = _espectro_como_arrays(espectro_filtrada)
 
     # Emparejar longitudes
-    N = min(len(mags_o), len(mags_f))
+    N = min(mags_o.size, mags_f.size)
     if N == 0:
-        canvas.create_text(
-            20,
-            20,
-            text="No hay datos para mostrar",
-            fill="#b3b9c5",
-            anchor="w",
-        )
+        _sin_datos(canvas)
         return
 
-    freqs_o, mags_o = freqs_o[:N], mags_o[:N]
-    freqs_f, mags_f = freqs_f[:N], mags_f[:N]
-
-    # Reducir puntos para dibujo (performance en Canvas)
-    MAX_PTS = 1600
-    if N > MAX_PTS:
-        paso = (N + MAX_PTS - 1) // MAX_PTS
-
-        def _down(freqs, mags):
-            out_f, out_m = [], []
-            i = 0
-            L = len(mags)
-            while i < L:
-                bloque_m = mags[i : i + paso]
-                bloque_f = freqs[i : i + paso]
-                # tomar el punto de mayor magnitud del bloque para preservar picos
-                j = max(range(len(bloque_m)), key=lambda k: bloque_m[k])
-                out_f.append(bloque_f[j])
-                out_m.append(bloque_m[j])
-                i += paso
-            return out_f, out_m
-
-        freqs_o, mags_o = _down(freqs_o, mags_o)
-        freqs_f, mags_f = _down(freqs_f, mags_f)
-        N = min(len(mags_o), len(mags_f))
-        freqs_o, mags_o = freqs_o[:N], mags_o[:N]
-        freqs_f, mags_f = freqs_f[:N], mags_f[:N]
+    lienzo = _lienzo(canvas)
+    pir_o = _cache_piramides.obtener(mags_o)
+    pir_f = _cache_piramides.obtener(mags_f)
 
     # Obtener tamaño del canvas
     canvas.update_idletasks()
@@ -86,22 +110,24 @@ def trazar_espectros_dobles(canvas, espectro_original, espectro_filtrada):
     mitad = alto // 2
     margen_x = 50
     margen_y = 30
+    n_pix = max(ancho - 2 * margen_x, 1)
 
-    # Convertir magnitudes a dB (log10 evita desbordes)
-    def to_db(x):
-        return 20 * log10(max(x, 1e-12))
+    # Envolvente de máximos (preserva picos) a una columna por píxel
+    idx_o, _, max_o = pir_o.consultar(n_pix, 0, N)
+    idx_f, _, max_f = pir_f.consultar(n_pix, 0, N)
 
-    espec_o_db = [to_db(v) for v in mags_o]
-    espec_f_db = [to_db(v) for v in mags_f]
+    # Convertir magnitudes a dB (log10 evita desbordes)
+    espec_o_db = 20.0 * np.log10(np.maximum(max_o, 1e-12))
+    espec_f_db = 20.0 * np.log10(np.maximum(max_f, 1e-12))
 
-    # Escalas verticales compartidas (dB)
-    max_val = max(max(espec_o_db), max(espec_f_db))
-    min_val = min(min(espec_o_db), min(espec_f_db))
+    # Escalas verticales compartidas (dB), desde los rangos precalculados
+    max_val = 20.0 * log10(max(pir_o.rango()[1], pir_f.rango()[1], 1e-12))
+    min_val = 20.0 * log10(max(min(pir_o.rango()[0], pir_f.rango()[0]), 1e-12))
     rango = max_val - min_val if max_val != min_val else 1.0
 
     # Escala horizontal (frecuencia o índice)
-    x_min = min(min(freqs_o), min(freqs_f))
-    x_max = max(max(freqs_o), max(freqs_f))
+    x_min = min(freqs_o[0], freqs_f[0])
+    x_max = max(freqs_o[N - 1], freqs_f[N - 1])
     if x_max == x_min:
         x_max = x_min + 1.0
 
@@ -112,135 +138,136 @@ def trazar_espectros_dobles(canvas, espectro_original, espectro_filtrada):
         # Escala invertida (arriba = mayor valor)
         return mitad_sup - ((db_val - min_val) / rango) * (mitad_sup - margen_y)
 
-    # Grid suave (moderno)
     grid_color = "#2e3440"
-    for frac in (0.25, 0.5, 0.75):
-        y1 = int((mitad - margen_y) * frac) + margen_y
-        canvas.create_line(
-            margen_x, y1, ancho - margen_x, y1, fill=grid_color, dash=(2, 3)
+    axis_color = "#444c56"
+    label_color = "#9da5b4"
+    label_font = ("Segoe UI", 9)
+    alto_sup = mitad
+    alto_inf = alto - mitad
+    base_y = mitad + margen_y
+
+    def dibujar_fondo():
+        # Grid suave (moderno)
+        for frac in (0.25, 0.5, 0.75):
+            y1 = int((mitad - margen_y) * frac) + margen_y
+            canvas.create_line(
+                margen_x, y1, ancho - margen_x, y1, fill=grid_color, dash=(2, 3)
+            )
+            y2 = mitad + int((alto - mitad - margen_y) * frac)
+            canvas.create_line(
+                margen_x, y2, ancho - margen_x, y2, fill=grid_color, dash=(2, 3)
+            )
+        for frac in (0.2, 0.4, 0.6, 0.8):
+            x = int(margen_x + frac * (ancho - 2 * margen_x))
+            canvas.create_line(
+                x, margen_y, x, alto - margen_y, fill=grid_color, dash=(2, 3)
+            )
+
+        canvas.create_text(
+            margen_x,
+            12,
+            text="Espectro Original (dB)",
+            fill="#e6edf3",
+            font=("Segoe UI", 10, "bold"),
+            anchor="w",
         )
-        y2 = mitad + int((alto - mitad - margen_y) * frac)
+
+        # Eje horizontal superior
+        y_eje_sup = alto_sup - margen_y
         canvas.create_line(
-            margen_x, y2, ancho - margen_x, y2, fill=grid_color, dash=(2, 3)
+            margen_x, y_eje_sup, ancho - margen_x, y_eje_sup, fill=axis_color
         )
-    for frac in (0.2, 0.4, 0.6, 0.8):
-        x = int(margen_x + frac * (ancho - 2 * margen_x))
+
+        # Etiquetas de eje Y (dB) usando la subgráfica superior
+        for db_tick in (min_val, (min_val + max_val) / 2.0, max_val):
+            y_tick = esc_y(db_tick, alto_sup)
+            canvas.create_line(margen_x - 4, y_tick, margen_x, y_tick, fill=axis_color)
+            canvas.create_text(
+                margen_x - 6,
+                y_tick,
+                text=f"{db_tick:.1f}",
+                fill=label_color,
+                font=label_font,
+                anchor="e",
+            )
+
+        # Eje vertical Y compartido
         canvas.create_line(
-            x, margen_y, x, alto - margen_y, fill=grid_color, dash=(2, 3)
+            margen_x,
+            margen_y,
+            margen_x,
+            alto - margen_y,
+            fill=axis_color,
         )
 
-    axis_color = "#444c56"
-    label_color = "#9da5b4"
-    label_font = ("Segoe UI", 9)
-
-    # === Subgráfica superior (original) ===
-    alto_sup = mitad
-    puntos_o = []
-    for freq, dbv in zip(freqs_o, espec_o_db):
-        puntos_o += [esc_x(freq), esc_y(dbv, alto_sup)]
-    canvas.create_line(puntos_o, fill="#58a6ff", width=2, smooth=True)
-    canvas.create_text(
-        margen_x,
-        12,
-        text="Espectro Original (dB)",
-        fill="#e6edf3",
-        font=("Segoe UI", 10, "bold"),
-        anchor="w",
-    )
-
-    # Eje horizontal superior
-    y_eje_sup = alto_sup - margen_y
-    canvas.create_line(
-        margen_x, y_eje_sup, ancho - margen_x, y_eje_sup, fill=axis_color
-    )
-
-    # Etiquetas de eje Y (dB) usando la subgráfica superior
-    for db_tick in (min_val, (min_val + max_val) / 2.0, max_val):
-        y_tick = esc_y(db_tick, alto_sup)
-        canvas.create_line(margen_x - 4, y_tick, margen_x, y_tick, fill=axis_color)
         canvas.create_text(
-            margen_x - 6,
-            y_tick,
-            text=f"{db_tick:.1f}",
-            fill=label_color,
-            font=label_font,
-            anchor="e",
+            margen_x,
+            mitad + 12,
+            text="Espectro Filtrado (dB)",
+            fill="#e6edf3",
+            font=("Segoe UI", 10, "bold"),
+            anchor="w",
+        )
+
+        # Eje horizontal inferior
+        y_eje_inf = alto - margen_y
+        canvas.create_line(
+            margen_x, y_eje_inf, ancho - margen_x, y_eje_inf, fill=axis_color
         )
 
-    # Eje vertical Y compartido
-    canvas.create_line(
-        margen_x,
-        margen_y,
-        margen_x,
-        alto - margen_y,
-        fill=axis_color,
-    )
+        # Etiquetas del eje X (frecuencia o índice) en la parte inferior
+        x_fracs = (0.0, 0.25, 0.5, 0.75, 1.0)
+        for frac in x_fracs:
+            freq_tick = x_min + frac * (x_max - x_min)
+            x_tick = margen_x + frac * (ancho - 2 * margen_x)
+            canvas.create_line(x_tick, y_eje_inf, x_tick, y_eje_inf + 4, fill=axis_color)
+            canvas.create_text(
+                x_tick,
+                y_eje_inf + 12,
+                text=f"{freq_tick:.0f}",
+                fill=label_color,
+                font=label_font,
+                anchor="n",
+            )
 
-    # === Subgráfica inferior (filtrada) ===
-    alto_inf = alto - mitad
-    base_y = mitad + margen_y
-    puntos_f = []
-    for freq, dbv in zip(freqs_f, espec_f_db):
-        y = base_y + esc_y(dbv, alto_inf)
-        puntos_f += [esc_x(freq), y]
-    canvas.create_line(puntos_f, fill="#3fb950", width=2, smooth=True)
-    canvas.create_text(
-        margen_x,
-        mitad + 12,
-        text="Espectro Filtrado (dB)",
-        fill="#e6edf3",
-        font=("Segoe UI", 10, "bold"),
-        anchor="w",
-    )
-
-    # Eje horizontal inferior
-    y_eje_inf = alto - margen_y
-    canvas.create_line(
-        margen_x, y_eje_inf, ancho - margen_x, y_eje_inf, fill=axis_color
-    )
-
-    # Etiquetas del eje X (frecuencia o índice) en la parte inferior
-    x_fracs = (0.0, 0.25, 0.5, 0.75, 1.0)
-    for frac in x_fracs:
-        freq_tick = x_min + frac * (x_max - x_min)
-        x_tick = margen_x + frac * (ancho - 2 * margen_x)
-        canvas.create_line(x_tick, y_eje_inf, x_tick, y_eje_inf + 4, fill=axis_color)
         canvas.create_text(
-            x_tick,
-            y_eje_inf + 12,
-            text=f"{freq_tick:.0f}",
+            ancho // 2,
+            alto - 4,
+            text="Frecuencia (Hz)",
             fill=label_color,
-            font=label_font,
-            anchor="n",
+            font=("Segoe UI", 9),
+            anchor="s",
         )
 
-    canvas.create_text(
-        ancho // 2,
-        alto - 4,
-        text="Frecuencia (Hz)",
-        fill=label_color,
-        font=("Segoe UI", 9),
-        anchor="s",
-    )
+        # === Marco decorativo ===
+        canvas.create_rectangle(3, 3, ancho - 3, alto - 3, outline="#343b46", width=2)
 
-    # === Marco decorativo ===
-    canvas.create_rectangle(3, 3, ancho - 3, alto - 3, outline="#343b46", width=2)
+    lienzo.fondo((ancho, alto, min_val, max_val, x_min, x_max), dibujar_fondo)
 
+    # === Curvas (se actualizan en sitio) ===
+    f_o = np.interp(idx_o, np.arange(N), freqs_o[:N])
+    f_f = np.interp(idx_f, np.arange(N), freqs_f[:N])
+    lienzo.linea("original", coords_linea(esc_x(f_o), esc_y(espec_o_db, alto_sup)),
+                 fill="#58a6ff", width=2)
+    lienzo.linea("filtrada", coords_linea(esc_x(f_f), base_y + esc_y(espec_f_db, alto_inf)),
+                 fill="#3fb950", width=2)
 
-def trazar_2x2_canvas(canvas, senal_original, senal_filtrada, espectro_original, espectro_filtrada, fs, fc1, fc2):
-    canvas.delete("all")
 
-    if not senal_original or not senal_filtrada or not espectro_original or not espectro_filtrada:
-        canvas.create_text(20, 20, text="No hay datos para mostrar", fill="#b3b9c5", anchor="w")
+def trazar_2x2_canvas(canvas, senal_original, senal_filtrada, espectro_original, espectro_filtrada, fs, fc1, fc2):
+    fo_all, mo_all = _espectro_como_arrays(espectro_original)
+    ff_all, mf_all = _espectro_como_arrays(espectro_filtrada)
+    if len(senal_original) == 0 or len(senal_filtrada) == 0 or mo_all.size == 0 or mf_all.size == 0:
+        _sin_datos(canvas)
         return
 
     fs = float(fs)
+    lienzo = _lienzo(canvas)
 
-    # Copias seguras
-    xo = list(senal_original)
-    xf = list(senal_filtrada)
-    esp_o = list(espectro_original)
-    esp_f = list(espectro_filtrada)
+    # Pirámides min/max (se calculan una sola vez por señal y se reutilizan)
+    pir_xo = _cache_piramides.obtener(senal_original)
+    pir_xf = _cache_piramides.obtener(senal_filtrada)
+    pir_mo = _cache_piramides.obtener(mo_all)
+    pir_mf = _cache_piramides.obtener(mf_all)
 
     # Parámetros de dibujo
     canvas.update_idletasks()
@@ -255,63 +282,8 @@ def trazar_2x2_canvas(canvas, senal_original, senal_filtrada, espectro_original,
 
     grid_color = "#2e3440"
     axis_color = "#444c56"
-    label_color = "#9da5b4"
-    label_font = ("Segoe UI", 9)
 
-    # Reducción de puntos
-    def reduce_line(vs, max_pts=1200):
-        n = len(vs)
-        if n <= max_pts:
-            return vs
-        paso = (n + max_pts - 1) // max_pts
-        out = []
-        i = 0
-        while i < n:
-            bloque = vs[i:i+paso]
-            out.append(sum(bloque)/len(bloque))
-            i += paso
-        return out
-
-    def reduce_xy(xs, ys, max_pts=1200):
-        n = min(len(xs), len(ys))
-        if n <= max_pts:
-            return xs[:n], ys[:n]
-        paso = (n + max_pts - 1) // max_pts
-        rx, ry = [], []
-        i = 0
-        while i < n:
-            bx = xs[i:i+paso]
-            by = ys[i:i+paso]
-            # tomar el punto de mayor magnitud del bloque para preservar picos
-            j = max(range(len(by)), key=lambda k: by[k])
-            rx.append(bx[j])
-            ry.append(by[j])
-            i += paso
-        return rx, ry
-
-    xo_r = reduce_line(xo)
-    xf_r = reduce_line(xf)
-    fmax = max(esp_o[-1][0], esp_f[-1][0]) if esp_o and esp_f else fs/2.0
-    fo_all = [p[0] for p in esp_o]
-    mo_all = [p[1] for p in esp_o]
-    ff_all = [p[0] for p in esp_f]
-    mf_all = [p[1] for p in esp_f]
-    fo, mo = reduce_xy(fo_all, mo_all)
-    ff, mf = reduce_xy(ff_all, mf_all)
-
-    # Utilidades de escalado
-    def scale_x_series(idx, n, x0, x1):
-        return x0 + (idx / (n - 1)) * (x1 - x0) if n > 1 else x0
-
-    def scale_y(v, vmin, vmax, y0, y1):
-        if vmax == vmin:
-            return (y0 + y1) / 2
-        return y1 - ((v - vmin) / (vmax - vmin)) * (y1 - y0)
-
-    def scale_x_freq(f, x0, x1):
-        fm = max(fmax, 1e-9)
-        fclamped = 0.0 if f < 0 else (fm if f > fm else f)
-        return x0 + (fclamped / fm) * (x1 - x0)
+    fmax = max(fo_all[-1], ff_all[-1])
 
     # Rectángulos de subplots
     pads = 18
@@ -322,80 +294,68 @@ def trazar_2x2_canvas(canvas, senal_original, senal_filtrada, espectro_original,
         'br': (mid_x + pads, mid_y + pads, W - margin, H - margin),
     }
 
-    # Helpers para dibujar rejilla y ejes
-    def draw_grid(x0,y0,x1,y1):
-        for frac in (0.25,0.5,0.75):
-            y = y0 + frac*(y1-y0)
-            canvas.create_line(x0, y, x1, y, fill=grid_color, dash=(2,3))
-            x = x0 + frac*(x1-x0)
-            canvas.create_line(x, y0, x, y1, fill=grid_color, dash=(2,3))
-        canvas.create_rectangle(x0, y0, x1, y1, outline=axis_color)
-
-    # Títulos
-    canvas.create_text(rects['tl'][0], rects['tl'][1]-14, text="Senal Original (Tiempo)", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
-    canvas.create_text(rects['tr'][0], rects['tr'][1]-14, text="Espectro Original", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
-    canvas.create_text(rects['bl'][0], rects['bl'][1]-14, text="Senal Filtrada (Tiempo)", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
-    canvas.create_text(rects['br'][0], rects['br'][1]-14, text="Espectro Filtrado", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
-
-    # Dibujo tiempo original
-    x0,y0,x1,y1 = rects['tl']
-    draw_grid(x0,y0,x1,y1)
-    n = len(xo_r)
-    if n>0:
-        vmin, vmax = min(xo_r), max(xo_r)
-        pts=[]
-        for i,v in enumerate(xo_r):
-            px = scale_x_series(i, n, x0, x1)
-            py = scale_y(v, vmin, vmax, y0, y1)
-            pts += [px, py]
-        canvas.create_line(pts, fill="#1f77b4", width=2, smooth=True)
-
-    # Dibujo espectro original (lineal)
-    x0,y0,x1,y1 = rects['tr']
-    draw_grid(x0,y0,x1,y1)
-    if mo:
-        vmin, vmax = 0.0, max(mo)
-        pts=[]
-        for f, m in zip(fo, mo):
-            px = scale_x_freq(f, x0, x1)
-            py = scale_y(m, vmin, vmax, y0, y1)
-            pts += [px, py]
-        canvas.create_line(pts, fill="#1f77b4", width=2, smooth=True)
-
-    # Dibujo tiempo filtrada
-    x0,y0,x1,y1 = rects['bl']
-    draw_grid(x0,y0,x1,y1)
-    n = len(xf_r)
-    if n>0:
-        vmin, vmax = min(xf_r), max(xf_r)
-        pts=[]
-        for i,v in enumerate(xf_r):
-            px = scale_x_series(i, n, x0, x1)
-            py = scale_y(v, vmin, vmax, y0, y1)
-            pts += [px, py]
-        canvas.create_line(pts, fill="#ff7f0e", width=2, smooth=True)
-
-    # Dibujo espectro filtrado + sombreado
-    x0,y0,x1,y1 = rects['br']
-    draw_grid(x0,y0,x1,y1)
-    if mf:
-        # sombreado bandas
+    # Utilidades de escalado (vectorizadas)
+    def scale_y(v, vmin, vmax, y0, y1):
+        if vmax == vmin:
+            return np.full(np.shape(v), (y0 + y1) / 2)
+        return y1 - ((v - vmin) / (vmax - vmin)) * (y1 - y0)
+
+    def scale_x_freq(f, x0, x1):
+        fm = max(fmax, 1e-9)
+        return x0 + (np.clip(f, 0.0, fm) / fm) * (x1 - x0)
+
+    def dibujar_fondo():
+        # Helpers para dibujar rejilla y ejes
+        def draw_grid(x0,y0,x1,y1):
+            for frac in (0.25,0.5,0.75):
+                y = y0 + frac*(y1-y0)
+                canvas.create_line(x0, y, x1, y, fill=grid_color, dash=(2,3))
+                x = x0 + frac*(x1-x0)
+                canvas.create_line(x, y0, x, y1, fill=grid_color, dash=(2,3))
+            canvas.create_rectangle(x0, y0, x1, y1, outline=axis_color)
+
+        # Títulos
+        canvas.create_text(rects['tl'][0], rects['tl'][1]-14, text="Senal Original (Tiempo)", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
+        canvas.create_text(rects['tr'][0], rects['tr'][1]-14, text="Espectro Original", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
+        canvas.create_text(rects['bl'][0], rects['bl'][1]-14, text="Senal Filtrada (Tiempo)", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
+        canvas.create_text(rects['br'][0], rects['br'][1]-14, text="Espectro Filtrado", fill="#e6edf3", anchor="w", font=("Segoe UI", 10, "bold"))
+
+        for clave in ('tl', 'tr', 'bl'):
+            draw_grid(*rects[clave])
+
+        # Espectro filtrado + sombreado de bandas
+        x0,y0,x1,y1 = rects['br']
+        draw_grid(x0,y0,x1,y1)
         px1 = scale_x_freq(fc1, x0, x1)
         px2 = scale_x_freq(fc2, x0, x1)
         canvas.create_rectangle(x0, y0, px1, y1, fill="#ffb3b3", outline="", stipple="gray25")
         canvas.create_rectangle(px2, y0, x1, y1, fill="#ffb3b3", outline="", stipple="gray25")
         canvas.create_rectangle(px1, y0, px2, y1, fill="#7fdb7f", outline="", stipple="gray25")
 
-        vmin, vmax = 0.0, max(mf)
-        pts=[]
-        for f, m in zip(ff, mf):
-            px = scale_x_freq(f, x0, x1)
-            py = scale_y(m, vmin, vmax, y0, y1)
-            pts += [px, py]
-        canvas.create_line(pts, fill="#ff7f0e", width=2, smooth=True)
+        # Marco general
+        canvas.create_rectangle(3, 3, W-3, H-3, outline="#343b46", width=2)
+
+    lienzo.fondo((W, H, fc1, fc2, fmax), dibujar_fondo)
 
-    # Marco general
-    canvas.create_rectangle(3, 3, W-3, H-3, outline="#343b46", width=2)
+    # Señales en el tiempo: envolvente min/max por píxel (no se pierden picos)
+    for nombre, pir, rect, color in (("tiempo_o", pir_xo, rects['tl'], "#1f77b4"),
+                                     ("tiempo_f", pir_xf, rects['bl'], "#ff7f0e")):
+        x0,y0,x1,y1 = rect
+        idx, mins, maxs = pir.consultar(int(x1 - x0))
+        vmin, vmax = pir.rango()
+        px = x0 + (idx / max(pir.n, 1)) * (x1 - x0)
+        lienzo.linea(nombre, coords_envolvente(px, scale_y(mins, vmin, vmax, y0, y1),
+                                               scale_y(maxs, vmin, vmax, y0, y1)),
+                     fill=color, width=1)
+
+    # Espectros (lineal): máximo por píxel
+    for nombre, pir, freqs, rect, color in (("espectro_o", pir_mo, fo_all, rects['tr'], "#1f77b4"),
+                                            ("espectro_f", pir_mf, ff_all, rects['br'], "#ff7f0e")):
+        x0,y0,x1,y1 = rect
+        idx, _, maxs = pir.consultar(int(x1 - x0))
+        f = np.interp(idx, np.arange(freqs.size), freqs)
+        lienzo.linea(nombre, coords_linea(scale_x_freq(f, x0, x1), scale_y(maxs, 0.0, pir.rango()[1], y0, y1)),
+                     fill=color, width=2)
 
 
 def mostrar_espectros_en_frame(frame, espectro_original, espectro_filtrada):
@@ -416,21 +376,15 @@ def mostrar_espectros_en_frame(frame, espectro_original, espectro_filtrada):
     except Exception:
         pass
 
-    if not espectro_original or not espectro_filtrada:
-        tk.Label(frame, text="No hay datos para mostrar").pack(padx=10, pady=10)
-        return None
-
     # Espectros como (f, mag)
     try:
-        f_o = [float(p[0]) for p in espectro_original]
-        m_o = [float(p[1]) for p in espectro_original]
-        f_f = [float(p[0]) for p in espectro_filtrada]
-        m_f = [float(p[1]) for p in espectro_filtrada]
+        f_o, m_o = _espectro_como_arrays(espectro_original)
+        f_f, m_f = _espectro_como_arrays(espectro_filtrada)
     except Exception:
         tk.Label(frame, text="Formato de espectro invalido").pack(padx=10, pady=10)
         return None
 
-    if not f_o or not f_f:
+    if f_o.size == 0 or f_f.size == 0:
         tk.Label(frame, text="No hay datos para mostrar").pack(padx=10, pady=10)
         return None
 
@@ -480,7 +434,7 @@ def mostrar_2x2_matplotlib(parent, senal_original, senal_filtrada, fs, fc1, fc2,
     from dft_manual import calcular_dft_real
 
     # Validaciones
-    if not senal_original or not senal_filtrada:
+    if len(senal_original) == 0 or len(senal_filtrada) == 0:
         top = tk.Toplevel(parent)
         top.title("Visualización 2x2")
         tk.Label(top, text="No hay datos para mostrar").pack(padx=16, pady=16)
@@ -496,17 +450,14 @@ def mostrar_2x2_matplotlib(parent, senal_original, senal_filtrada, fs, fc1, fc2,
     # Espectros (frecuencia y magnitud lineal)
     esp_o = calcular_dft_real(senal_original, fs)
     esp_f = calcular_dft_real(senal_filtrada, fs)
-    if not esp_o or not esp_f:
+    f_o, m_o = esp_o
+    f_f, m_f = esp_f
+    if f_o.size == 0 or f_f.size == 0:
         top = tk.Toplevel(parent)
         top.title("Visualización 2x2")
         tk.Label(top, text="No fue posible calcular los espectros").pack(padx=16, pady=16)
         return top
 
-    f_o = [float(p[0]) for p in esp_o]
-    m_o = [float(p[1]) for p in esp_o]
-    f_f = [float(p[0]) for p in esp_f]
-    m_f = [float(p[1]) for p in esp_f]
-
     fmax = float(fs) / 2.0
 
     # Crear ventana y figura
@@ -572,10 +523,10 @@ def mostrar_2x2_matplotlib(parent, senal_original, senal_filtrada, fs, fc1, fc2,
     return top
 
 
-def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2):
+def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2, filtro=None):
     import matplotlib.pyplot as plt
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    from dft_manual import calcular_dft_real
+    from dft_manual import calcular_dft_real, respuesta_en_frecuencia
 
     # Limpiar frame
     try:
@@ -588,7 +539,7 @@ def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2):
         pass
 
     # Validaciones mínimas
-    if not senal_original or not senal_filtrada:
+    if len(senal_original) == 0 or len(senal_filtrada) == 0:
         tk.Label(frame, text="No hay datos para mostrar").pack(padx=10, pady=10)
         return None
 
@@ -602,15 +553,12 @@ def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2):
     # Espectros
     esp_o = calcular_dft_real(senal_original, fs)
     esp_f = calcular_dft_real(senal_filtrada, fs)
-    if not esp_o or not esp_f:
+    f_o, m_o = esp_o
+    f_f, m_f = esp_f
+    if f_o.size == 0 or f_f.size == 0:
         tk.Label(frame, text="No fue posible calcular los espectros").pack(padx=10, pady=10)
         return None
 
-    f_o = [float(p[0]) for p in esp_o]
-    m_o = [float(p[1]) for p in esp_o]
-    f_f = [float(p[0]) for p in esp_f]
-    m_f = [float(p[1]) for p in esp_f]
-
     # Figura
     fig, axs = plt.subplots(2, 2, figsize=(7.5, 5.0), dpi=100)
     plt.subplots_adjust(hspace=0.35, wspace=0.25)
@@ -647,6 +595,10 @@ def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2):
     axs[1, 1].axvspan(fc1, fc2, color="#7fdb7f", alpha=0.25, label="Banda de Paso")
     axs[1, 1].axvspan(0, max(0.0, fc1), color="#ffb3b3", alpha=0.25, label="Banda de Rechazo")
     axs[1, 1].axvspan(min(fmax, fc2), fmax, color="#ffb3b3", alpha=0.25)
+    if filtro is not None:
+        # |H(f)| analítica (memoizada) escalada al pico del espectro filtrado
+        f_h, m_h = respuesta_en_frecuencia(filtro, fs)
+        axs[1, 1].plot(f_h, m_h * float(np.max(m_f)), color="#e6edf3", linestyle="--", linewidth=1, label="|H(f)|")
     axs[1, 1].legend(loc="upper right")
 
     canvas = FigureCanvasTkAgg(fig, master=frame)
@@ -662,3 +614,63 @@ def mostrar_2x2_en_frame(frame, senal_original, senal_filtrada, fs, fc1, fc2):
 
     frame.bind("<Destroy>", _on_destroy)
     return canvas
+
+
+def _paleta_espectrograma(n=256):
+    # Degradado oscuro -> azul -> naranja -> amarillo claro
+    puntos = np.array([[13, 17, 23], [31, 119, 180], [255, 127, 14], [255, 240, 170]], dtype=np.float64)
+    pos = np.linspace(0.0, 1.0, puntos.shape[0])
+    t = np.linspace(0.0, 1.0, n)
+    rgb = np.stack([np.interp(t, pos, puntos[:, c]) for c in range(3)], axis=1).astype(int)
+    return np.array([f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb])
+
+
+class EspectrogramaTk:
+    """
+    Espectrograma incremental sobre un tk.Canvas: cada lote de columnas |X|
+    (filas = tiempo, columnas = bin) se pinta en un PhotoImage de tamaño fijo
+    que se recorre en círculo, así que la memoria no crece con la duración.
+    """
+
+    PALETA = _paleta_espectrograma()
+
+    def __init__(self, parent, ancho=640, alto=256, rango_db=80.0):
+        self.ancho = int(ancho)
+        self.alto = int(alto)
+        self.rango_db = float(rango_db)
+        self.canvas = tk.Canvas(parent, width=self.ancho, height=self.alto, bg="#0d1117", highlightthickness=0)
+        self.imagen = tk.PhotoImage(width=self.ancho, height=self.alto)
+        self.canvas.create_image(0, 0, image=self.imagen, anchor="nw")
+        self.cursor = self.canvas.create_line(0, 0, 0, self.alto, fill="#e6edf3")
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.imagen.blank()
+        self.x = 0
+        self.ref_db = None
+        self.canvas.coords(self.cursor, 0, 0, 0, self.alto)
+
+    def agregar(self, mags):
+        mags = np.asarray(mags)
+        if mags.ndim != 2 or mags.shape[0] == 0:
+            return
+
+        db = 20.0 * np.log10(np.maximum(mags, 1e-12))
+        pico = float(np.max(db))
+        self.ref_db = pico if self.ref_db is None else max(self.ref_db, pico)
+
+        # Frecuencias bajas abajo
+        filas = np.linspace(mags.shape[1] - 1, 0, self.alto).astype(int)
+        niveles = (db[:, filas] - (self.ref_db - self.rango_db)) / self.rango_db
+        idx = np.clip(niveles * (self.PALETA.size - 1), 0, self.PALETA.size - 1).astype(int)
+        colores = self.PALETA[idx.T]  # (alto, columnas)
+
+        i = 0
+        while i < colores.shape[1]:
+            n = min(colores.shape[1] - i, self.ancho - self.x)
+            trozo = colores[:, i:i + n]
+            datos = " ".join("{" + " ".join(fila) + "}" for fila in trozo)
+            self.imagen.put(datos, to=(self.x, 0))
+            self.x = (self.x + n) % self.ancho
+            i += n
+        self.canvas.coords(self.cursor, self.x, 0, self.x, self.alto)
@@ -4,11 +4,11 @@ from ttkbootstrap.constants import *
 from tkinter import messagebox
 import threading
 
-from diseno_bilineal import disenar_butterworth_pasabanda_bilineal_teorico
-from biquad import FiltroButterworthPasabandaOrden4
-from dft_manual import calcular_dft_real
-from graficos_ttk import mostrar_espectros_en_frame, mostrar_2x2_en_frame
-from audio_io import grabar_voz, reproducir_audio, guardar_wav, pyaudio
+from diseno_bilineal import disenar_butterworth_pasabanda_bilineal_teorico, secciones_sos
+from biquad import FiltroSOS
+from graficos_ttk import mostrar_espectros_en_frame, mostrar_2x2_en_frame, EspectrogramaTk
+from stft import AnalizadorSTFT, bloques_de_senal
+from motor_audio import MotorAudio
 
 
 class AplicacionFiltro(ttk.Window):
@@ -41,10 +41,27 @@ class AplicacionFiltro(ttk.Window):
         self.frame_2x2 = None
         self.tabs = None
         self.canvas_2x2 = None
+        self.motor = None
+        self.espectrograma = None
 
         self._crear_gui()
 
     # ===================== Helpers =====================
+    def _obtener_motor(self, fs):
+        # Un solo contexto PortAudio; solo se recrea si cambia la frecuencia de muestreo
+        if self.motor is None or self.motor.fs != fs:
+            if self.motor is not None:
+                self.motor.cerrar()
+            self.motor = MotorAudio(fs=fs)
+        return self.motor
+
+    def _seguir_progreso(self, texto, bootstyle, al_terminar=None):
+        if self.motor.ocupado():
+            self.estado_grabacion.config(text=f"{texto} {self.motor.progreso():.0%}", bootstyle=bootstyle)
+            self.after(100, lambda: self._seguir_progreso(texto, bootstyle, al_terminar))
+        elif callable(al_terminar):
+            al_terminar()
+
     def _set_estado_grabacion(self, texto, bootstyle):
         self.after(0, lambda: self.estado_grabacion.config(text=texto, bootstyle=bootstyle))
 
@@ -61,6 +78,7 @@ class AplicacionFiltro(ttk.Window):
                 fs,
                 fc1,
                 fc2,
+                self.filtro,
             ),
         )
 
@@ -124,6 +142,14 @@ class AplicacionFiltro(ttk.Window):
         self.frame_2x2 = ttk.Frame(lf_2x2)
         self.frame_2x2.pack(fill="both", expand=True, padx=6, pady=6)
 
+        # Tab 3: Espectrograma (incremental, también durante la grabación)
+        tab_espectrograma = ttk.Frame(self.tabs)
+        self.tabs.add(tab_espectrograma, text="Espectrograma")
+        lf_espectrograma = ttk.Labelframe(tab_espectrograma, text="Espectrograma (STFT)", bootstyle="info", padding=10)
+        lf_espectrograma.pack(fill="both", expand=True)
+        self.espectrograma = EspectrogramaTk(lf_espectrograma)
+        self.espectrograma.canvas.pack(padx=6, pady=6)
+
     def _fila(self, parent, texto, var):
         f = ttk.Frame(parent)
         ttk.Label(f, text=texto, bootstyle="secondary").pack(side="left", padx=3)
@@ -159,7 +185,8 @@ class AplicacionFiltro(ttk.Window):
         w1 = fc1
         w2 = fc2
 
-        self.filtro = FiltroButterworthPasabandaOrden4(A0, A2, A4, B0, B1, B2, B3, B4)
+        # Se filtra con la cascada SOS (misma respuesta, numéricamente estable)
+        self.filtro = FiltroSOS(secciones_sos(omega0, BW, fs))
         self.texto_coeficientes.set(
             f"A0={A0:.12e}, A2={A2:.12e}, A4={A4:.12e}, "
             f"B0={B0:.12e}, B1={B1:.12e}, B2={B2:.12e}, B3={B3:.12e}, B4={B4:.12e}"
@@ -174,24 +201,35 @@ class AplicacionFiltro(ttk.Window):
             return
         fs, fc1, fc2, dur = params
 
-        def tarea():
-            self._set_estado_grabacion("Grabando...", "danger")
-            try:
-                datos = grabar_voz(dur, fs)
-                self.senal_original = datos
-                self._set_estado_grabacion("Audio grabado correctamente", "success")
-            except Exception as e:
-                self._set_estado_grabacion("Error en grabacion", "danger")
-                self.after(0, lambda: messagebox.showerror("Error de audio", str(e)))
+        def al_terminar():
+            self.senal_original = self.motor.senal_grabada()
+            self._set_estado_grabacion("Audio grabado correctamente", "success")
 
-        threading.Thread(target=tarea, daemon=True).start()
+        try:
+            self._obtener_motor(fs).grabar(dur)
+        except Exception as e:
+            self._set_estado_grabacion("Error en grabacion", "danger")
+            messagebox.showerror("Error de audio", str(e))
+            return
+        self._seguir_progreso("Grabando...", "danger", al_terminar)
+        self.espectrograma.reiniciar()
+        self._espectrograma_en_vivo(AnalizadorSTFT(fs), 0)
+
+    def _espectrograma_en_vivo(self, analizador, leidas):
+        # Consultar el estado ANTES de leer: si la grabación termina entre
+        # ambas llamadas, se programa una lectura más que recoge el último bloque
+        activo = self.motor.ocupado()
+        nuevas, leidas = self.motor.muestras_nuevas(leidas)
+        self.espectrograma.agregar(analizador.alimentar(nuevas))
+        if activo:
+            self.after(100, lambda: self._espectrograma_en_vivo(analizador, leidas))
 
     def on_filtrar(self):
         params = self._leer_parametros()
-        if not params or not self.senal_original or not self.filtro:
+        if not params or len(self.senal_original) == 0 or not self.filtro:
             messagebox.showwarning("Advertencia", "Falta señal o filtro diseñado.")
             return
-        self.senal_filtrada = self.filtro.filtrar_bloque(self.senal_original)
+        self.senal_filtrada = self.filtro.procesar_bloque(self.senal_original)
         self._set_estado_grabacion("Señal filtrada lista", "success")
 
     def on_visualizar_espectros(self):
@@ -199,17 +237,25 @@ class AplicacionFiltro(ttk.Window):
         if not params:
             return
         fs, _, _, _ = params
-        if not self.senal_original or not self.senal_filtrada:
+        if len(self.senal_original) == 0 or len(self.senal_filtrada) == 0:
             messagebox.showwarning("Advertencia", "Debe grabar y filtrar la señal antes de visualizar.")
             return
 
         self._set_estado_grabacion("Calculando espectros...", "secondary")
 
+        self.espectrograma.reiniciar()
+
         def tarea_fft():
             try:
-                esp_o = calcular_dft_real(self.senal_original, fs)
-                esp_f = calcular_dft_real(self.senal_filtrada, fs)
-                self._dibujar_espectros_seguro(esp_o, esp_f)
+                # STFT en un solo paso por bloques: memoria acotada sin importar la duración
+                an_o = AnalizadorSTFT(fs)
+                an_f = AnalizadorSTFT(fs)
+                for bloque_o, bloque_f in zip(bloques_de_senal(self.senal_original),
+                                              bloques_de_senal(self.senal_filtrada)):
+                    mags = an_f.alimentar(bloque_f)
+                    an_o.alimentar(bloque_o)
+                    self.after(0, lambda m=mags: self.espectrograma.agregar(m))
+                self._dibujar_espectros_seguro(an_o.espectro_medio(), an_f.espectro_medio())
                 self._set_estado_grabacion("Espectros visualizados correctamente", "success")
             except Exception as e:
                 self._set_estado_grabacion("Error al graficar", "danger")
@@ -222,7 +268,7 @@ class AplicacionFiltro(ttk.Window):
         if not params:
             return
         fs, fc1, fc2, _ = params
-        if not self.senal_original or not self.senal_filtrada:
+        if len(self.senal_original) == 0 or len(self.senal_filtrada) == 0:
             messagebox.showwarning("Advertencia", "Debe grabar y filtrar la señal antes de visualizar.")
             return
 
@@ -239,19 +285,28 @@ class AplicacionFiltro(ttk.Window):
 
         threading.Thread(target=tarea_fft_2x2, daemon=True).start()
 
+    def _reproducir(self, senal, fs):
+        try:
+            self._obtener_motor(fs).reproducir(senal)
+        except Exception as e:
+            messagebox.showerror("Error de audio", str(e))
+            return
+        self._seguir_progreso("Reproduciendo...", "info",
+                              lambda: self._set_estado_grabacion("Reproduccion terminada", "secondary"))
+
     def on_reproducir_original(self):
         params = self._leer_parametros()
-        if not params or not self.senal_original:
+        if not params or len(self.senal_original) == 0:
             return
         fs, _, _, _ = params
-        reproducir_audio(self.senal_original, fs)
+        self._reproducir(self.senal_original, fs)
 
     def on_reproducir_filtrada(self):
         params = self._leer_parametros()
-        if not params or not self.senal_filtrada:
+        if not params or len(self.senal_filtrada) == 0:
             return
         fs, _, _, _ = params
-        reproducir_audio(self.senal_filtrada, fs)
+        self._reproducir(self.senal_filtrada, fs)
 
 
 if __name__ == "__main__":
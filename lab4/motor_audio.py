@@ -0,0 +1,270 @@
+import threading
+import time
+
+import numpy as np
+
+from audio_io import _FORMATOS_PCM, _bytes_a_floats, _floats_a_bytes, _formato_pyaudio, pyaudio
+
+# Códigos de retorno del callback de PortAudio (pyaudio.paContinue / paComplete)
+_CONTINUAR = 0
+_COMPLETO = 1
+
+
+class BufferCircular:
+    """Buffer circular float32 preasignado: el callback escribe, el hilo de la GUI lee."""
+
+    def __init__(self, capacidad):
+        self.datos = np.zeros(int(capacidad), dtype=np.float32)
+        self.escritos = 0  # total de muestras escritas desde el último reinicio
+
+    def reiniciar(self):
+        self.escritos = 0
+
+    def escribir(self, x):
+        cap = self.datos.size
+        x = x[-cap:]
+        i = self.escritos % cap
+        n1 = min(x.size, cap - i)
+        self.datos[i:i + n1] = x[:n1]
+        self.datos[:x.size - n1] = x[n1:]
+        self.escritos += x.size
+
+    def ultimos(self, n):
+        n = min(int(n), self.escritos, self.datos.size)
+        fin = self.escritos % self.datos.size
+        if n <= fin:
+            return self.datos[fin - n:fin].copy()
+        return np.concatenate((self.datos[self.datos.size - (n - fin):], self.datos[:fin]))
+
+
+class MotorAudio:
+    """
+    Motor de audio persistente: un único contexto PyAudio/PortAudio para toda
+    la aplicación y streams en modo callback, de modo que grabar() y
+    reproducir() retornan de inmediato y el avance se consulta con progreso().
+    `backend` es cualquier objeto con open(...) compatible con pyaudio.PyAudio
+    (p. ej. BackendFalso para probar sin dispositivo).
+    """
+
+    def __init__(self, fs=44100, canales=1, frames_por_buffer=1024, formato="int16",
+                 max_segundos=60, backend=None):
+        self.fs = int(fs)
+        self.canales = int(canales)
+        self.frames_por_buffer = int(frames_por_buffer)
+        self.formato = formato
+        self._backend = backend
+        self._stream = None
+        self._lock = threading.Lock()
+        self._fin = threading.Event()
+        self._fin.set()
+        self._al_terminar = None
+        self._objetivo = 0
+        self._pos = 0
+        self._senal_salida = None
+        self.buffer = BufferCircular(max_segundos * self.fs * self.canales)
+
+    # ===================== Backend =====================
+    def _obtener_backend(self):
+        if self._backend is None:
+            if pyaudio is None:
+                raise RuntimeError("PyAudio no está disponible. pip install pyaudio")
+            self._backend = pyaudio.PyAudio()
+        return self._backend
+
+    def _formato_backend(self):
+        if pyaudio is not None and isinstance(self._backend, pyaudio.PyAudio):
+            return _formato_pyaudio(self.formato)
+        return self.formato
+
+    def _abrir(self, entrada, callback):
+        self.detener()
+        backend = self._obtener_backend()
+        self._fin.clear()
+        self._stream = backend.open(format=self._formato_backend(), channels=self.canales, rate=self.fs,
+                                    input=entrada, output=not entrada,
+                                    frames_per_buffer=self.frames_por_buffer, stream_callback=callback)
+        self._stream.start_stream()
+
+    def _terminar(self):
+        self._fin.set()
+        if callable(self._al_terminar):
+            self._al_terminar()
+
+    # ===================== Callbacks =====================
+    def _cb_grabar(self, in_data, frame_count, time_info, status):
+        x = _bytes_a_floats(in_data, self.formato)
+        with self._lock:
+            x = x[:self._objetivo - self._pos]
+            self.buffer.escribir(x)
+            self._pos += x.size
+            completo = self._pos >= self._objetivo
+        if completo:
+            self._terminar()
+            return (None, _COMPLETO)
+        return (None, _CONTINUAR)
+
+    def _cb_reproducir(self, in_data, frame_count, time_info, status):
+        n = frame_count * self.canales
+        with self._lock:
+            bloque = self._senal_salida[self._pos:self._pos + n]
+            self._pos += bloque.size
+            completo = self._pos >= self._objetivo
+        if bloque.size < n:
+            bloque = np.concatenate((bloque, np.zeros(n - bloque.size, dtype=np.float32)))
+        datos = _floats_a_bytes(bloque, self.formato)
+        if completo:
+            self._terminar()
+            return (datos, _COMPLETO)
+        return (datos, _CONTINUAR)
+
+    # ===================== API =====================
+    def grabar(self, segundos, al_terminar=None):
+        objetivo = int(self.fs * segundos) * self.canales
+        if objetivo > self.buffer.datos.size:
+            raise ValueError("La duración supera la capacidad del buffer (max_segundos)")
+        with self._lock:
+            self.buffer.reiniciar()
+            self._objetivo = objetivo
+            self._pos = 0
+        self._al_terminar = al_terminar
+        self._abrir(True, self._cb_grabar)
+
+    def reproducir(self, senal, al_terminar=None):
+        with self._lock:
+            self._senal_salida = np.asarray(senal, dtype=np.float32).ravel()
+            self._objetivo = self._senal_salida.size
+            self._pos = 0
+        self._al_terminar = al_terminar
+        self._abrir(False, self._cb_reproducir)
+
+    def senal_grabada(self):
+        with self._lock:
+            return self.buffer.ultimos(self._pos)
+
+    def muestras_nuevas(self, desde):
+        """Muestras grabadas a partir del índice absoluto `desde`; devuelve (bloque, nuevo índice)."""
+        with self._lock:
+            escritos = self.buffer.escritos
+            return self.buffer.ultimos(escritos - desde), escritos
+
+    def progreso(self):
+        with self._lock:
+            return self._pos / max(1, self._objetivo)
+
+    def ocupado(self):
+        return not self._fin.is_set()
+
+    def esperar(self, timeout=None):
+        return self._fin.wait(timeout)
+
+    def detener(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+        self._stream = None
+        self._fin.set()
+
+    def cerrar(self):
+        self.detener()
+        if pyaudio is not None and isinstance(self._backend, pyaudio.PyAudio):
+            self._backend.terminate()
+        self._backend = None
+
+
+# ===================== Backend falso (pruebas sin dispositivo) =====================
+
+class _StreamFalso:
+    def __init__(self, backend, formato, canales, frames_per_buffer, stream_callback, input):
+        self._backend = backend
+        self._formato = formato
+        self._n = frames_per_buffer
+        self._canales = canales
+        self._cb = stream_callback
+        self._entrada = input
+        self._activo = False
+        self._hilo = None
+
+    def _bucle(self):
+        ancho = _FORMATOS_PCM[self._formato][0]
+        while self._activo:
+            in_data = None
+            if self._entrada:
+                in_data = self._backend._leer(self._n * self._canales, self._formato)
+            out_data, flag = self._cb(in_data, self._n, {}, 0)
+            if out_data is not None:
+                self._backend.salida.append(_bytes_a_floats(out_data[:self._n * self._canales * ancho],
+                                                            self._formato))
+            if flag != _CONTINUAR:
+                break
+            if self._backend.periodo:
+                time.sleep(self._backend.periodo)
+        self._activo = False
+
+    def start_stream(self):
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def stop_stream(self):
+        self._activo = False
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+
+    def close(self):
+        pass
+
+    def is_active(self):
+        return self._activo
+
+
+class BackendFalso:
+    """
+    Sustituto de pyaudio.PyAudio: entrega `senal_entrada` a los streams de
+    entrada y acumula en `salida` lo que los streams de salida reproducen.
+    """
+
+    def __init__(self, senal_entrada=None, periodo=0.0):
+        self.senal_entrada = np.zeros(0, dtype=np.float32) if senal_entrada is None \
+            else np.asarray(senal_entrada, dtype=np.float32).ravel()
+        self.periodo = periodo
+        self.salida = []
+        self._pos = 0
+
+    def _leer(self, n, formato):
+        bloque = self.senal_entrada[self._pos:self._pos + n]
+        self._pos += n
+        if bloque.size < n:
+            bloque = np.concatenate((bloque, np.zeros(n - bloque.size, dtype=np.float32)))
+        return _floats_a_bytes(bloque, formato)
+
+    def open(self, format, channels, rate, frames_per_buffer, stream_callback, input=False, output=False):
+        return _StreamFalso(self, format, channels, frames_per_buffer, stream_callback, input)
+
+
+# ========================= Prueba con backend falso =========================
+
+if __name__ == "__main__":
+    fs = 8000
+    t = np.arange(int(1.5 * fs)) / fs
+    tono = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+
+    backend = BackendFalso(senal_entrada=tono)
+    motor = MotorAudio(fs=fs, frames_por_buffer=256, max_segundos=5, backend=backend)
+
+    motor.grabar(1.0)
+    motor.esperar(5.0)
+    grabada = motor.senal_grabada()
+    err = np.max(np.abs(grabada - tono[:fs]))
+    print(f"Grabadas {grabada.size} muestras, error PCM16 máximo {err:.2e}, progreso {motor.progreso():.2f}")
+    assert grabada.size == fs and err < 1e-4
+
+    motor.reproducir(grabada)
+    motor.esperar(5.0)
+    reproducida = np.concatenate(backend.salida)[:grabada.size]
+    print(f"Reproducidas {reproducida.size} muestras, progreso {motor.progreso():.2f}")
+    assert np.max(np.abs(reproducida - grabada)) < 1e-4
+    motor.cerrar()
+    print("OK")
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class AnalizadorSTFT:
+    """
+    STFT incremental: se alimenta con bloques de muestras de cualquier tamaño
+    y devuelve las columnas |X| completadas. Solo conserva los n_fft - salto
+    últimos samples entre llamadas, así que la memoria no depende de la
+    duración de la señal. También acumula la potencia media por bin (Welch).
+    """
+
+    def __init__(self, fs, n_fft=1024, salto=256, ventana="hann"):
+        self.fs = float(fs)
+        self.n_fft = int(n_fft)
+        self.salto = int(salto)
+        if ventana == "hann":
+            self.ventana = np.hanning(self.n_fft + 1)[:-1]  # periódica
+        elif ventana == "hamming":
+            self.ventana = np.hamming(self.n_fft + 1)[:-1]
+        else:
+            self.ventana = np.ones(self.n_fft)
+        self.freqs = np.fft.rfftfreq(self.n_fft, d=1.0 / self.fs)
+        self._pendiente = np.zeros(0)
+        self.columnas = 0
+        self._potencia = np.zeros(self.freqs.size)
+
+    def alimentar(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        datos = np.concatenate((self._pendiente, x)) if self._pendiente.size else x
+        if datos.size < self.n_fft:
+            self._pendiente = datos.copy()
+            return np.zeros((0, self.freqs.size))
+
+        marcos = np.lib.stride_tricks.sliding_window_view(datos, self.n_fft)[::self.salto]
+        mags = np.abs(np.fft.rfft(marcos * self.ventana, axis=1))
+        self._potencia += np.sum(mags * mags, axis=0)
+        self.columnas += mags.shape[0]
+        self._pendiente = datos[marcos.shape[0] * self.salto:].copy()
+        return mags
+
+    def tiempos(self, mags, primera_columna):
+        """Instante (s) del centro de cada columna devuelta por alimentar()."""
+        idx = primera_columna + np.arange(mags.shape[0])
+        return (idx * self.salto + self.n_fft / 2.0) / self.fs
+
+    def espectro_medio(self):
+        """(freqs, magnitud RMS por bin) acumulada hasta ahora."""
+        if self.columnas == 0:
+            return self.freqs, np.zeros(self.freqs.size)
+        return self.freqs, np.sqrt(self._potencia / self.columnas)
+
+
+def bloques_de_senal(senal, tam_bloque=8192):
+    senal = np.asarray(senal)
+    for i in range(0, senal.size, tam_bloque):
+        yield senal[i:i + tam_bloque]
+
+
+def stft_por_bloques(bloques, fs, n_fft=1024, salto=256, ventana="hann"):
+    """
+    Generador de un solo paso: consume un iterable de bloques (p. ej.
+    bloques_de_senal o los trozos que entrega el motor de audio) y produce
+    (tiempos, mags) por cada lote de columnas nuevas, con memoria acotada.
+    """
+    analizador = AnalizadorSTFT(fs, n_fft, salto, ventana)
+    for bloque in bloques:
+        primera = analizador.columnas
+        mags = analizador.alimentar(bloque)
+        if mags.shape[0]:
+            yield analizador.tiempos(mags, primera), mags
+
+
+if __name__ == "__main__":
+    fs = 8000
+    x = np.random.default_rng(0).standard_normal(5 * fs)
+    ref = np.abs(np.fft.rfft(np.lib.stride_tricks.sliding_window_view(x, 512)[::128] * np.hanning(513)[:-1], axis=1))
+    cols = np.concatenate([m for _, m in stft_por_bloques(bloques_de_senal(x, 1000), fs, 512, 128)])
+    print(f"Columnas {cols.shape}, error vs STFT completa {np.max(np.abs(cols - ref)):.2e}")
+    assert cols.shape == ref.shape and np.allclose(cols, ref)
@@ -0,0 +1,56 @@
+"""
+Barrido de hiperparámetros del reconocedor
+Laboratorio 5 - Reconocimiento de comandos de voz
+
+Evalúa con validación cruzada la grilla N × K × ventana × métrica
+(euclídea, normalizada por desviación, DTW-kNN) sobre las grabaciones y
+escribe un reporte ordenado por exactitud y latencia. Los resultados se
+guardan a medida que terminan: si se interrumpe, volver a ejecutar el
+mismo comando retoma solo las configuraciones que faltan.
+
+Uso:
+    python barrido.py
+    python barrido.py --N 2048 4096 --K 3 5 10 --window hamming hann --workers 4
+"""
+
+import argparse
+import sys
+import time
+
+from eval_utils import SWEEP_METRICS, collect_corpus, format_sweep_report, sweep
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Barrido de N, K, ventana y métrica con validación cruzada.")
+    parser.add_argument("recordings_dir", nargs="?", default="recordings", help="carpeta con una subcarpeta por comando")
+    parser.add_argument("--N", type=int, nargs="+", default=[1024, 2048, 4096], help="tamaños de ventana FFT")
+    parser.add_argument("--K", type=int, nargs="+", default=[3, 5, 8, 10], help="números de subbandas")
+    parser.add_argument("--window", nargs="+", default=["hamming", "hann", "blackman", "rect"], help="ventanas")
+    parser.add_argument("--metric", nargs="+", default=list(SWEEP_METRICS), choices=SWEEP_METRICS, help="métricas de distancia")
+    parser.add_argument("--folds", type=int, default=5, help="particiones de la validación cruzada")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (1 = secuencial)")
+    parser.add_argument("--results", default="barrido_resultados.jsonl", help="resultados reanudables (JSON lines)")
+    parser.add_argument("--report", default="barrido_reporte.txt", help="reporte ordenado")
+    args = parser.parse_args(argv)
+
+    paths, labels = collect_corpus(args.recordings_dir)
+    if not paths:
+        print(f"No hay grabaciones en {args.recordings_dir}", file=sys.stderr)
+        return 1
+    print(f"Corpus: {len(paths)} archivos ({', '.join(sorted(set(labels)))}), {args.folds} folds")
+
+    t0 = time.perf_counter()
+    rows = sweep(paths, labels, args.N, args.K, args.window, metrics=tuple(args.metric),
+                 k_folds=args.folds, workers=args.workers, results_path=args.results,
+                 progress=lambda r: print(f"  ✓ {r['key']}: {r['accuracy'] * 100:.1f}%"))
+    report = format_sweep_report(rows)
+    with open(args.report, "w") as f:
+        f.write(report + "\n")
+
+    print(f"\n{report}")
+    print(f"\n{len(rows)} configuraciones en {time.perf_counter() - t0:.1f} s | reporte: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
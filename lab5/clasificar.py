@@ -0,0 +1,77 @@
+"""
+Clasificación por lotes desde la línea de comandos
+Laboratorio 5 - Reconocimiento de comandos de voz
+
+Emite un resultado JSON por línea (stdout) a medida que se clasifica cada
+lote; el resumen de rendimiento va a stderr para no ensuciar la salida.
+
+Uso:
+    python clasificar.py recordings/ > resultados.jsonl
+    python clasificar.py a.wav b.wav --model lab5_model.npz --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from model_utils import FEATURE_CACHE_DIR, iter_classify_batch, load_model
+
+
+def _collect_wavs(paths: list) -> list:
+    """Expande carpetas (recursivamente, en orden) a sus archivos .wav."""
+    wavs = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                wavs.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".wav"))
+        else:
+            wavs.append(p)
+    return wavs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Clasifica archivos WAV con el modelo del lab5 (salida JSON lines).")
+    parser.add_argument("paths", nargs="+", help="archivos .wav o carpetas que los contienen")
+    parser.add_argument("--model", default="lab5_model.npz", help="ruta del modelo entrenado")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para la extracción (1 = secuencial)")
+    parser.add_argument("--chunk", type=int, default=64, help="archivos por lote vectorizado")
+    parser.add_argument("--no-cache", action="store_true", help="no leer ni escribir la caché de características")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    wavs = _collect_wavs(args.paths)
+    if not wavs:
+        print("No se encontraron archivos .wav", file=sys.stderr)
+        return 1
+
+    cache_dir = None if args.no_cache else FEATURE_CACHE_DIR
+    t0 = time.perf_counter()
+    n_ok = n_err = n_hits = n_known = 0
+    for r in iter_classify_batch(wavs, model, workers=args.workers, cache_dir=cache_dir, chunk_size=args.chunk):
+        # La carpeta contenedora es la etiqueta esperada si coincide con un comando
+        expected = os.path.basename(os.path.dirname(os.path.abspath(r["path"])))
+        if expected in model["commands"]:
+            r["expected"] = expected
+        if "error" in r:
+            n_err += 1
+        else:
+            n_ok += 1
+            if "expected" in r:
+                n_known += 1
+                n_hits += int(r["label"] == expected)
+        print(json.dumps(r, ensure_ascii=False), flush=True)
+
+    elapsed = time.perf_counter() - t0
+    rate = len(wavs) / elapsed * 60 if elapsed > 0 else float("inf")
+    summary = f"{n_ok} clasificados, {n_err} errores en {elapsed:.2f} s ({rate:.0f} archivos/min)"
+    if n_known:
+        summary += f" | exactitud {n_hits / n_known * 100:.1f}% ({n_hits}/{n_known})"
+    print(summary, file=sys.stderr)
+    return 0 if n_err == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
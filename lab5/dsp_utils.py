@@ -2,6 +2,7 @@
 Funciones de DSP: subbandas por FFT, espectro, RMS y utilidades.
 """
 
+from functools import lru_cache
 from typing import Tuple, List
 import numpy as np
 from scipy.signal import get_window, butter, sosfilt
@@ -49,6 +50,17 @@ def _design_sos_for_band(fs: int, f0: float, f1: float, order: int = 6):
     return sos
 
 
+@lru_cache(maxsize=16)
+def _cached_window(window: str, N: int) -> np.ndarray:
+    """Ventana de longitud N (solo lectura, compartida entre llamadas)."""
+    if window is None or window.lower() == "none" or window == "rect":
+        w = np.ones(N)
+    else:
+        w = get_window(window, N, fftbins=True)
+    w.setflags(write=False)
+    return w
+
+
 def compute_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str = "hamming") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Calcula energías en K segmentos temporales de la señal x.
@@ -86,10 +98,7 @@ def compute_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str
     bands_hz = []  # Guardaremos rangos de frecuencia de cada segmento
     
     # Preparar ventana
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(segment_size)
-    else:
-        w = get_window(window, segment_size, fftbins=True)
+    w = _cached_window(window, segment_size)
     
     # ========== PASO 4: CALCULAR ENERGÍA DE CADA SEGMENTO ==========
     
@@ -137,12 +146,31 @@ def compute_subband_energies(x: np.ndarray, fs: int, N: int, K: int, window: str
     return Es, np.array(bands_hz), freqs
 
 
+def compute_subband_energies_batch(X: np.ndarray, N: int, K: int, window: str = "hamming") -> np.ndarray:
+    """
+    Energías de compute_subband_energies para F señales de N muestras a la
+    vez: X es (F, N) y devuelve Es (F, K). Los K segmentos de todas las
+    señales se transforman con una sola rFFT sobre el último eje.
+    """
+    X = np.asarray(X)
+    if not np.issubdtype(X.dtype, np.floating):
+        X = X.astype(float)
+    X = X - X.mean(axis=1, keepdims=True)
+    rms_vals = np.sqrt(np.mean(X ** 2, axis=1, keepdims=True))
+    X = np.where(rms_vals > 1e-8, X / np.where(rms_vals > 1e-8, rms_vals, 1.0), X)
+    X = np.concatenate((X[:, :1], X[:, 1:] - 0.97 * X[:, :-1]), axis=1)
+
+    segment_size = N // K
+    segments = X[:, :K * segment_size].reshape(X.shape[0], K, segment_size)
+    spec = np.fft.rfft(segments * _cached_window(window, segment_size), n=segment_size, axis=-1)
+    Es = np.log10(np.einsum("fkb,fkb->fk", spec.real, spec.real) + np.einsum("fkb,fkb->fk", spec.imag, spec.imag) + 1e-10)
+    E_sum = Es.sum(axis=1, keepdims=True)
+    return np.where(E_sum != 0, Es / np.where(E_sum != 0, E_sum, 1.0), Es)
+
+
 def compute_spectrum_db(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
     """Devuelve (freqs, mag_db) del espectro de magnitud de x (rFFT) con ventana."""
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(N)
-    else:
-        w = get_window(window, N, fftbins=True)
+    w = _cached_window(window, N)
     xw = (x[:N] if x.size >= N else np.pad(x, (0, N - x.size))) * w
     X = np.abs(np.fft.rfft(xw, n=N))
     freqs = np.fft.rfftfreq(N, d=1.0 / fs)
@@ -152,10 +180,7 @@ def compute_spectrum_db(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
 
 def compute_spectrum_mag(x: np.ndarray, fs: int, N: int, window: str) -> tuple:
     """Devuelve (freqs_Hz, |X(k)|) del espectro de magnitud (rFFT) con ventana."""
-    if window is None or window.lower() == "none" or window == "rect":
-        w = np.ones(N)
-    else:
-        w = get_window(window, N, fftbins=True)
+    w = _cached_window(window, N)
     xw = (x[:N] if x.size >= N else np.pad(x, (0, N - x.size))) * w
     X = np.abs(np.fft.rfft(xw, n=N))
     freqs = np.fft.rfftfreq(N, d=1.0 / fs)
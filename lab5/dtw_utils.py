@@ -0,0 +1,259 @@
+"""
+DTW (alineación temporal dinámica) vectorizada por anti-diagonales.
+
+Todas las celdas de una anti-diagonal i + j = d dependen solo de las dos
+diagonales anteriores, así que cada diagonal se calcula con una operación
+NumPy, y a la vez para todos los patrones de referencia (eje 0). La
+recurrencia y la normalización son las de _compute_adaptive_distance:
+D[i, j] = |s1[i-1] - s2[j-1]| + min(D[i-1, j], D[i, j-1], D[i-1, j-1]),
+distancia = D[n, m] / (n + m).
+
+LBKeoghIndex guarda, para cada patrón de referencia, la envolvente
+superior/inferior admitida por la banda y permite descartar patrones con
+una cota inferior barata antes de calcular la DTW completa.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+@lru_cache(maxsize=16)
+def _diagonal_plan(n: int, m: int, band: Optional[int]) -> tuple:
+    """
+    Índices planos (sobre D de (n+1) x (m+1) y cost de n x m) de cada
+    anti-diagonal y de sus tres predecesoras, calculados una vez por geometría.
+    """
+    plan = []
+    r = m / n
+    for d in range(2, n + m + 1):
+        i = np.arange(max(1, d - m), min(n, d - 1) + 1)
+        j = d - i
+        if band is not None:
+            # Solo las celdas dentro de la banda; el resto queda en inf
+            dentro = np.abs(i * r - j) <= band
+            i, j = i[dentro], j[dentro]
+            if i.size == 0:
+                continue
+        cur = i * (m + 1) + j
+        plan.append((cur, cur - (m + 1), cur - 1, cur - (m + 2), (i - 1) * m + (j - 1)))
+    return tuple(plan)
+
+
+def dtw_distances_batch(query: np.ndarray, patterns: np.ndarray, band: Optional[int] = None) -> np.ndarray:
+    """
+    Distancias DTW de `query` (n,) contra cada fila de `patterns` (P, m).
+
+    band: radio Sakoe-Chiba en celdas alrededor de la diagonal (escalada a
+    n x m). None = sin restricción (resultado idéntico a la versión de doble
+    bucle).
+    """
+    q = np.asarray(query, dtype=float).ravel()
+    R = np.atleast_2d(np.asarray(patterns, dtype=float))
+    P, m = R.shape
+    n = q.size
+    if P == 0:
+        return np.zeros(0)
+
+    cost = np.abs(q[None, :, None] - R[:, None, :]).reshape(P, n * m)
+    D = np.full((P, (n + 1) * (m + 1)), np.inf)
+    D[:, 0] = 0.0
+
+    for cur, up, left, diag, c in _diagonal_plan(n, m, band):
+        prev = np.minimum(np.minimum(D[:, up], D[:, left]), D[:, diag])
+        D[:, cur] = cost[:, c] + prev
+
+    return D[:, -1] / (n + m)
+
+
+def dtw_distance(s1: np.ndarray, s2: np.ndarray, band: Optional[int] = None) -> float:
+    return float(dtw_distances_batch(s1, np.asarray(s2, dtype=float)[None, :], band)[0])
+
+
+# ========== Cotas inferiores (LB_Keogh) ==========
+
+def _band_mask(n: int, m: int, band: Optional[int]) -> np.ndarray:
+    """Celdas (i, j) de la matriz n x m que la DTW puede visitar (misma geometría que dtw_distances_batch)."""
+    if band is None:
+        return np.ones((n, m), dtype=bool)
+    i = np.arange(1, n + 1)[:, None]
+    j = np.arange(1, m + 1)[None, :]
+    return np.abs(i * (m / n) - j) <= band
+
+
+def _outside(x: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Suma por fila de la distancia de x al intervalo [lower, upper]."""
+    return (np.maximum(x - upper, 0.0) + np.maximum(lower - x, 0.0)).sum(axis=-1)
+
+
+class LBKeoghIndex:
+    """
+    Índice de patrones de referencia para kNN con DTW exacta.
+
+    Todo camino DTW pasa al menos una vez por cada fila i (y cada columna j)
+    dentro de la banda, así que la suma de la distancia de q[i] a la
+    envolvente [L[i], U[i]] del patrón es una cota inferior de la distancia
+    DTW (y lo mismo con los papeles invertidos). Las envolventes de los
+    patrones se calculan una vez al entrenar; la de la consulta, una vez
+    por consulta.
+    """
+
+    def __init__(self, labels: List[str], patterns: np.ndarray, band: Optional[int] = None,
+                 upper: Optional[np.ndarray] = None, lower: Optional[np.ndarray] = None):
+        self.labels = list(labels)
+        self.patterns = np.atleast_2d(np.asarray(patterns, dtype=float))
+        self.band = band
+        if self.patterns.size == 0:
+            self.patterns = np.zeros((0, 0))
+        m = self.patterns.shape[1]
+        self.query_len = m
+        self.label_names = sorted(set(self.labels))
+        self._label_idx = np.array([self.label_names.index(l) for l in self.labels], dtype=int)
+        if upper is None or lower is None:
+            upper, lower = self._envelopes(self.patterns, m)
+        self.upper = np.asarray(upper, dtype=float).reshape(self.patterns.shape[0], -1)
+        self.lower = np.asarray(lower, dtype=float).reshape(self.patterns.shape[0], -1)
+
+    @classmethod
+    def from_ref_patterns(cls, ref_patterns: Dict[str, list], band: Optional[int] = None) -> "LBKeoghIndex":
+        labels = [label for label, pats in ref_patterns.items() for _ in pats]
+        patterns = [p for pats in ref_patterns.values() for p in pats]
+        return cls(labels, np.array(patterns, dtype=float), band)
+
+    def _envelopes(self, patterns: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Envolventes (P, n) de los patrones vistas desde una consulta de longitud n."""
+        mask = _band_mask(n, patterns.shape[1], self.band)[None]
+        upper = np.where(mask, patterns[:, None, :], -np.inf).max(axis=2)
+        lower = np.where(mask, patterns[:, None, :], np.inf).min(axis=2)
+        return upper, lower
+
+    def to_dict(self) -> dict:
+        return {"band": self.band, "upper": self.upper.tolist(), "lower": self.lower.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: dict, ref_patterns: Dict[str, list]) -> "LBKeoghIndex":
+        labels = [label for label, pats in ref_patterns.items() for _ in pats]
+        patterns = np.array([p for pats in ref_patterns.values() for p in pats], dtype=float)
+        return cls(labels, patterns, d.get("band"), d.get("upper"), d.get("lower"))
+
+    def lower_bounds(self, query: np.ndarray) -> np.ndarray:
+        """Cota inferior de la distancia DTW normalizada de `query` a cada patrón."""
+        q = np.asarray(query, dtype=float).ravel()
+        n, (P, m) = q.size, self.patterns.shape
+        if P == 0:
+            return np.zeros(0)
+        if n == self.query_len:
+            upper, lower = self.upper, self.lower
+        else:
+            upper, lower = self._envelopes(self.patterns, n)
+        lb_rows = _outside(q[None, :], lower, upper)
+
+        # Envolvente de la consulta vista desde cada columna del patrón
+        mask = _band_mask(n, m, self.band)
+        q_upper = np.where(mask, q[:, None], -np.inf).max(axis=0)
+        q_lower = np.where(mask, q[:, None], np.inf).min(axis=0)
+        lb_cols = _outside(self.patterns, q_lower[None, :], q_upper[None, :])
+
+        # Margen relativo para que el redondeo no convierta la cota en una sobreestimación
+        return np.maximum(lb_rows, lb_cols) / (n + m) * (1.0 - 1e-9)
+
+    def search(self, query: np.ndarray, k: int = 5, chunk: Optional[int] = None) -> Tuple[List[Tuple[str, float]], Dict[str, float], int]:
+        """
+        k vecinos exactos (mismo orden que ordenar todas las distancias de forma
+        estable) y la distancia exacta al patrón más cercano de cada etiqueta.
+        La DTW solo se evalúa, en lotes de `chunk`, sobre los patrones cuya cota
+        no los descarta. Devuelve (k_nearest, nearest_by_label, evaluaciones).
+        """
+        q = np.asarray(query, dtype=float).ravel()
+        P = self.patterns.shape[0]
+        if P == 0:
+            return [], {}, 0
+        chunk = max(k, P // 4, 1) if chunk is None else max(1, int(chunk))
+        label_idx = self._label_idx
+        lb = self.lower_bounds(q)
+        order = np.argsort(lb, kind="stable")
+        exact = np.full(P, np.inf)
+        done = np.zeros(P, dtype=bool)
+        best_by_label = np.full(len(self.label_names), np.inf)
+
+        while True:
+            kth = np.partition(exact, k - 1)[k - 1] if 0 < k <= P else np.inf
+            pending = order[~done[order]]
+            needed = pending[(lb[pending] <= kth) | (lb[pending] <= best_by_label[label_idx[pending]])]
+            if needed.size == 0:
+                break
+            # Primer lote: los `chunk` de cota más baja; después, todos los que sigan en duda a la vez
+            batch = needed[:chunk] if not done.any() else needed
+            exact[batch] = dtw_distances_batch(q, self.patterns[batch], self.band)
+            done[batch] = True
+            np.minimum.at(best_by_label, label_idx[batch], exact[batch])
+
+        ranked = np.lexsort((np.arange(P), exact))[:k]
+        k_nearest = [(self.labels[i], float(exact[i])) for i in ranked if done[i]]
+        nearest = {name: float(best_by_label[i]) for i, name in enumerate(self.label_names)}
+        return k_nearest, nearest, int(done.sum())
+
+
+if __name__ == "__main__":
+    import time
+
+    def _reference(s1, s2):
+        n, m = len(s1), len(s2)
+        cost_matrix = np.full((n + 1, m + 1), np.inf)
+        cost_matrix[0, 0] = 0
+        for i in range(1, n + 1):
+            for j in range(1, m + 1):
+                diff = abs(s1[i-1] - s2[j-1])
+                cost_matrix[i, j] = diff + min(cost_matrix[i-1, j],
+                                               cost_matrix[i, j-1],
+                                               cost_matrix[i-1, j-1])
+        return cost_matrix[n, m] / (n + m)
+
+    rng = np.random.default_rng(0)
+    # Regresión: longitudes iguales y distintas, perfiles tipo RMS (no negativos)
+    for n, m in [(50, 50), (1, 1), (7, 13), (40, 25)]:
+        q = np.abs(rng.standard_normal(n))
+        pats = np.abs(rng.standard_normal((30, m)))
+        ref = np.array([_reference(q, p) for p in pats])
+        got = dtw_distances_batch(q, pats)
+        assert np.array_equal(ref, got), (n, m, np.max(np.abs(ref - got)))
+        # Una banda suficientemente ancha no cambia nada
+        assert np.array_equal(ref, dtw_distances_batch(q, pats, band=max(n, m)))
+
+    q = np.abs(rng.standard_normal(50))
+    pats = np.abs(rng.standard_normal((75, 50)))
+    t0 = time.perf_counter()
+    ref = [_reference(q, p) for p in pats]
+    t_ref = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    dtw_distances_batch(q, pats)
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    dtw_distances_batch(q, pats, band=5)
+    t_band = time.perf_counter() - t0
+    print(f"75 patrones: doble bucle {t_ref*1e3:.1f} ms | lote {t_full*1e3:.2f} ms | lote banda=5 {t_band*1e3:.2f} ms")
+    print("Regresión OK (distancias idénticas)")
+
+    # Índice LB_Keogh: mismos k vecinos y mínimos por etiqueta que la búsqueda exhaustiva
+    # Perfiles tipo envolvente de palabra: una "sílaba" por clase en posición distinta
+    t = np.linspace(0, 1, 50)
+
+    def _profile(c):
+        center = 0.25 + 0.25 * c + rng.normal(0, 0.03)
+        return np.exp(-((t - center) / 0.08) ** 2) * rng.uniform(0.7, 1.3) + 0.02 * np.abs(rng.standard_normal(50))
+
+    pats = np.array([_profile(i % 3) for i in range(75)])
+    labels = [f"c{i % 3}" for i in range(len(pats))]
+    for band in (None, 5):
+        index = LBKeoghIndex(labels, pats, band)
+        evals = 0
+        for _ in range(20):
+            q = _profile(rng.integers(3))
+            d = dtw_distances_batch(q, pats, band)
+            assert np.all(index.lower_bounds(q) <= d)
+            k_nearest, nearest, n_eval = index.search(q, k=5)
+            full = sorted(zip(labels, d.tolist()), key=lambda x: x[1])[:5]
+            assert k_nearest == full
+            assert nearest == {l: min(x for lb_, x in zip(labels, d) if lb_ == l) for l in set(labels)}
+            evals += n_eval
+        print(f"LB_Keogh banda={band}: {evals / 20:.1f} de {len(pats)} DTW evaluadas por consulta")
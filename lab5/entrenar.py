@@ -13,7 +13,7 @@ N = 4096           # Tamaño de ventana FFT
 K = 3              # Número de subbandas (ENUNCIADO: dividir en 3 subbandas)
 M = 100            # Muestras por comando (ENUNCIADO: mínimo 100)
 WINDOW = "hamming" # Tipo de ventana
-MODEL_PATH = "lab5_model.json"
+MODEL_PATH = "lab5_model.npz"
 RECORDINGS_DIR = "recordings"
 
 # Comandos a reconocer
@@ -0,0 +1,364 @@
+"""
+Evaluación del reconocedor sobre el corpus completo.
+
+El corpus se decodifica y se extraen sus características una sola vez
+(extract_features, con caché en disco) en matrices en memoria: energías
+E (n, K), perfiles temporales P (n, PROFILE_SAMPLES) y etiquetas y (n,).
+Cada fold de la validación cruzada entrena con model_from_features sobre
+cortes de índices de esas matrices y se evalúa en su propio proceso, así
+que el costo pasa de O(k × decodificar el corpus) a O(decodificar el corpus).
+
+El barrido de hiperparámetros (sweep) decodifica el corpus una vez para
+toda la grilla: las primeras max(N) muestras de cada archivo y su perfil
+temporal. Cada configuración (N, K, ventana) calcula sus energías con una
+sola rFFT por lotes y evalúa con los mismos folds las métricas euclídea y
+normalizada; la DTW-kNN solo depende de los perfiles, así que se evalúa
+una sola vez para toda la grilla.
+"""
+
+import os
+import json
+import hashlib
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+import numpy as np
+import soundfile as sf
+
+from dsp_utils import compute_subband_energies_batch
+from dtw_utils import LBKeoghIndex
+from model_utils import (FEATURE_CACHE_DIR, PROFILE_SAMPLES, extract_features, knn_vote, model_from_features,
+                         normalized_distances, reference_indices, _extract_temporal_profile, _refine_with_profile)
+
+
+# ========== Corpus en memoria ==========
+
+def collect_corpus(recordings_dir: str, commands: List[str] | None = None) -> Tuple[List[str], List[str]]:
+    """(rutas, etiquetas) de recordings_dir/<comando>/*.wav, en orden estable."""
+    if commands is None:
+        commands = sorted(d for d in os.listdir(recordings_dir)
+                          if os.path.isdir(os.path.join(recordings_dir, d)))
+    paths, labels = [], []
+    for label in commands:
+        folder = os.path.join(recordings_dir, label)
+        if not os.path.isdir(folder):
+            continue
+        for f in sorted(os.listdir(folder)):
+            if f.lower().endswith(".wav"):
+                paths.append(os.path.join(folder, f))
+                labels.append(label)
+    return paths, labels
+
+
+def load_feature_matrix(paths: List[str], fs: int, N: int, K: int, window: str, workers: int | None = None,
+                        cache_dir: str | None = FEATURE_CACHE_DIR) -> Tuple[np.ndarray, np.ndarray]:
+    """Características de todo el corpus apiladas: (E (n, K), P (n, PROFILE_SAMPLES))."""
+    feats = extract_features(paths, fs, N, K, window, workers=workers, cache_dir=cache_dir)
+    E = np.vstack([Es for Es, _ in feats]).astype(float)
+    P = np.vstack([profile for _, profile in feats]).astype(float)
+    return E, P
+
+
+def stratified_folds(y: np.ndarray, k_folds: int, seed: int = 0) -> np.ndarray:
+    """Número de fold de cada muestra, repartiendo cada etiqueta por igual entre los k folds."""
+    rng = np.random.default_rng(seed)
+    fold_of = np.empty(len(y), dtype=int)
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        fold_of[rng.permutation(idx)] = np.arange(idx.size) % k_folds
+    return fold_of
+
+
+def fit_indices(E: np.ndarray, P: np.ndarray, y: np.ndarray, train_idx: np.ndarray,
+                fs: int, N: int, K: int, window: str) -> dict:
+    """Modelo entrenado solo con las filas train_idx (mismo criterio que train_from_folder)."""
+    features = {}
+    for label in sorted(set(y[train_idx].tolist())):
+        rows = train_idx[y[train_idx] == label]
+        features[label] = (E[rows], P[rows[reference_indices(rows.size)]])
+    return model_from_features(fs, N, K, window, features)
+
+
+def predict_indices(model: dict, E: np.ndarray, P: np.ndarray | None, test_idx: np.ndarray) -> List[str]:
+    """Etiquetas predichas para las filas test_idx (distancias vectorizadas + refinamiento DTW-kNN)."""
+    labels, D = normalized_distances(E[test_idx], model)
+    preds = []
+    for r, i in enumerate(test_idx):
+        dists = {label: float(d) for label, d in zip(labels, D[r])}
+        preds.append(_refine_with_profile(dists, model, None if P is None else P[i])[0])
+    return preds
+
+
+# ========== Validación cruzada en paralelo ==========
+
+# Matrices del corpus en cada proceso del pool (se envían una sola vez, no por fold)
+_SHARED: dict = {}
+
+
+def _init_shared(E: np.ndarray, P: np.ndarray, y: np.ndarray, params: tuple) -> None:
+    _SHARED.update(E=E, P=P, y=y, params=params)
+
+
+def _run_fold(fold: int, train_idx: np.ndarray, test_idx: np.ndarray) -> dict:
+    E, P, y, params = _SHARED["E"], _SHARED["P"], _SHARED["y"], _SHARED["params"]
+    t0 = time.perf_counter()
+    model = fit_indices(E, P, y, train_idx, *params)
+    t1 = time.perf_counter()
+    preds = predict_indices(model, E, P, test_idx)
+    t2 = time.perf_counter()
+    return {"fold": fold, "test_idx": test_idx, "pred": preds,
+            "train_s": t1 - t0, "test_s": t2 - t1}
+
+
+def cross_validate(paths: List[str], labels: List[str], fs: int, N: int, K: int, window: str,
+                   k_folds: int = 5, workers: int | None = None, seed: int = 0,
+                   cache_dir: str | None = FEATURE_CACHE_DIR) -> dict:
+    """
+    Validación cruzada k-fold estratificada. Devuelve un dict con
+    "commands", "confusion" (matriz (C, C), filas = esperado),
+    "accuracy", "folds" (exactitud y tiempos por fold) y "extract_s".
+    """
+    y = np.asarray(labels)
+    commands = sorted(set(labels))
+    params = (fs, N, K, window)
+
+    t0 = time.perf_counter()
+    E, P = load_feature_matrix(paths, fs, N, K, window, workers=workers, cache_dir=cache_dir)
+    extract_s = time.perf_counter() - t0
+
+    fold_of = stratified_folds(y, k_folds, seed)
+    jobs = [(f, np.flatnonzero(fold_of != f), np.flatnonzero(fold_of == f)) for f in range(k_folds)]
+    if workers == 1:
+        _init_shared(E, P, y, params)
+        outs = [_run_fold(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_shared,
+                                 initargs=(E, P, y, params)) as pool:
+            outs = list(pool.map(_run_fold, *zip(*jobs)))
+
+    pos = {c: i for i, c in enumerate(commands)}
+    confusion = np.zeros((len(commands), len(commands)), dtype=int)
+    folds = []
+    for out in outs:
+        expected = y[out["test_idx"]]
+        for e, p in zip(expected, out["pred"]):
+            confusion[pos[e], pos[p]] += 1
+        correct = sum(e == p for e, p in zip(expected, out["pred"]))
+        folds.append({"fold": out["fold"], "n": len(expected), "accuracy": correct / max(1, len(expected)),
+                      "train_s": out["train_s"], "test_s": out["test_s"]})
+
+    return {"commands": commands, "confusion": confusion,
+            "accuracy": float(np.trace(confusion) / max(1, confusion.sum())),
+            "folds": folds, "extract_s": extract_s}
+
+
+# ========== Barrido de hiperparámetros ==========
+
+SWEEP_METRICS = ("euclidea", "normalizada", "dtw_knn")
+
+
+def _decode_head(path: str, n_head: int) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Primeras n_head muestras (float32, como _signal_features), perfil temporal y su costo en s."""
+    x_full, _ = sf.read(path)
+    if x_full.ndim > 1:
+        x_full = x_full.mean(axis=1)
+    head = x_full.astype(np.float32)[:n_head]
+    if head.size < n_head:
+        head = np.pad(head, (0, n_head - head.size))
+    t0 = time.perf_counter()
+    profile = _extract_temporal_profile(x_full, n_samples=PROFILE_SAMPLES)
+    return head, profile, time.perf_counter() - t0
+
+
+def decode_corpus(paths: List[str], n_head: int, workers: int | None = None) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Decodifica cada archivo una sola vez: (X (n, n_head), P (n, PROFILE_SAMPLES), s de perfil por archivo)."""
+    if workers == 1 or len(paths) < 4:
+        out = [_decode_head(p, n_head) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            out = list(pool.map(_decode_head, paths, [n_head] * len(paths), chunksize=8))
+    X = np.vstack([h for h, _, _ in out])
+    P = np.vstack([p for _, p, _ in out]).astype(float)
+    return X, P, float(np.mean([t for _, _, t in out]))
+
+
+def config_key(metric: str, N: int | None = None, K: int | None = None, window: str | None = None) -> str:
+    """Clave estable de una configuración en el archivo de resultados."""
+    if metric == "dtw_knn":
+        return f"dtw_knn|profile={PROFILE_SAMPLES}"
+    return f"{metric}|N={N}|K={K}|window={window}"
+
+
+def corpus_fingerprint(paths: List[str], k_folds: int, seed: int) -> str:
+    """Huella del corpus y de la partición: un resultado guardado solo se reutiliza si coincide."""
+    h = hashlib.sha1(repr((k_folds, seed)).encode("utf-8"))
+    for p in paths:
+        st = os.stat(p)
+        h.update(repr((os.path.abspath(p), st.st_mtime_ns, st.st_size)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _fft_fold_predictions(E: np.ndarray, y: np.ndarray, fold_of: np.ndarray, metric: str) -> np.ndarray:
+    """Predicciones de CV con la distancia euclídea o normalizada a la media de cada comando."""
+    commands = np.unique(y)
+    pred = np.empty(len(y), dtype=commands.dtype)
+    for f in np.unique(fold_of):
+        train, test = fold_of != f, fold_of == f
+        means = np.array([E[train & (y == c)].mean(axis=0) for c in commands])
+        diff = E[test][:, None, :] - means[None, :, :]
+        if metric == "normalizada":
+            stds = np.array([E[train & (y == c)].std(axis=0) for c in commands])
+            diff = diff / (stds[None, :, :] + 1e-6)
+        pred[test] = commands[np.argmin(np.einsum("fck,fck->fc", diff, diff), axis=1)]
+    return pred
+
+
+def _run_config(N: int, K: int, window: str, metrics: Tuple[str, ...]) -> List[dict]:
+    X, y, fold_of = _SHARED["X"], _SHARED["y"], _SHARED["fold_of"]
+    t0 = time.perf_counter()
+    E = compute_subband_energies_batch(X[:, :N], N, K, window)
+    feat_ms = (time.perf_counter() - t0) / len(y) * 1e3
+    rows = []
+    for metric in metrics:
+        t0 = time.perf_counter()
+        pred = _fft_fold_predictions(E, y, fold_of, metric)
+        classify_ms = (time.perf_counter() - t0) / len(y) * 1e3
+        rows.append({"key": config_key(metric, N, K, window), "metric": metric, "N": N, "K": K, "window": window,
+                     "accuracy": float(np.mean(pred == y)), "feature_ms": feat_ms, "classify_ms": classify_ms})
+    return rows
+
+
+def _run_dtw(profile_ms: float) -> List[dict]:
+    P, y, fold_of = _SHARED["P"], _SHARED["y"], _SHARED["fold_of"]
+    t0 = time.perf_counter()
+    pred = np.empty(len(y), dtype=y.dtype)
+    for f in np.unique(fold_of):
+        train = np.flatnonzero(fold_of != f)
+        refs = {}
+        for label in sorted(set(y[train].tolist())):
+            rows = train[y[train] == label]
+            refs[label] = P[rows[reference_indices(rows.size)]].tolist()
+        index = LBKeoghIndex.from_ref_patterns(refs)
+        for i in np.flatnonzero(fold_of == f):
+            pred[i] = knn_vote(index, P[i])[0]
+    classify_ms = (time.perf_counter() - t0) / len(y) * 1e3
+    return [{"key": config_key("dtw_knn"), "metric": "dtw_knn", "N": None, "K": None, "window": None,
+             "accuracy": float(np.mean(pred == y)), "feature_ms": profile_ms, "classify_ms": classify_ms}]
+
+
+def _init_sweep(X: np.ndarray, P: np.ndarray, y: np.ndarray, fold_of: np.ndarray) -> None:
+    _SHARED.update(X=X, P=P, y=y, fold_of=fold_of)
+
+
+def load_sweep_results(results_path: str, fingerprint: str) -> dict:
+    """Resultados ya guardados para esta huella: {clave: fila}. Ignora líneas incompletas."""
+    done = {}
+    if os.path.exists(results_path):
+        with open(results_path, "r") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # línea truncada por una interrupción
+                if row.get("fingerprint") == fingerprint:
+                    done[row["key"]] = row
+    return done
+
+
+def sweep(paths: List[str], labels: List[str], Ns: List[int], Ks: List[int], windows: List[str],
+          metrics: Tuple[str, ...] = SWEEP_METRICS, k_folds: int = 5, seed: int = 0,
+          workers: int | None = None, results_path: str = "barrido_resultados.jsonl",
+          progress=None) -> List[dict]:
+    """
+    Evalúa la grilla N × K × ventana × métrica con validación cruzada k-fold
+    (los mismos folds para todas las configuraciones). Cada resultado se
+    agrega a results_path (JSON lines) en cuanto termina, así que un barrido
+    interrumpido retoma solo lo que falta. Devuelve las filas ordenadas de
+    mayor a menor exactitud y, a igual exactitud, de menor latencia.
+    """
+    unknown = set(metrics) - set(SWEEP_METRICS)
+    if unknown:
+        raise ValueError(f"Métricas desconocidas: {sorted(unknown)}")
+    y = np.asarray(labels)
+    fingerprint = corpus_fingerprint(paths, k_folds, seed)
+    done = load_sweep_results(results_path, fingerprint)
+
+    fft_metrics = tuple(m for m in metrics if m != "dtw_knn")
+    jobs = []
+    for N, K, window in itertools.product(Ns, Ks, windows):
+        pending = tuple(m for m in fft_metrics if config_key(m, N, K, window) not in done)
+        if pending and K <= N:
+            jobs.append((_run_config, (N, K, window, pending)))
+    need_dtw = "dtw_knn" in metrics and config_key("dtw_knn") not in done
+
+    if jobs or need_dtw:
+        X, P, profile_s = decode_corpus(paths, max(Ns), workers=workers)
+        if need_dtw:
+            jobs.append((_run_dtw, (profile_s * 1e3,)))
+        fold_of = stratified_folds(y, k_folds, seed)
+        with open(results_path, "a") as out:
+            def _save(rows):
+                for row in rows:
+                    row["fingerprint"] = fingerprint
+                    done[row["key"]] = row
+                    out.write(json.dumps(row) + "\n")
+                    if progress is not None:
+                        progress(row)
+                out.flush()
+
+            if workers == 1:
+                _init_sweep(X, P, y, fold_of)
+                for fn, args in jobs:
+                    _save(fn(*args))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep,
+                                         initargs=(X, P, y, fold_of)) as pool:
+                    for fut in as_completed([pool.submit(fn, *args) for fn, args in jobs]):
+                        _save(fut.result())
+
+    wanted = {config_key("dtw_knn")} if "dtw_knn" in metrics else set()
+    wanted |= {config_key(m, N, K, w) for m in fft_metrics for N, K, w in itertools.product(Ns, Ks, windows) if K <= N}
+    rows = [done[k] for k in wanted if k in done]
+    return sorted(rows, key=lambda r: (-r["accuracy"], r["feature_ms"] + r["classify_ms"]))
+
+
+def format_sweep_report(rows: List[dict]) -> str:
+    """Tabla de texto del barrido ya ordenado."""
+    lines = [f"{'#':>3}  {'métrica':<12}{'N':>6}{'K':>5}  {'ventana':<10}{'exactitud':>10}{'ms/archivo':>12}",
+             "-" * 60]
+    for pos, r in enumerate(rows, 1):
+        N = "—" if r["N"] is None else r["N"]
+        K = "—" if r["K"] is None else r["K"]
+        window = "—" if r["window"] is None else r["window"]
+        lines.append(f"{pos:>3}  {r['metric']:<12}{N:>6}{K:>5}  {window:<10}"
+                     f"{r['accuracy'] * 100:>9.1f}%{r['feature_ms'] + r['classify_ms']:>12.3f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Autoverificación con un corpus sintético separable (sin audio)
+    rng = np.random.default_rng(0)
+    y = np.repeat(["a", "b", "c"], 30)
+    grupo = np.arange(90) // 30
+    E = rng.normal(scale=0.2, size=(90, 3)) + grupo[:, None]
+    t = np.linspace(0, 1, 50)
+    P = np.abs(np.sin(np.pi * t[None, :] * (1 + grupo)[:, None])) + 0.05 * rng.random((90, 50))
+
+    fold_of = stratified_folds(y, 5)
+    assert all(np.bincount(fold_of[y == c]).tolist() == [6] * 5 for c in "abc")
+
+    # Con todas las filas, fit_indices equivale a entrenar con model_from_features
+    todo = np.arange(90)
+    model = fit_indices(E, P, y, todo, 44100, 4096, 3, "hamming")
+    ref = model_from_features(44100, 4096, 3, "hamming",
+                              {c: (E[y == c], P[y == c][reference_indices(30)]) for c in "abc"})
+    assert model == ref
+
+    _init_shared(E, P, y, (44100, 4096, 3, "hamming"))
+    outs = [_run_fold(f, np.flatnonzero(fold_of != f), np.flatnonzero(fold_of == f)) for f in range(5)]
+    assert sorted(np.concatenate([o["test_idx"] for o in outs]).tolist()) == todo.tolist()
+    acc = np.mean([p == y[i] for o in outs for i, p in zip(o["test_idx"], o["pred"])])
+    assert acc > 0.95, acc
+    print(f"CV sintética 5 folds: exactitud {acc * 100:.1f}%")
+    print("OK")
@@ -0,0 +1,114 @@
+"""
+Enmarcado de señales sin copias: vistas por zancadas (sliding_window_view)
+y sumas acumuladas para envolventes de energía, RMS y pico.
+
+Convención de marcos: el marco f cubre x[f*hop : f*hop + win_len] y solo se
+consideran marcos completos (1 + (len(x) - win_len) // hop marcos).
+"""
+
+import numpy as np
+
+# A partir de este solapamiento (win_len / hop) la energía por sumas
+# acumuladas (O(n)) es más barata que reducir cada marco (O(n * win_len / hop)).
+_CUMSUM_OVERLAP = 16
+
+
+def _as_1d(x) -> np.ndarray:
+    """Los marcos se toman sobre una señal 1D: el estéreo se baja a mono antes de llamar."""
+    x = np.asarray(x)
+    if x.ndim != 1:
+        raise ValueError(f"Se esperaba una señal 1D (mono); llegó un arreglo de forma {x.shape}")
+    return x
+
+
+def num_frames(n: int, win_len: int, hop: int) -> int:
+    """Cantidad de marcos completos de win_len con salto hop en n muestras."""
+    if n < win_len:
+        return 0
+    return 1 + (n - win_len) // hop
+
+
+def frame_view(x: np.ndarray, win_len: int, hop: int) -> np.ndarray:
+    """Vista (num_frames, win_len) de solo lectura sobre x (1D); no copia datos."""
+    x = _as_1d(x)
+    win_len, hop = max(1, int(win_len)), max(1, int(hop))
+    if x.size < win_len:
+        return np.zeros((0, win_len), dtype=x.dtype)
+    return np.lib.stride_tricks.sliding_window_view(x, win_len)[::hop]
+
+
+def energy_envelope(x: np.ndarray, win_len: int, hop: int) -> np.ndarray:
+    """Energía (suma de cuadrados, float64) de cada marco de x (1D)."""
+    x = _as_1d(x)
+    win_len, hop = max(1, int(win_len)), max(1, int(hop))
+    nf = num_frames(x.size, win_len, hop)
+    if nf == 0:
+        return np.zeros(0)
+    if win_len // hop < _CUMSUM_OVERLAP:
+        frames = frame_view(x, win_len, hop)
+        return np.einsum("ij,ij->i", frames, frames, dtype=np.float64)
+    c = np.empty(x.size + 1)
+    c[0] = 0.0
+    np.cumsum(np.square(x, dtype=np.float64), out=c[1:])
+    starts = np.arange(nf) * hop
+    # Las restas de sumas grandes pueden dar -epsilon en marcos silenciosos
+    return np.maximum(c[starts + win_len] - c[starts], 0.0)
+
+
+def rms_envelope(x: np.ndarray, win_len: int, hop: int) -> np.ndarray:
+    """RMS de cada marco."""
+    return np.sqrt(energy_envelope(x, win_len, hop) / max(1, int(win_len)))
+
+
+def peak_envelope(x: np.ndarray, win_len: int, hop: int) -> np.ndarray:
+    """Valor absoluto máximo de cada marco."""
+    x = _as_1d(x)
+    frames = frame_view(x, win_len, hop)
+    if frames.shape[0] == 0:
+        return np.zeros(0)
+    return np.maximum(frames.max(axis=1), -frames.min(axis=1)).astype(np.float64)
+
+
+def noise_floor(env: np.ndarray) -> float:
+    """Piso de ruido de una envolvente: mediana del 20% de marcos más bajos."""
+    env = np.asarray(env, dtype=float).ravel()
+    n = env.size
+    if n == 0:
+        return 0.0
+    k = max(1, n // 5)
+    return float(np.median(np.partition(env, k - 1)[:k]))
+
+
+def activity_threshold(noise: float, thresh_factor: float = 3.0) -> float:
+    """Umbral de actividad sobre el piso de ruido (nunca igual al piso)."""
+    return max(noise * thresh_factor, noise + 1e-8)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(32768 * 3).astype(np.float32) * 0.1
+    for win_len, hop in [(640, 320), (655, 655), (1024, 1), (7, 3), (10, 10**6)]:
+        ref_rms = np.array([np.sqrt(np.mean(x[i:i + win_len].astype("float64") ** 2))
+                            for i in range(0, x.size - win_len + 1, hop)])
+        ref_peak = np.array([np.max(np.abs(x[i:i + win_len]))
+                             for i in range(0, x.size - win_len + 1, hop)])
+        assert np.allclose(rms_envelope(x, win_len, hop), ref_rms, rtol=1e-9, atol=1e-12)
+        assert np.array_equal(peak_envelope(x, win_len, hop), ref_peak)
+    assert rms_envelope(x[:5], 10, 5).size == 0
+    for f in (frame_view, energy_envelope, rms_envelope, peak_envelope):
+        try:
+            f(np.zeros((1000, 2)), 64, 32)
+            raise AssertionError(f"{f.__name__} aceptó una señal estéreo")
+        except ValueError as e:
+            assert "1D" in str(e)
+
+    t0 = time.perf_counter()
+    ref = [np.sqrt(np.mean(x[i:i + 640].astype("float64") ** 2)) for i in range(0, x.size - 639, 320)]
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rms_envelope(x, 640, 320)
+    t_vec = time.perf_counter() - t0
+    print(f"RMS 3 s @ 32768 Hz: bucle {t_loop*1e3:.1f} ms | vectorizado {t_vec*1e3:.2f} ms")
+    print("OK")
@@ -31,19 +31,17 @@ Cada palabra tiene una "firma" de energías característica que permite distingu
 
 Funciones principales:
 - Entrenar: M grabaciones por cada comando, calcula energías por K segmentos
-- Guardar/cargar modelo (JSON) con patrones de energía por comando
+- Guardar/cargar modelo (binario .npz o JSON) con patrones de energía por comando
 - Reconocer: desde micrófono o archivo WAV
 - Visualizar: espectro y barras de energía por segmento
 - Reconocimiento en tiempo real con detección de silencio
 """
 
 import os
-import json
 import time
 from typing import List, Tuple, Dict
 import queue
 import threading
-from collections import deque
 
 import numpy as np
 import sounddevice as sd
@@ -53,7 +51,8 @@ from scipy.signal import get_window
 # Utils separadas
 from audio_utils import ensure_dir, record_fixed_length, load_and_prepare_wav, enumerate_input_devices, parse_device_index
 from dsp_utils import compute_subband_energies, compute_spectrum_mag, rms, dbfs_from_rms
-from model_utils import train_from_folder, load_model, decide_label_by_min_dist
+from model_utils import train_from_folder, load_model, save_model, decide_label_by_min_dist
+from rt_utils import SPSCRingBuffer, SlidingEnergy, UtteranceSegmenter, onset_frame
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -68,7 +67,7 @@ N = 4096           # tamaño FFT por defecto (potencia de 2)
 K = 3              # subbandas espectrales (SEGÚN ENUNCIADO: dividir en 3 subbandas)
 M = 56            # grabaciones por defecto (SEGÚN ENUNCIADO: mínimo 100 por comando)
 WINDOW = "hamming" # ventana por defecto
-MODEL_PATH = "lab5_model.json"
+MODEL_PATH = "lab5_model.npz"
 RECORDINGS_DIR = "recordings"  # carpeta para guardar grabaciones
 # ---------------------------
 
@@ -108,13 +107,11 @@ class Lab5GUI:
         # Ring buffer y reconocimiento RT
         self.ring_seconds = 5.0
         self.ring_chunk = 0.1  # s
-        self.ring_buf = deque(maxlen=int(self.ring_seconds / self.ring_chunk))
-        self.ring_lock = threading.Lock()
+        self.ring = SPSCRingBuffer(int(self.ring_seconds * FS))
+        self.rt_hop = int(self.ring_chunk * FS)  # el worker despierta cada rt_hop muestras nuevas
         self._thr = threading
         self.recognizer_thread = None
         self.recognizer_stop = threading.Event()
-        self.prev_rms = 0.0
-        self.noise_rms = 0.0
         self.pred_label_var = tk.StringVar(value='-')
         self.pred_dists_var = tk.StringVar(value='-')
         self.confidence_var = tk.StringVar(value='-')
@@ -411,18 +408,17 @@ class Lab5GUI:
         if self.model is None:
             messagebox.showwarning('Sin modelo', 'Entrene o cargue un modelo primero')
             return
-        path = filedialog.asksaveasfilename(title='Guardar modelo JSON', 
-                                           defaultextension='.json', 
-                                           filetypes=[('JSON','*.json')])
+        path = filedialog.asksaveasfilename(title='Guardar modelo', 
+                                           defaultextension='.npz', 
+                                           filetypes=[('Modelo binario','*.npz'), ('JSON','*.json')])
         if not path:
             return
-        with open(path, 'w') as f:
-            json.dump(self.model, f, indent=2)
+        save_model(self.model, path)
         self._log(f"Modelo guardado en {path}")
 
     def _load_model_dialog(self):
-        path = filedialog.askopenfilename(title='Cargar modelo JSON', 
-                                         filetypes=[('JSON','*.json')])
+        path = filedialog.askopenfilename(title='Cargar modelo', 
+                                         filetypes=[('Modelos','*.npz *.json'), ('Modelo binario','*.npz'), ('JSON','*.json')])
         if not path:
             return
         try:
@@ -591,6 +587,9 @@ class Lab5GUI:
         fs = int(self.fs_var.get())
         dev = parse_device_index(self.device_var.get())
         block = max(32, int(self.ring_chunk * fs))  # tamaño del chunk para ring (~100 ms)
+        self.ring = SPSCRingBuffer(int(self.ring_seconds * fs))
+        self.rt_hop = block
+        ring = self.ring
 
         def cb(indata, frames, time_info, status):
             if status:
@@ -599,12 +598,8 @@ class Lab5GUI:
             # RMS
             r = rms(x)
             self.latest_rms = r
-            # almacenar en buffer circular
-            try:
-                with (self.ring_lock or self._nullcontext()):
-                    self.ring_buf.append(x.copy())
-            except Exception:
-                pass
+            # almacenar en buffer circular (copia directa al arreglo preasignado, sin lock)
+            ring.write(x)
 
         try:
             self.in_stream = sd.InputStream(samplerate=fs, channels=1, callback=cb, 
@@ -655,8 +650,6 @@ class Lab5GUI:
         self.confidence_var.set('-')
         self.validation_var.set('-')
         self.recognizer_stop.clear()
-        self.prev_rms = 0.0
-        self.noise_rms = 0.0
         self.recognizer_thread = self._thr.Thread(target=self._rt_worker, daemon=True)
         self.recognizer_thread.start()
         self._log('Reconocimiento RT iniciado')
@@ -664,16 +657,10 @@ class Lab5GUI:
     def _stop_rt(self):
         if self.recognizer_thread and self.recognizer_thread.is_alive():
             self.recognizer_stop.set()
+            self.ring.wake()
             self.recognizer_thread.join(timeout=1.0)
         self._log('Reconocimiento RT detenido')
 
-    def _assemble_last(self, num_samples: int) -> np.ndarray:
-        with (self.ring_lock or self._nullcontext()):
-            if len(self.ring_buf) == 0:
-                return np.array([], dtype='float32')
-            arr = np.concatenate(list(self.ring_buf)) if len(self.ring_buf) > 1 else self.ring_buf[0].copy()
-        return arr[-num_samples:] if arr.size >= num_samples else arr
-
     def _rt_worker(self):
         fs = int(self.fs_var.get())
         N = int(self.N_var.get())
@@ -681,36 +668,39 @@ class Lab5GUI:
         window = self.window_var.get()
         frame_len = N  # muestras por frame
         
-        # pequeña fase de estabilización para baseline (~0.5s)
-        t0 = time.time()
-        while (time.time() - t0) < 0.5 and not self.recognizer_stop.is_set():
-            time.sleep(0.05)
-        
         last_pred_time = 0.0
+        ring = None
+        energy = SlidingEnergy(frame_len)
+        # detector de extremos: una clasificación por palabra completa (el piso de ruido se estima en ~0.5 s)
+        segmenter = UtteranceSegmenter(fs, min_rms=10 ** (self.silence_db_threshold / 20.0))
         
         while not self.recognizer_stop.is_set():
-            buf = self._assemble_last(frame_len)
-            if buf.size < frame_len:
-                time.sleep(0.05)
-                continue
-            
-            # energía (RMS) del frame actual
-            r = rms(buf)
-            db = dbfs_from_rms(r)
+            if ring is not self.ring:
+                # el medidor se reinició (p. ej. otro dispositivo o fs): empezar desde el presente
+                ring = self.ring
+                pos = ring.written
+                energy.reset()
+                segmenter.reset(pos)
             
-            # baseline con suavizado
-            if self.noise_rms == 0.0:
-                self.noise_rms = r
-            self.noise_rms = 0.95*self.noise_rms + 0.05*r
-            
-            # criterio de cambio: subida significativa vs baseline o vs prev
-            changed = (r > max(self.noise_rms*1.8, self.prev_rms*1.25))
-            self.prev_rms = 0.9*self.prev_rms + 0.1*r if self.prev_rms>0 else r
+            # despertar cuando el callback haya escrito un hop más (timeout solo para revisar la parada)
+            if not ring.wait_for(pos + self.rt_hop, timeout=0.25):
+                continue
             
+            # palabras completas cerradas por el segmentador con las muestras nuevas
+            new, written = ring.since(segmenter.next_pos)
             now = time.time()
+            for start, end, onset in segmenter.feed(new, written):
+                self._classify_utterance(ring.since(start)[0][:end - start], onset - start, fs, N, K, window)
+                last_pred_time = now
             
-            # Estado de silencio: dB muy bajos durante un tiempo
-            is_silence = (db < self.silence_db_threshold)
+            # energía (RMS) del frame actual, actualizada solo con las muestras nuevas
+            buf, pos, r = energy.slide(ring, pos)
+            if buf.size < frame_len:
+                continue
+            db = dbfs_from_rms(r)
+            
+            # Estado de silencio: dB muy bajos durante un tiempo (y ninguna palabra en curso)
+            is_silence = (db < self.silence_db_threshold) and not segmenter.in_speech
             
             if is_silence:
                 # Si estamos en silencio sostenido más allá del umbral, mostrar "Silencio".
@@ -723,39 +713,31 @@ class Lab5GUI:
                     self._update_plots(buf, fs, N, window, 
                                      np.linspace(0, fs/2, N//2+1), 
                                      np.zeros(K), '', mode="silence")
-                else:
-                    # Silencio reciente: deja el label en blanco
+                elif (now - last_pred_time) > self.silence_min_time:
+                    # Silencio reciente: deja el label en blanco (sin borrar una predicción recién emitida)
                     self.pred_label_var.set('')
                     self.pred_dists_var.set('')
                     self.confidence_var.set('')
                     self.validation_var.set('')
-                time.sleep(0.05)
-                continue
             else:
                 # actividad detectada
                 self.last_activity_time = now
-            
-            if changed and (now - last_pred_time) > 0.25:  # evitar exceso de triggers
-                try:
-                    Es, bands, freqs = compute_subband_energies(buf, fs, N, K, window)
-                    label, dists = decide_label_by_min_dist(Es, self.model, x_raw=buf)
-                    self.pred_label_var.set(label)
-                    self.pred_dists_var.set(str({k:f"{v:.2f}" for k,v in dists.items()}))
-                    self._update_confidence_display(label, dists)
-                    self._log(f"RT: {label}  {dists}")
-                    self._update_plots(buf, fs, N, window, freqs, Es, label)
-                    last_pred_time = now
-                except Exception as e:
-                    self._log(f"Error RT: {e}")
-            
-            time.sleep(0.05)
-
-    # nullcontext helper (for optional locks)
-    class _nullcontext:
-        def __enter__(self):
-            return None
-        def __exit__(self, exc_type, exc, tb):
-            return False
+
+    def _classify_utterance(self, x_utt: np.ndarray, onset: int, fs: int, N: int, K: int, window: str):
+        # Como en un WAV: energías de N muestras que contienen el comienzo de la
+        # palabra (a lo sumo N/2 antes del ataque, el pre-roll puede ser más
+        # largo que N) y perfil de la palabra completa con su pre-roll
+        x = onset_frame(x_utt, onset, N)
+        try:
+            Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
+            label, dists = decide_label_by_min_dist(Es, self.model, x_raw=x_utt)
+            self.pred_label_var.set(label)
+            self.pred_dists_var.set(str({k:f"{v:.2f}" for k,v in dists.items()}))
+            self._update_confidence_display(label, dists)
+            self._log(f"RT: {label}  {dists}  ({x_utt.size/fs:.2f} s)")
+            self._update_plots(x, fs, N, window, freqs, Es, label)
+        except Exception as e:
+            self._log(f"Error RT: {e}")
 
 
 if __name__ == "__main__":
@@ -21,39 +21,37 @@ Adaptado para soportar 3 comandos de voz.
 
 import os
 import json
-from typing import Dict, Tuple
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 import numpy as np
 import soundfile as sf
 
-from audio_utils import load_and_prepare_wav
 from dsp_utils import compute_subband_energies
+from dtw_utils import LBKeoghIndex, dtw_distance
+from framing import rms_envelope
+
+FEATURE_CACHE_DIR = ".feature_cache"
+PROFILE_SAMPLES = 50
+KNN_K = 5
 
 
 # ========== Funciones auxiliares de optimización ==========
 
 def _compute_adaptive_distance(s1, s2):
-    """Cálculo de distancia con alineación adaptativa"""
-    n, m = len(s1), len(s2)
-    cost_matrix = np.full((n + 1, m + 1), np.inf)
-    cost_matrix[0, 0] = 0
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            diff = abs(s1[i-1] - s2[j-1])
-            cost_matrix[i, j] = diff + min(cost_matrix[i-1, j], 
-                                           cost_matrix[i, j-1], 
-                                           cost_matrix[i-1, j-1])
-    return cost_matrix[n, m] / (n + m)
+    """Cálculo de distancia con alineación adaptativa (DTW, ver dtw_utils)"""
+    return dtw_distance(s1, s2)
 
 
 def _extract_temporal_profile(x, n_samples=50):
     """Extrae perfil temporal de energía para normalización"""
+    x = np.asarray(x)
+    if x.ndim > 1:
+        # Multicanal: la energía de cada instante es la media entre canales
+        x = np.sqrt(np.mean(np.square(x), axis=1))
     seg_size = max(1, len(x) // n_samples)
-    profile = []
-    for i in range(0, len(x) - seg_size, seg_size):
-        segment = x[i:i + seg_size]
-        rms = np.sqrt(np.mean(segment ** 2))
-        profile.append(rms)
-    profile = np.array(profile)
+    # Segmentos contiguos que terminan antes de la última muestra (ver framing)
+    profile = rms_envelope(x[:len(x) - 1], seg_size, seg_size)
     if len(profile) > n_samples:
         profile = profile[:n_samples]
     elif len(profile) < n_samples:
@@ -61,7 +59,102 @@ def _extract_temporal_profile(x, n_samples=50):
     return profile
 
 
-def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int, window: str, recordings_dir: str, model_path: str = "lab5_model.json") -> dict:
+# ========== Extracción de características (paralela y con caché en disco) ==========
+
+def _feature_cache_path(cache_dir: str, wpath: str, params: tuple) -> str:
+    """Ruta de caché: clave = ruta absoluta + mtime + tamaño + parámetros de extracción."""
+    st = os.stat(wpath)
+    key = repr((os.path.abspath(wpath), st.st_mtime_ns, st.st_size, params))
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npz")
+
+
+def _extract_file_features(wpath: str, fs: int, N: int, K: int, window: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Decodifica el WAV una sola vez y calcula energías E[K] y perfil temporal."""
+    x_full, _ = sf.read(wpath)
+    return _signal_features(x_full, fs, N, K, window)
+
+
+def _signal_features(x_full: np.ndarray, fs: int, N: int, K: int, window: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Energías E[K] de las primeras N muestras y perfil temporal de la señal completa."""
+    if x_full.ndim > 1:
+        x_full = x_full.mean(axis=1)
+    # Misma preparación que load_and_prepare_wav (float32, recorte/relleno a N)
+    x = x_full.astype(np.float32)[:N]
+    if x.size < N:
+        x = np.pad(x, (0, N - x.size))
+    Es, _, _ = compute_subband_energies(x, fs, N, K, window)
+    return Es, _extract_temporal_profile(x_full, n_samples=PROFILE_SAMPLES)
+
+
+def extract_features(wpaths: List[str], fs: int, N: int, K: int, window: str, workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (E[K], perfil temporal) para cada WAV, en el mismo orden. Lo que ya está
+    en la caché (mismo archivo, mtime y parámetros) no se vuelve a procesar;
+    el resto se reparte en un pool de procesos. workers=1 o cache_dir=None
+    permiten forzar el modo secuencial / sin caché.
+    """
+    params = (fs, N, K, window, PROFILE_SAMPLES)
+    results: List = [None] * len(wpaths)
+    pending = []
+    for i, wpath in enumerate(wpaths):
+        if cache_dir is not None:
+            cpath = _feature_cache_path(cache_dir, wpath, params)
+            if os.path.exists(cpath):
+                with np.load(cpath) as data:
+                    results[i] = (data["Es"], data["profile"])
+                continue
+        pending.append(i)
+
+    if pending:
+        args = [(wpaths[i], fs, N, K, window) for i in pending]
+        if workers == 1 or len(pending) < 4:
+            computed = [_extract_file_features(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(_extract_file_features, *zip(*args), chunksize=8))
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        for i, (Es, profile) in zip(pending, computed):
+            results[i] = (Es, profile)
+            if cache_dir is not None:
+                np.savez(_feature_cache_path(cache_dir, wpaths[i], params), Es=Es, profile=profile)
+    return results
+
+
+def reference_indices(n: int, max_refs: int = 25) -> np.ndarray:
+    """Índices (equiespaciados) de los patrones de referencia DTW entre n grabaciones."""
+    return np.linspace(0, n - 1, min(max_refs, n), dtype=int)
+
+
+def model_from_features(fs: int, N: int, K: int, window: str, features: Dict[str, Tuple[np.ndarray, list]]) -> dict:
+    """
+    Modelo a partir de características ya extraídas: features es
+    {label: (Es (M, K), perfiles de referencia)}. No lee audio ni escribe
+    en disco, así que sirve igual para entrenar que para cada fold de CV.
+    """
+    model = {
+        "fs": fs,
+        "N": N,
+        "K": K,
+        "window": window,
+        "commands": {},
+        "_ref_patterns": {}  # Patrones de referencia para optimización
+    }
+    for label, (Es_all, ref_profiles) in features.items():
+        Es_all = np.atleast_2d(np.asarray(Es_all, dtype=float))
+        model["commands"][label] = {
+            "mean": Es_all.mean(axis=0).tolist(),
+            "std": Es_all.std(axis=0).tolist(),
+            "count": int(Es_all.shape[0])
+        }
+        model["_ref_patterns"][label] = [np.asarray(p).tolist() for p in ref_profiles]
+    
+    # Envolventes LB_Keogh de los patrones para podar la búsqueda kNN
+    model["_ref_index"] = LBKeoghIndex.from_ref_patterns(model["_ref_patterns"]).to_dict()
+    return model
+
+
+def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int, window: str, recordings_dir: str, model_path: str = "lab5_model.npz", workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR) -> dict:
     """
     Entrena un modelo a partir de grabaciones en carpetas.
     
@@ -74,19 +167,13 @@ def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int,
         window: Tipo de ventana
         recordings_dir: Directorio base de grabaciones
         model_path: Ruta donde guardar el modelo
+        workers: Procesos para la extracción (None = núcleos disponibles, 1 = secuencial)
+        cache_dir: Carpeta de caché de características (None = sin caché)
     
     Returns:
         Diccionario del modelo entrenado
     """
-    model = {
-        "fs": fs,
-        "N": N,
-        "K": K,
-        "window": window,
-        "commands": {},
-        "_ref_patterns": {}  # Patrones de referencia para optimización
-    }
-    
+    features = {}
     for label, subdir in commands.items():
         folder = os.path.join(recordings_dir, subdir)
         if not os.path.exists(folder):
@@ -96,47 +183,165 @@ def train_from_folder(commands: Dict[str, str], fs: int, N: int, K: int, M: int,
         if len(wavs) < M:
             raise RuntimeError(f"Para '{label}' se requieren al menos M={M} wavs en {folder}. Encontradas: {len(wavs)}")
         
-        Es_all = []
-        ref_patterns = []  # Patrones de referencia para optimización
-        
         # Seleccionar subconjunto representativo
-        max_refs = min(25, len(wavs))
-        ref_indices = np.linspace(0, len(wavs)-1, max_refs, dtype=int)
-        
-        for idx, wpath in enumerate(wavs[:M]):
-            x = load_and_prepare_wav(wpath, N)
-            Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
-            Es_all.append(Es)
-            
-            # Almacenar patrones de referencia
-            if idx in ref_indices:
-                x_full, _ = sf.read(wpath)
-                if x_full.ndim > 1:
-                    x_full = x_full.mean(axis=1)
-                temporal_prof = _extract_temporal_profile(x_full, n_samples=50)
-                ref_patterns.append(temporal_prof.tolist())
+        ref_indices = reference_indices(len(wavs))
         
-        Es_all = np.vstack(Es_all)
-        E_mean = Es_all.mean(axis=0).tolist()
-        E_std = Es_all.std(axis=0).tolist()
-        model["commands"][label] = {
-            "mean": E_mean, 
-            "std": E_std, 
-            "count": int(Es_all.shape[0])
-        }
-        model["_ref_patterns"][label] = ref_patterns
-        print(f"Entrenado '{label}': mean={E_mean}, std={E_std}")
+        # Cada archivo se decodifica una sola vez (energías + perfil temporal)
+        feats = extract_features(wavs[:M], fs, N, K, window, workers=workers, cache_dir=cache_dir)
+        Es_all = np.vstack([Es for Es, _ in feats])
+        ref_profiles = [profile for idx, (_, profile) in enumerate(feats) if idx in ref_indices]
+        features[label] = (Es_all, ref_profiles)
     
-    with open(model_path, "w") as f:
-        json.dump(model, f, indent=2)
+    model = model_from_features(fs, N, K, window, features)
+    for label, info in model["commands"].items():
+        print(f"Entrenado '{label}': mean={info['mean']}, std={info['std']}")
+    
+    save_model(model, model_path)
     print(f"Modelo guardado en {model_path}")
     return model
 
 
+# ========== Formato de modelo (binario .npz, JSON como importación/exportación) ==========
+
+MODEL_FORMAT = "lab5-model"
+MODEL_FORMAT_VERSION = 1
+
+
+def _json_default(obj):
+    """Arreglos y escalares NumPy (modelos cargados del formato binario) a tipos JSON."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} no es serializable a JSON")
+
+
+def save_model(model: dict, path: str) -> None:
+    """
+    Guarda el modelo según la extensión: .npz es el formato binario
+    versionado (medias, desviaciones y patrones como arreglos contiguos);
+    cualquier otra extensión exporta el JSON de siempre.
+    """
+    if not path.lower().endswith(".npz"):
+        with open(path, "w") as f:
+            json.dump(model, f, indent=2, default=_json_default)
+        return
+
+    prepared = prepare_model(model)
+    index = prepared.index
+    meta = {
+        "format": MODEL_FORMAT,
+        "version": MODEL_FORMAT_VERSION,
+        "fs": int(model["fs"]),
+        "N": int(model["N"]),
+        "K": int(model["K"]),
+        "window": model["window"],
+        "labels": prepared.labels,
+        "counts": [int(model["commands"][l].get("count", 0)) for l in prepared.labels],
+        "has_refs": index is not None,
+        "band": None if index is None else index.band,
+    }
+    arrays = {"meta": np.array(json.dumps(meta)), "means": prepared.means, "stds": prepared.stds}
+    if index is not None:
+        arrays["ref_label"] = np.array([prepared.labels.index(l) for l in index.labels], dtype=np.int32)
+        arrays["ref_patterns"] = index.patterns
+        arrays["ref_upper"] = index.upper
+        arrays["ref_lower"] = index.lower
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def _load_model_npz(path: str) -> dict:
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("format") != MODEL_FORMAT:
+            raise RuntimeError(f"{path} no es un modelo del lab5")
+        if meta["version"] > MODEL_FORMAT_VERSION:
+            raise RuntimeError(f"{path} usa la versión {meta['version']} del formato (se soporta hasta {MODEL_FORMAT_VERSION})")
+        means, stds = data["means"], data["stds"]
+        model = {"fs": meta["fs"], "N": meta["N"], "K": meta["K"], "window": meta["window"], "commands": {}}
+        for i, label in enumerate(meta["labels"]):
+            model["commands"][label] = {"mean": means[i], "std": stds[i], "count": meta["counts"][i]}
+        if meta["has_refs"]:
+            ref_label, patterns = data["ref_label"], data["ref_patterns"]
+            model["_ref_patterns"] = {label: patterns[ref_label == i] for i, label in enumerate(meta["labels"])}
+            model["_ref_index"] = {"band": meta["band"], "upper": data["ref_upper"], "lower": data["ref_lower"]}
+    return model
+
+
 def load_model(path: str) -> dict:
-    """Carga un modelo desde un archivo JSON."""
-    with open(path, "r") as f:
-        return json.load(f)
+    """
+    Carga un modelo binario (.npz) o JSON (se detecta por el contenido) y deja
+    su clasificador preparado en caché. Si se pide un .npz que no existe pero
+    sí su .json hermano (modelos anteriores al formato binario), se importa ese.
+    """
+    if path.lower().endswith(".npz") and not os.path.exists(path):
+        legacy = path[:-4] + ".json"
+        if os.path.exists(legacy):
+            path = legacy
+    with open(path, "rb") as f:
+        is_npz = f.read(4) == b"PK\x03\x04"
+    if is_npz:
+        model = _load_model_npz(path)
+    else:
+        with open(path, "r") as f:
+            model = json.load(f)
+    prepare_model(model)
+    return model
+
+
+def load_classifier(path: str) -> "PreparedModel":
+    """Carga un modelo y devuelve directamente su clasificador preparado."""
+    return prepare_model(load_model(path))
+
+
+class PreparedModel:
+    """
+    Clasificador listo para usar: medias y desviaciones (C, K) y el índice
+    LB_Keogh de los patrones de referencia, armados una sola vez por modelo
+    en lugar de reconstruir los arreglos en cada predicción.
+    """
+
+    def __init__(self, model: dict):
+        self.model = model
+        self.labels = list(model["commands"].keys())
+        self.means = np.ascontiguousarray([model["commands"][l]["mean"] for l in self.labels], dtype=float)
+        self.stds = np.ascontiguousarray([model["commands"][l]["std"] for l in self.labels], dtype=float)
+        self._scale = self.stds + 1e-6  # Evitar división por cero
+        refs = model.get("_ref_patterns")
+        self.index = None
+        if refs is not None and len(refs) > 0:
+            if "_ref_index" in model:
+                self.index = LBKeoghIndex.from_dict(model["_ref_index"], refs)
+            else:
+                # Modelos anteriores al índice: envolventes calculadas al vuelo
+                self.index = LBKeoghIndex.from_ref_patterns(refs)
+
+    def distances(self, E: np.ndarray) -> np.ndarray:
+        """Distancia normalizada de cada fila de E (F, K) a cada comando: (F, C)."""
+        Z = (np.atleast_2d(E)[:, None, :] - self.means[None, :, :]) / self._scale[None, :, :]
+        return np.sqrt(np.einsum("fck,fck->fc", Z, Z))
+
+    def decide(self, E: np.ndarray, x_raw: np.ndarray = None) -> Tuple[str, dict]:
+        """Equivalente a decide_label_by_min_dist(E, modelo, x_raw)."""
+        return decide_label_by_min_dist(E, self.model, x_raw)
+
+
+_PREPARED_CACHE: Dict[int, tuple] = {}
+
+
+def prepare_model(model) -> PreparedModel:
+    """Clasificador preparado del modelo (cacheado por objeto; tratar el modelo como de solo lectura)."""
+    if isinstance(model, PreparedModel):
+        return model
+    entry = _PREPARED_CACHE.get(id(model))
+    if entry is not None and entry[0] is model:
+        return entry[1]
+    prepared = PreparedModel(model)
+    if len(_PREPARED_CACHE) >= 8:
+        _PREPARED_CACHE.pop(next(iter(_PREPARED_CACHE)))
+    _PREPARED_CACHE[id(model)] = (model, prepared)
+    return prepared
 
 
 def decide_label_by_min_dist(E: np.ndarray, model: dict, x_raw: np.ndarray = None) -> Tuple[str, dict]:
@@ -165,55 +370,51 @@ def decide_label_by_min_dist(E: np.ndarray, model: dict, x_raw: np.ndarray = Non
         (label_predicho, diccionario_de_distancias)
     """
     # Método 1: Distancia normalizada por desviación estándar (según enunciado)
-    dists_normalized = {}
-    dists_euclidean = {}
+    prepared = prepare_model(model)
+    D = prepared.distances(np.asarray(E, dtype=float)[None, :])
+    dists = {label: float(d) for label, d in zip(prepared.labels, D[0])}
     
-    for label, info in model["commands"].items():
-        mean = np.array(info["mean"], dtype=float)
-        std = np.array(info["std"], dtype=float)
-        
-        # Distancia euclidiana simple (para comparación)
-        d_euclidean = np.linalg.norm(E - mean)
-        dists_euclidean[label] = float(d_euclidean)
-        
-        # Distancia normalizada por desviación (considera variabilidad)
-        # Penaliza más las diferencias en subbandas estables
-        epsilon = 1e-6  # Evitar división por cero
-        normalized_diff = (E - mean) / (std + epsilon)
-        d_normalized = np.linalg.norm(normalized_diff)
-        dists_normalized[label] = float(d_normalized)
+    # Optimización: si hay señal original, aplicar refinamiento adaptativo
+    query_profile = None
+    if x_raw is not None and prepared.index is not None:
+        query_profile = _extract_temporal_profile(x_raw, n_samples=PROFILE_SAMPLES)
+    return _refine_with_profile(dists, model, query_profile)
+
+
+def normalized_distances(E: np.ndarray, model: dict) -> Tuple[List[str], np.ndarray]:
+    """
+    Distancia normalizada por desviación (Mahalanobis diagonal) de cada fila
+    de E (F, K) a cada comando, en una sola operación: devuelve (etiquetas, D (F, C)).
+    d = √(Σ((E_i - media_i) / (std_i + epsilon))²)
+    """
+    prepared = prepare_model(model)
+    return prepared.labels, prepared.distances(E)
+
+
+def knn_vote(index: LBKeoghIndex, query_profile: np.ndarray, k: int = KNN_K) -> Tuple[str, dict]:
+    """(etiqueta más votada entre los k vecinos DTW, distancia al patrón más cercano de cada etiqueta)."""
+    # k vecinos exactos; la cota LB_Keogh evita la DTW completa en la mayoría de patrones
+    k_nearest, nearest_by_label, _ = index.search(query_profile, k=k)
     
-    # Usar distancia normalizada como método principal
-    dists = dists_normalized
+    # Voting con k vecinos más cercanos
+    votes = {}
+    for lbl, _ in k_nearest:
+        votes[lbl] = votes.get(lbl, 0) + 1
     
-    # Optimización: si hay señal original, aplicar refinamiento adaptativo
-    if x_raw is not None and "_ref_patterns" in model and len(model["_ref_patterns"]) > 0:
-        query_profile = _extract_temporal_profile(x_raw, n_samples=50)
-        
-        # Calcular distancias adaptativas a patrones de referencia (k=5)
-        adaptive_dists = []
-        for label, ref_patterns in model["_ref_patterns"].items():
-            for pattern in ref_patterns:
-                pattern_arr = np.array(pattern)
-                dist = _compute_adaptive_distance(query_profile, pattern_arr)
-                adaptive_dists.append((label, dist))
-        
-        # Voting con k vecinos más cercanos
-        k = 5
-        adaptive_dists.sort(key=lambda x: x[1])
-        k_nearest = adaptive_dists[:k]
-        votes = {}
-        for lbl, _ in k_nearest:
-            votes[lbl] = votes.get(lbl, 0) + 1
-        
-        # Etiqueta con más votos
-        best = max(votes.items(), key=lambda x: x[1])[0]
+    # Etiqueta con más votos
+    best = max(votes.items(), key=lambda x: x[1])[0]
+    return best, nearest_by_label
+
+
+def _refine_with_profile(dists: dict, model: dict, query_profile: np.ndarray | None) -> Tuple[str, dict]:
+    """Refinamiento DTW-kNN sobre el perfil temporal (si lo hay); sin perfil decide la distancia FFT."""
+    if query_profile is not None:
+        best, nearest_by_label = knn_vote(prepare_model(model).index, query_profile)
         
-        # Actualizar distancias para consistencia con resultado
+        # Actualizar distancias para consistencia con resultado (patrón más cercano de cada comando)
         avg_adaptive = {}
         for label in model["commands"].keys():
-            label_dists = [d for l, d in adaptive_dists if l == label]
-            avg_adaptive[label] = np.mean(label_dists) if label_dists else 1000.0
+            avg_adaptive[label] = nearest_by_label.get(label, 1000.0)
         
         # Escalar para mantener rango similar a distancias FFT
         scale_factor = max(dists.values()) / max(avg_adaptive.values()) if max(avg_adaptive.values()) > 0 else 1.0
@@ -224,3 +425,75 @@ def decide_label_by_min_dist(E: np.ndarray, model: dict, x_raw: np.ndarray = Non
         best = min(dists.items(), key=lambda kv: kv[1])[0]
     
     return best, dists
+
+
+# ========== Clasificación por lotes ==========
+
+def _batch_item_features(item, fs: int, N: int, K: int, window: str, cache_dir: str | None) -> tuple:
+    """(Es, perfil, error) de una ruta WAV o de una señal ya decodificada (a fs del modelo)."""
+    try:
+        if isinstance(item, (str, os.PathLike)):
+            if cache_dir is not None:
+                params = (fs, N, K, window, PROFILE_SAMPLES)
+                cpath = _feature_cache_path(cache_dir, item, params)
+                if os.path.exists(cpath):
+                    with np.load(cpath) as data:
+                        return data["Es"], data["profile"], None
+                Es, profile = _extract_file_features(item, fs, N, K, window)
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(cpath, Es=Es, profile=profile)
+                return Es, profile, None
+            Es, profile = _extract_file_features(item, fs, N, K, window)
+        else:
+            Es, profile = _signal_features(np.asarray(item), fs, N, K, window)
+        return Es, profile, None
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+def iter_classify_batch(items, model: dict, workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR, chunk_size: int = 64):
+    """
+    Generador de resultados (en el orden de `items`, rutas WAV o señales)
+    por lotes de chunk_size: la extracción (una decodificación por archivo)
+    se reparte en un pool de procesos, las energías del lote se apilan en
+    una matriz y las distancias a todos los comandos salen de una sola
+    operación vectorizada. Cada resultado es un dict JSON-serializable:
+    {"index", "path", "label", "distances"} o {"index", "path", "error"}.
+    """
+    items = list(items)
+    fs, N, K, window = model["fs"], model["N"], model["K"], model["window"]
+    use_profile = prepare_model(model).index is not None
+    args = (fs, N, K, window, cache_dir)
+
+    pool = None
+    if workers != 1 and len(items) >= 4:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if pool is not None:
+            feats = pool.map(_batch_item_features, items, *[[a] * len(items) for a in args], chunksize=8)
+        else:
+            feats = (_batch_item_features(item, *args) for item in items)
+
+        for c0 in range(0, len(items), chunk_size):
+            chunk = [next(feats) for _ in range(min(chunk_size, len(items) - c0))]
+            ok = [j for j, (Es, _, err) in enumerate(chunk) if err is None]
+            D = normalized_distances(np.vstack([chunk[j][0] for j in ok]), model)[1] if ok else None
+            labels = list(model["commands"].keys())
+            row = {j: r for r, j in enumerate(ok)}
+            for j, (Es, profile, err) in enumerate(chunk):
+                i = c0 + j
+                path = items[i] if isinstance(items[i], (str, os.PathLike)) else None
+                if err is not None:
+                    yield {"index": i, "path": path, "error": err}
+                    continue
+                dists = {label: float(d) for label, d in zip(labels, D[row[j]])}
+                label, dists = _refine_with_profile(dists, model, profile if use_profile else None)
+                yield {"index": i, "path": path, "label": label, "distances": dists}
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def classify_batch(items, model: dict, workers: int | None = None, cache_dir: str | None = FEATURE_CACHE_DIR) -> List[dict]:
+    """Clasifica una lista de rutas WAV o señales; ver iter_classify_batch."""
+    return list(iter_classify_batch(items, model, workers=workers, cache_dir=cache_dir))
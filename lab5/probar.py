@@ -2,14 +2,11 @@
 Script de prueba rápida del sistema de reconocimiento
 """
 
-import soundfile as sf
-import numpy as np
-from model_utils import load_model, decide_label_by_min_dist
-from dsp_utils import compute_subband_energies
+from model_utils import load_model, classify_batch
 
 # Cargar modelo
 print("Cargando modelo...")
-model = load_model("lab5_model.json")
+model = load_model("lab5_model.npz")
 
 fs = model['fs']
 N = model['N']
@@ -33,26 +30,14 @@ print("="*70)
 correct = 0
 total = 0
 
-for filepath, expected in test_files:
+# Una sola llamada por lotes (energías FFT + perfil temporal, una decodificación por archivo)
+batch = classify_batch([filepath for filepath, _ in test_files], model)
+
+for (filepath, expected), r in zip(test_files, batch):
     try:
-        # Cargar audio
-        x, fs_file = sf.read(filepath)
-        if x.ndim > 1:
-            x = x.mean(axis=1)
-        
-        x_orig = x.copy()
-        
-        # Preparar ventana
-        if len(x) < N:
-            x = np.pad(x, (0, N - len(x)), mode='constant')
-        else:
-            x = x[:N]
-        
-        # Extraer características FFT
-        Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
-        
-        # Reconocer (usa DTW internamente)
-        label, dists = decide_label_by_min_dist(Es, model, x_raw=x_orig)
+        if "error" in r:
+            raise RuntimeError(r["error"])
+        label, dists = r["label"], r["distances"]
         
         # Resultados
         is_correct = (label == expected)
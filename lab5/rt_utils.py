@@ -0,0 +1,381 @@
+"""
+Utilidades de tiempo real: buffer circular preasignado entre el callback
+de audio (productor) y el hilo de reconocimiento (consumidor), con aviso
+por salto (hop) al consumidor, energía deslizante incremental y un
+segmentador de locuciones (detector de extremos) en streaming.
+"""
+
+import threading
+
+import numpy as np
+
+from framing import activity_threshold, energy_envelope, noise_floor, rms_envelope
+
+
+def _energy(x: np.ndarray) -> float:
+    """Suma de cuadrados en float64 (aunque x sea float32)."""
+    return float(energy_envelope(x, x.shape[0], x.shape[0])[0]) if x.shape[0] else 0.0
+
+
+class SPSCRingBuffer:
+    """
+    Buffer circular float32 de capacidad fija para un solo productor y un
+    solo consumidor, sin locks.
+
+    El productor copia las muestras al arreglo y solo después publica el
+    nuevo total `written` (una asignación de entero, atómica bajo el GIL);
+    el consumidor lee `written` una vez y nunca ve muestras a medio
+    escribir. latest() devuelve una vista de solo lectura cuando la ventana
+    es contigua y, si da la vuelta, una única copia en un arreglo auxiliar
+    del consumidor que se reutiliza entre llamadas. La vista es válida
+    mientras el productor no escriba otras capacity - n muestras.
+
+    wait_for() duerme al consumidor hasta que el total escrito alcanza un
+    objetivo (p. ej. la posición anterior + hop): el productor solo hace
+    Event.set() cuando se cruza ese objetivo, una vez por bloque como mucho.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._scratch = np.zeros(0, dtype=dtype)
+        self.written = 0  # total de muestras escritas (solo lo modifica el productor)
+        self._wake_at = 0
+        self._ready = threading.Event()
+
+    # ---- productor (callback de audio) ----
+    def write(self, x: np.ndarray) -> None:
+        x = np.asarray(x)
+        n = x.shape[0]
+        cap = self.capacity
+        w = self.written
+        if n > cap:
+            x = x[n - cap:]
+        m = x.shape[0]
+        i = (w + n - m) % cap
+        n1 = min(m, cap - i)
+        self._data[i:i + n1] = x[:n1]
+        self._data[:m - n1] = x[n1:]
+        self.written = w + n
+        if self.written >= self._wake_at:
+            self._ready.set()
+
+    # ---- consumidor (hilo de reconocimiento) ----
+    def latest(self, n: int) -> np.ndarray:
+        """Últimas min(n, disponibles) muestras, en orden."""
+        return self.since(self.written - int(n))[0]
+
+    def since(self, start: int) -> tuple:
+        """Muestras desde el índice absoluto `start` (acotado a la capacidad): (bloque, written)."""
+        w = self.written
+        n = max(0, min(w - int(start), w, self.capacity))
+        end = w % self.capacity or (self.capacity if w else 0)
+        if n <= end:
+            out = self._data[end - n:end]
+        else:
+            if self._scratch.size != n:
+                self._scratch = np.zeros(n, dtype=self._data.dtype)
+            head = n - end
+            self._scratch[:head] = self._data[self.capacity - head:]
+            self._scratch[head:] = self._data[:end]
+            out = self._scratch
+        out = out.view()
+        out.flags.writeable = False
+        return out, w
+
+    def wait_for(self, target: int, timeout: float | None = None) -> bool:
+        """Espera hasta que written >= target; False si vence el timeout (o si se llamó wake())."""
+        self._wake_at = int(target)
+        self._ready.clear()
+        if self.written >= target:
+            return True
+        self._ready.wait(timeout)
+        return self.written >= target
+
+    def wake(self) -> None:
+        """Despierta al consumidor (p. ej. para que revise su bandera de parada)."""
+        self._ready.set()
+
+    def reset(self) -> None:
+        """Solo con el productor detenido."""
+        self.written = 0
+
+
+class SlidingEnergy:
+    """
+    Energía (suma de cuadrados) de las últimas `window` muestras,
+    actualizada solo con las que entran y salen de la ventana. Cada
+    `resync_every` actualizaciones se recalcula exacta para no acumular
+    error de redondeo.
+    """
+
+    def __init__(self, window: int, resync_every: int = 64):
+        self.window = int(window)
+        self.resync_every = int(resync_every)
+        self.reset()
+
+    def reset(self) -> None:
+        """La próxima actualización recalcula la energía de la ventana completa."""
+        self.energy = 0.0
+        self.count = 0
+        self._updates = self.resync_every - 1
+
+    def update(self, entering: np.ndarray, leaving: np.ndarray, current: np.ndarray) -> float:
+        """`current` es la ventana ya desplazada (solo se lee al resincronizar). Devuelve el RMS."""
+        self._updates += 1
+        if self._updates >= self.resync_every:
+            self.energy = _energy(current)
+            self._updates = 0
+        else:
+            self.energy += _energy(entering) - _energy(leaving)
+            self.energy = max(self.energy, 0.0)
+        self.count = current.shape[0]
+        return self.rms()
+
+    def slide(self, ring: SPSCRingBuffer, pos: int) -> tuple:
+        """
+        Lee de `ring` la ventana que termina en el total escrito actual y
+        actualiza la energía con las muestras nuevas desde `pos` (índice
+        absoluto de la lectura anterior). Devuelve (ventana, written, rms).
+        """
+        lo_old = max(0, pos - self.window)
+        span, w = ring.since(lo_old)
+        start = w - span.shape[0]
+        lo_new = max(start, w - self.window)
+        current = span[lo_new - start:]
+        if start > lo_old or lo_new > pos:
+            # Llegaron más muestras que la ventana (o el buffer dio la vuelta): cálculo exacto
+            self.reset()
+            return current, w, self.update(current, current[:0], current)
+        return current, w, self.update(span[pos - start:], span[:lo_new - start], current)
+
+    def rms(self) -> float:
+        # Misma forma que dsp_utils.rms
+        return float(np.sqrt(self.energy / max(1, self.count) + 1e-12))
+
+
+class UtteranceSegmenter:
+    """
+    Detector de extremos en streaming: recibe los bloques del micrófono en
+    orden y devuelve los intervalos absolutos [inicio, fin) de cada palabra
+    completa junto con su ataque (inicio sin el pre-roll), una sola vez por
+    palabra.
+
+    La actividad se decide por marcos (frame_ms / hop_ms) con el mismo
+    criterio que normalize.detect_active_region: RMS del marco por encima
+    de thresh_factor veces el piso de ruido (mediana del 20% más bajo),
+    aquí sobre los últimos history_s segundos de marcos. Además el marco
+    debe superar min_rms (silencio absoluto del medidor).
+
+    - onset_frames marcos activos seguidos abren la palabra; el inicio se
+      adelanta preroll_ms para no perder el ataque.
+    - La palabra se cierra tras hangover_ms sin actividad; el fin es el
+      último marco activo + preroll_ms (sin pasar del presente).
+    - Palabras más cortas que min_ms se descartan; las que llegan a max_ms
+      se emiten tal cual.
+
+    Solo guarda índices: las muestras se leen del buffer circular.
+    """
+
+    def __init__(self, fs: int, frame_ms: float = 20, hop_ms: float = 10, thresh_factor: float = 3.0,
+                 history_s: float = 3.0, min_rms: float = 0.0, onset_frames: int = 2,
+                 hangover_ms: float = 400, preroll_ms: float = 150, min_ms: float = 120, max_ms: float = 2000):
+        self.fs = int(fs)
+        self.win = max(1, int(self.fs * frame_ms / 1000))
+        self.hop = max(1, int(self.fs * hop_ms / 1000))
+        self.thresh_factor = float(thresh_factor)
+        self.min_rms = float(min_rms)
+        self.onset_frames = max(1, int(onset_frames))
+        self.hangover_frames = max(1, int(round(hangover_ms / hop_ms)))
+        self.preroll = int(self.fs * preroll_ms / 1000)
+        self.min_len = int(self.fs * min_ms / 1000)
+        self.max_len = int(self.fs * max_ms / 1000)
+        self._history = np.zeros(max(5, int(history_s * 1000 / hop_ms)))
+        self._warmup = max(5, int(500 / hop_ms))  # marcos antes de confiar en el piso (~0.5 s)
+        self.reset()
+
+    def reset(self, pos: int = 0) -> None:
+        """Reinicia el estado; `pos` es el índice absoluto de la próxima muestra."""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._next = int(pos)           # índice absoluto de la próxima muestra esperada
+        self._frames = 0                # marcos procesados (historial)
+        self._run = 0                   # marcos activos seguidos (en reposo)
+        self._silent = 0                # marcos inactivos seguidos (en palabra)
+        self._start = None              # inicio de la palabra en curso
+        self._onset = None              # ataque de la palabra en curso (sin pre-roll)
+        self._last_active_end = 0
+        self.noise = 0.0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._start is not None
+
+    @property
+    def next_pos(self) -> int:
+        """Índice absoluto de la próxima muestra que espera feed()."""
+        return self._next
+
+    def feed(self, x: np.ndarray, end_pos: int) -> list:
+        """Procesa las muestras x que terminan en el índice absoluto end_pos; devuelve [(inicio, fin, ataque), ...]."""
+        x = np.asarray(x)
+        if end_pos - x.shape[0] != self._next:
+            # Hueco en el flujo (el consumidor se atrasó más que su ventana): empezar de nuevo
+            self.reset(end_pos - x.shape[0])
+        self._next = int(end_pos)
+        data = np.concatenate((self._pending, x)) if self._pending.size else x
+        base = end_pos - data.shape[0]  # índice absoluto de data[0]
+        env = rms_envelope(data, self.win, self.hop)
+        nf = env.size
+        self._pending = np.array(data[nf * self.hop:], dtype=np.float32)
+        if nf == 0:
+            return []
+
+        # Piso de ruido y umbral con el historial previo a este bloque
+        hist = self._history[:min(self._frames, self._history.size)]
+        self.noise = noise_floor(hist) if hist.size else float(env.min())
+        thresh = max(activity_threshold(self.noise, self.thresh_factor), self.min_rms)
+        active = env > thresh
+        warm = self._frames >= self._warmup
+        self._history[(self._frames + np.arange(nf)) % self._history.size] = env
+        self._frames += nf
+        if not warm:
+            return []
+
+        out = []
+        for i in range(nf):
+            f_start = base + i * self.hop
+            f_end = f_start + self.win
+            if self._start is None:
+                self._run = self._run + 1 if active[i] else 0
+                if self._run >= self.onset_frames:
+                    self._onset = max(0, f_start - (self.onset_frames - 1) * self.hop)
+                    self._start = max(0, self._onset - self.preroll)
+                    self._last_active_end = f_end
+                    self._silent = 0
+                continue
+            if active[i]:
+                self._silent = 0
+                self._last_active_end = f_end
+            else:
+                self._silent += 1
+            too_long = f_end - self._start >= self.max_len
+            if self._silent >= self.hangover_frames or too_long:
+                end = min(self._last_active_end + self.preroll, end_pos)
+                if too_long:
+                    end = f_end
+                if end - self._start >= self.min_len:
+                    out.append((self._start, end, self._onset))
+                self._start = None
+                self._run = 0
+        return out
+
+
+def onset_frame(x_utt: np.ndarray, onset: int, N: int) -> np.ndarray:
+    """
+    Marco de N muestras de la palabra para extraer características: empieza
+    como mucho N/2 antes del ataque (`onset`, relativo a x_utt), así lo
+    contiene aunque el pre-roll sea más largo que N. Relleno con ceros.
+    """
+    lo = max(0, int(onset) - N // 2)
+    x = x_utt[lo:lo + N]
+    return x if x.size == N else np.pad(x, (0, N - x.size))
+
+
+if __name__ == "__main__":
+    import time
+
+    # Un productor escribe bloques de 100 ms mientras el consumidor lee: las
+    # ventanas leídas siempre son contiguas en la señal (rampa sin saltos).
+    fs, block, cap = 32768, 3276, 5 * 32768
+    ring = SPSCRingBuffer(cap)
+    stop = threading.Event()
+
+    def producer():
+        pos = 0
+        while not stop.is_set():
+            ring.write(np.arange(pos, pos + block, dtype=np.float32) % 4096)
+            pos += block
+            time.sleep(0.001)
+
+    t = threading.Thread(target=producer, daemon=True)
+    t.start()
+    checks = 0
+    t_end = time.time() + 1.0
+    while time.time() < t_end:
+        x = ring.latest(4096)
+        if x.size == 4096:
+            d = np.diff(x.astype(np.int64)) % 4096
+            assert np.all(d == 1), "ventana no contigua"
+            checks += 1
+    stop.set()
+    t.join()
+    print(f"{checks} lecturas consistentes, {ring.written} muestras escritas")
+
+    # wait_for: el consumidor despierta una vez por bloque y la energía
+    # incremental coincide con la calculada sobre la ventana completa
+    ring = SPSCRingBuffer(cap)
+    sig = (np.random.default_rng(0).standard_normal(40 * block) * 0.1).astype(np.float32)
+
+    def producer_sig():
+        for i in range(0, sig.size, block):
+            time.sleep(0.002)
+            ring.write(sig[i:i + block])
+
+    t = threading.Thread(target=producer_sig, daemon=True)
+    t.start()
+    window = 4096
+    sliding = SlidingEnergy(window, resync_every=16)
+    pos, wakes = 0, 0
+    while pos < sig.size:
+        if not ring.wait_for(pos + block, timeout=1.0):
+            break
+        wakes += 1
+        current, w, r = sliding.slide(ring, pos)
+        ref = np.sqrt(np.mean(sig[max(0, w - window):w].astype(np.float64) ** 2) + 1e-12)
+        assert current.shape[0] == min(w, window)
+        assert abs(r - ref) < 1e-9 * max(1.0, ref), (r, ref)
+        pos = w
+    t.join()
+    print(f"{wakes} despertares para {sig.size // block} bloques, RMS incremental OK")
+
+    # Salto mayor que la ventana: recálculo exacto
+    sliding = SlidingEnergy(1000)
+    current, w, r = sliding.slide(ring, 0)
+    assert abs(r - np.sqrt(np.mean(sig[-1000:].astype(np.float64) ** 2) + 1e-12)) < 1e-12
+
+    # Segmentador: dos "palabras" en ruido, entregadas en bloques de 100 ms
+    rng = np.random.default_rng(1)
+    fs = 16000
+    x = (rng.standard_normal(6 * fs) * 0.003).astype(np.float32)
+    words = [(int(1.5 * fs), int(2.1 * fs)), (int(3.4 * fs), int(4.3 * fs))]
+    for a, b in words:
+        t = np.arange(b - a) / fs
+        x[a:b] += (0.2 * np.sin(2 * np.pi * 300 * t) * np.sin(np.pi * t / t[-1])).astype(np.float32)
+    seg = UtteranceSegmenter(fs)
+    found = []
+    for i in range(0, x.size, 1600):
+        found += seg.feed(x[i:i + 1600], min(i + 1600, x.size))
+    print("Palabras:", [(round(a / fs, 2), round(b / fs, 2)) for a, b, _ in found])
+    assert len(found) == 2
+    for (a, b, _), (wa, wb) in zip(found, words):
+        assert a <= wa + 0.1 * fs and b >= wb - 0.1 * fs and b - a < (wb - wa) + 0.6 * fs
+
+    # Marco de clasificación (_classify_utterance de las GUIs): con N/fs menor
+    # que el pre-roll, las primeras N muestras serían solo ruido; onset_frame
+    # debe contener el comienzo de la palabra
+    for fs, N in [(32768, 4096), (44100, 4096), (16000, 4096), (8000, 512)]:
+        x = (rng.standard_normal(4 * fs) * 0.003).astype(np.float32)
+        wa, wb = int(1.5 * fs), int(2.2 * fs)
+        t = np.arange(wb - wa) / fs
+        x[wa:wb] += (0.2 * np.sin(2 * np.pi * 300 * t)).astype(np.float32)
+        seg = UtteranceSegmenter(fs)
+        found = []
+        for i in range(0, x.size, fs // 10):
+            found += seg.feed(x[i:i + fs // 10], min(i + fs // 10, x.size))
+        assert len(found) == 1
+        start, end, onset = found[0]
+        frame = onset_frame(x[start:end], onset - start, N)
+        lo = start + max(0, onset - start - N // 2)
+        assert frame.size == N and lo <= wa < lo + N, (fs, N, lo, wa)
+        assert np.sqrt(np.mean(frame.astype(np.float64) ** 2)) > 10 * 0.003
+    print("Marco de clasificación sobre el ataque: OK")
@@ -5,13 +5,10 @@ Verifica que el error sea máximo del 5%
 
 import os
 import numpy as np
-import soundfile as sf
-from model_utils import load_model, decide_label_by_min_dist
-from dsp_utils import compute_subband_energies
-from audio_utils import load_and_prepare_wav
+from model_utils import load_model, classify_batch
 
 
-def validar_modelo(model_path: str = "lab5_model.json", 
+def validar_modelo(model_path: str = "lab5_model.npz", 
                    recordings_dir: str = "recordings",
                    max_samples_per_command: int = None):
     """
@@ -85,19 +82,15 @@ def validar_modelo(model_path: str = "lab5_model.json",
         'confusion_matrix': {cmd: {c: 0 for c in commands} for cmd in commands}
     }
     
-    for i, (filepath, expected) in enumerate(test_files, 1):
+    # Todos los archivos en una pasada por lotes: cada uno se decodifica una
+    # sola vez y las distancias del lote salen juntas (mismas predicciones)
+    batch = classify_batch([filepath for filepath, _ in test_files], model)
+    
+    for i, ((filepath, expected), r) in enumerate(zip(test_files, batch), 1):
         try:
-            # Cargar y procesar audio
-            x = load_and_prepare_wav(filepath, N)
-            x_orig, _ = sf.read(filepath)
-            if x_orig.ndim > 1:
-                x_orig = x_orig.mean(axis=1)
-            
-            # Extraer características
-            Es, bands, freqs = compute_subband_energies(x, fs, N, K, window)
-            
-            # Reconocer
-            predicted, dists = decide_label_by_min_dist(Es, model, x_raw=x_orig)
+            if "error" in r:
+                raise RuntimeError(r["error"])
+            predicted, dists = r["label"], r["distances"]
             
             # Evaluar
             is_correct = (predicted == expected)
@@ -194,20 +187,25 @@ def validar_modelo(model_path: str = "lab5_model.json",
 
 def validacion_cruzada(recordings_dir: str = "recordings", 
                        k_folds: int = 5,
-                       model_params: dict = None):
+                       model_params: dict = None,
+                       workers: int = None):
     """
     Realiza validación cruzada k-fold para evaluar robustez del modelo.
     
+    El corpus se decodifica una sola vez (ver eval_utils.cross_validate);
+    cada fold entrena con cortes de la matriz de características y los
+    folds corren en paralelo.
+    
     Args:
         recordings_dir: Directorio con grabaciones
         k_folds: Número de particiones para validación cruzada
         model_params: Parámetros del modelo (si None, usa valores por defecto)
+        workers: Procesos para extracción y folds (None = núcleos disponibles, 1 = secuencial)
     
     Returns:
         dict con resultados de validación cruzada
     """
-    from model_utils import train_from_folder
-    import tempfile
+    from eval_utils import collect_corpus, cross_validate
     
     if model_params is None:
         model_params = {
@@ -224,31 +222,32 @@ def validacion_cruzada(recordings_dir: str = "recordings",
     print(f"Parámetros: {model_params}")
     
     # Recolectar todos los archivos por comando
-    commands = {}
-    for subdir in os.listdir(recordings_dir):
-        folder = os.path.join(recordings_dir, subdir)
-        if os.path.isdir(folder):
-            wavs = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith('.wav')]
-            if len(wavs) > 0:
-                commands[subdir] = wavs
-    
-    print(f"\nComandos encontrados: {list(commands.keys())}")
-    
-    fold_results = []
-    
-    for fold in range(k_folds):
-        print(f"\n{'='*80}")
-        print(f"FOLD {fold + 1}/{k_folds}")
-        print(f"{'='*80}")
-        
-        # Dividir datos en entrenamiento y prueba
-        # TODO: Implementar división y entrenamiento por fold
-        
-        pass
+    paths, labels = collect_corpus(recordings_dir)
+    commands = sorted(set(labels))
+    print(f"\nComandos encontrados: {commands} ({len(paths)} archivos)")
     
-    # TODO: Calcular métricas promedio y desviación estándar
+    results = cross_validate(paths, labels, model_params['fs'], model_params['N'],
+                             model_params['K'], model_params['window'],
+                             k_folds=k_folds, workers=workers)
     
-    return fold_results
+    print(f"\n⏱️  Extracción del corpus (una sola vez): {results['extract_s']:.2f} s")
+    print(f"\n{'fold':>6} | {'muestras':>8} | {'exactitud':>9} | {'entrenar':>9} | {'probar':>9}")
+    print("-" * 54)
+    for f in results['folds']:
+        print(f"{f['fold'] + 1:>6} | {f['n']:>8} | {f['accuracy']*100:>8.1f}% | "
+              f"{f['train_s']*1e3:>7.1f}ms | {f['test_s']*1e3:>7.1f}ms")
+    
+    accs = np.array([f['accuracy'] for f in results['folds']]) * 100
+    print(f"\n📈 Exactitud: {results['accuracy']*100:.2f}% (por fold: {accs.mean():.2f} ± {accs.std():.2f}%)")
+    
+    # Matriz de confusión (filas = esperado, columnas = predicho)
+    print(f"\n📋 Matriz de Confusión:")
+    print(f"{'':>15} | " + " | ".join([f"{cmd:>12}" for cmd in results['commands']]))
+    print("-" * (15 + len(results['commands']) * 15))
+    for r, true_cmd in enumerate(results['commands']):
+        print(f"{true_cmd:>15} | " + " | ".join([f"{n:>12}" for n in results['confusion'][r]]))
+    
+    return results
 
 
 if __name__ == "__main__":
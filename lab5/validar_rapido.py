@@ -4,10 +4,7 @@ Validación rápida con visualización de confianza
 
 import os
 import numpy as np
-import soundfile as sf
-from model_utils import load_model, decide_label_by_min_dist
-from dsp_utils import compute_subband_energies
-from audio_utils import load_and_prepare_wav
+from model_utils import load_model, classify_batch
 
 
 def calculate_confidence(dists: dict) -> float:
@@ -45,7 +42,7 @@ def validar_rapido():
     print("="*80)
     
     # Cargar modelo
-    model_path = "lab5_model.json"
+    model_path = "lab5_model.npz"
     print(f"\n📂 Cargando modelo: {model_path}")
     
     try:
@@ -54,10 +51,6 @@ def validar_rapido():
         print(f"❌ Error al cargar modelo: {e}")
         return
     
-    fs = model['fs']
-    N = model['N']
-    K = model['K']
-    window = model['window']
     commands = list(model['commands'].keys())
     
     print(f"✓ Modelo cargado")
@@ -86,17 +79,14 @@ def validar_rapido():
     print(f"{'Archivo':<30} {'Esperado':<12} {'Predicho':<12} {'Confianza':<12} {'Estado':<15}")
     print("-"*80)
     
-    for filepath, expected in test_files:
+    # Todos los archivos en una pasada por lotes (una decodificación por archivo)
+    batch = classify_batch([filepath for filepath, _ in test_files], model)
+    
+    for (filepath, expected), r in zip(test_files, batch):
         try:
-            # Cargar y procesar
-            x = load_and_prepare_wav(filepath, N)
-            x_orig, _ = sf.read(filepath)
-            if x_orig.ndim > 1:
-                x_orig = x_orig.mean(axis=1)
-            
-            # Extraer características y predecir
-            Es, _, _ = compute_subband_energies(x, fs, N, K, window)
-            predicted, dists = decide_label_by_min_dist(Es, model, x_raw=x_orig)
+            if "error" in r:
+                raise RuntimeError(r["error"])
+            predicted, dists = r["label"], r["distances"]
             
             # Calcular confianza
             confidence = calculate_confidence(dists)
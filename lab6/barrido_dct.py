@@ -0,0 +1,207 @@
+# barrido_dct.py
+# --------------------------------------------------------
+# Barrido de varios niveles de compresión sobre UNA sola transformada.
+# La DCT y el orden de los coeficientes por magnitud se calculan una vez:
+# de las magnitudes ordenadas se lee el umbral de todos los niveles, y
+# cada nivel (porcentaje de coeficientes eliminados) solo compara contra
+# su umbral.
+#
+# Con una transformada ortonormal (DCT 1D de audio) el MSE de cada nivel
+# sale de los coeficientes: es la energía de los descartados (suma
+# acumulada de las magnitudes² ya ordenadas) dividida por el número de
+# muestras, sin invertir nada. Si además no se pide la reconstrucción,
+# diez niveles cuestan una DCT y un ordenamiento. Las reconstrucciones que
+# sí se piden (para mostrarlas o, en imágenes, para medir el error tras
+# redondear a uint8) se calculan en un pool de hilos: NumPy/SciPy liberan
+# el GIL en las transformadas y así los coeficientes no se copian a otros
+# procesos; cada una cuesta una transformada inversa.
+#
+# El conjunto retenido en cada nivel es el mismo que el de
+# filtrar_coeficientes_pequenos_* (los de mayor magnitud; empates por índice).
+# --------------------------------------------------------
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from seleccion_coeficientes import mascara_desde_umbral, mascara_desde_umbrales_por_fila, umbrales_k_mayores
+
+
+def cantidad_retenida(total, porcentaje_eliminado):
+    """Coeficientes que quedan al eliminar el porcentaje dado (mismo redondeo que los filtros)."""
+    k = int((porcentaje_eliminado / 100.0) * total)
+    return total if k < 1 else total - k
+
+
+def niveles_retencion(coef, porcentajes, por_trama=False):
+    """
+    Genera (índice en porcentajes, coeficientes filtrados) para cada nivel.
+    Las magnitudes se calculan y se ordenan una sola vez para todos los
+    niveles; cada nivel solo compara contra su umbral.
+    Con por_trama=True coef es (F, M) (codec_mdct) y el porcentaje se aplica
+    a cada fila por separado.
+    """
+    for i, coef_f, _ in _niveles(coef, porcentajes, por_trama, energias=False):
+        yield i, coef_f
+
+
+def _niveles(coef, porcentajes, por_trama, energias):
+    """Como niveles_retencion, agregando la energía descartada de cada nivel (o None)."""
+    coef = np.asarray(coef)
+    mag = np.abs(coef) if por_trama else np.abs(coef.ravel())
+    n = mag.shape[-1]
+    retenidos = [cantidad_retenida(n, p) for p in porcentajes]
+    parciales = [r for r in retenidos if 0 < r < n]
+
+    # Un ordenamiento (por fila si por_trama) sirve para todos los umbrales y
+    # energías; para un solo umbral global sin energías basta un quickselect
+    ordenadas = None
+    if energias or (parciales and por_trama) or len(parciales) > 1:
+        ordenadas = np.sort(mag, axis=-1)
+        umbrales = {r: ordenadas[..., n - r] for r in parciales}
+    else:
+        umbrales = dict(zip(parciales, umbrales_k_mayores(mag, parciales))) if parciales else {}
+    # acumulada[..., j]: energía de los j + 1 coeficientes más chicos
+    acumulada = np.cumsum(ordenadas ** 2, axis=-1) if energias else None
+
+    for i, r in enumerate(retenidos):
+        descartada = None
+        if energias:
+            descartada = 0.0 if r >= n else float(np.sum(acumulada[..., n - r - 1]))
+        if r >= n:
+            yield i, coef.copy(), descartada
+        elif r <= 0:
+            yield i, np.zeros_like(coef), descartada
+        elif por_trama:
+            mascara = mascara_desde_umbrales_por_fila(mag, umbrales[r], r)
+            yield i, np.where(mascara, coef, 0).astype(coef.dtype, copy=False), descartada
+        else:
+            mascara = mascara_desde_umbral(mag, umbrales[r], r)
+            plano = coef.ravel()
+            yield i, np.where(mascara, plano, 0).astype(coef.dtype, copy=False).reshape(coef.shape), descartada
+
+
+def psnr_desde_mse(mse, pico):
+    """PSNR en dB; infinito si el MSE es 0."""
+    return float("inf") if mse <= 0 or pico <= 0 else float(10.0 * np.log10(pico ** 2 / mse))
+
+
+def mse_psnr(original, reconstruida, pico):
+    """(MSE, PSNR en dB) de la reconstrucción; PSNR infinito si el MSE es 0."""
+    diff = np.asarray(original, dtype=float) - np.asarray(reconstruida, dtype=float)
+    mse = float(np.mean(diff ** 2))
+    return mse, psnr_desde_mse(mse, pico)
+
+
+def barrido_compresion(coef, porcentajes, reconstruir, original, pico, max_workers=None, por_trama=False,
+                       mse_en_coeficientes=False, energia_fuera=None):
+    """
+    Evalúa todos los porcentajes (de coeficientes eliminados) reutilizando
+    coef. reconstruir(coef_filtrados) -> señal/imagen comparable con
+    original. Devuelve, en el orden de porcentajes, dicts con "porcentaje",
+    "retenidos", "coef", "reconstruccion", "mse" y "psnr".
+    max_workers=None usa un hilo por núcleo (más hilos solo compiten).
+    por_trama: ver niveles_retencion.
+
+    mse_en_coeficientes=True (solo para transformadas ortonormales) toma el
+    MSE de la energía de los coeficientes descartados, sin comparar con la
+    reconstrucción; entonces reconstruir puede ser None ("reconstruccion"
+    queda en None). energia_fuera(coef, coef_filtrados) resta la energía
+    del error que cae fuera de original (p. ej. el relleno de la MDCT,
+    codec_mdct.energia_error_relleno).
+    """
+    original = np.asarray(original)
+    resultados = [None] * len(porcentajes)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    def _evaluar(i, coef_f, descartada):
+        rec = reconstruir(coef_f) if reconstruir is not None else None
+        if mse_en_coeficientes:
+            if energia_fuera is not None:
+                descartada -= energia_fuera(coef, coef_f)
+            mse = max(descartada, 0.0) / original.size
+            psnr = psnr_desde_mse(mse, pico)
+        else:
+            mse, psnr = mse_psnr(original, rec, pico)
+        return i, {"porcentaje": porcentajes[i], "retenidos": int(np.count_nonzero(coef_f)),
+                   "coef": coef_f, "reconstruccion": rec, "mse": mse, "psnr": psnr}
+
+    niveles = _niveles(coef, porcentajes, por_trama, energias=mse_en_coeficientes)
+    if reconstruir is None:
+        for nivel in niveles:
+            i, r = _evaluar(*nivel)
+            resultados[i] = r
+        return resultados
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = [pool.submit(_evaluar, *nivel) for nivel in niveles]
+        for futuro in futuros:
+            i, r = futuro.result()
+            resultados[i] = r
+    return resultados
+
+
+if __name__ == "__main__":
+    import time
+    from scipy.fftpack import dct, idct
+
+    from seleccion_coeficientes import eliminar_k_menores
+
+    rng = np.random.default_rng(0)
+    senal = np.cumsum(rng.standard_normal(200_000))
+    senal /= np.abs(senal).max()
+    porcentajes = [1, 2, 3, 5, 10, 20, 50, 80, 90, 99]
+
+    t0 = time.perf_counter()
+    coef = dct(senal, norm="ortho")
+    res = barrido_compresion(coef, porcentajes, lambda c: idct(c, norm="ortho"), senal, 1.0)
+    t_barrido = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    coef = dct(senal, norm="ortho")
+    res_c = barrido_compresion(coef, porcentajes, None, senal, 1.0, mse_en_coeficientes=True)
+    t_metricas = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for p in porcentajes:
+        c = eliminar_k_menores(dct(senal, norm="ortho"), int(p / 100.0 * senal.size))
+        mse_psnr(senal, idct(c, norm="ortho"), 1.0)
+    t_ingenuo = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dct(senal, norm="ortho")
+    t_una = time.perf_counter() - t0
+
+    for p, r, rc in zip(porcentajes, res, res_c):
+        ref = eliminar_k_menores(coef, int(p / 100.0 * coef.size))
+        assert np.array_equal(r["coef"], ref) and np.array_equal(rc["coef"], ref)
+        mse_ref = np.mean((senal - idct(ref, norm="ortho")) ** 2)
+        assert np.isclose(r["mse"], mse_ref)
+        # MSE desde los coeficientes = MSE de la reconstrucción (DCT ortonormal)
+        assert np.isclose(rc["mse"], mse_ref, rtol=1e-9) and rc["reconstruccion"] is None
+    assert not next(niveles_retencion(coef, [100]))[1].any()
+
+    # Por trama: cada fila filtrada igual que por separado
+    tramas = coef[:199_680].reshape(-1, 512)
+    for (_, c), p in zip(niveles_retencion(tramas, porcentajes, por_trama=True), porcentajes):
+        ref = np.array([eliminar_k_menores(f, int(p / 100.0 * 512)) for f in tramas])
+        assert np.array_equal(c, ref)
+
+    # MDCT por tramas: energía descartada menos la que cae en el relleno = MSE exacto
+    from codec_mdct import energia_error_relleno, imdct_senal, mdct_senal
+    voz = senal[:50_000]
+    cm = mdct_senal(voz, 256)
+    res_m = barrido_compresion(cm, porcentajes, lambda c: imdct_senal(c, voz.size), voz, 1.0, por_trama=True,
+                               mse_en_coeficientes=True,
+                               energia_fuera=lambda c, cf: energia_error_relleno(c, cf, voz.size))
+    for r in res_m:
+        assert np.isclose(r["mse"], np.mean((voz - r["reconstruccion"]) ** 2), rtol=1e-9, atol=1e-20)
+
+    for r in res[::3]:
+        print(f"  {r['porcentaje']:>3}% eliminado: MSE={r['mse']:.3e} PSNR={r['psnr']:.1f} dB")
+    print(f"{len(porcentajes)} niveles: con reconstrucciones {t_barrido*1e3:.0f} ms | "
+          f"solo métricas (MSE en coeficientes) {t_metricas*1e3:.0f} ms | "
+          f"pipeline por nivel {t_ingenuo*1e3:.0f} ms | una DCT {t_una*1e3:.0f} ms")
+    print("OK")
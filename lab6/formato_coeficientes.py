@@ -0,0 +1,361 @@
+# formato_coeficientes.py
+# --------------------------------------------------------
+# Formato compacto en disco (.dctc) para los coeficientes retenidos.
+# Los coeficientes se guardan como filas de largo L: un bloque de la imagen
+# (b*b coeficientes en orden zigzag) o una trama MDCT de audio (M
+# coeficientes). De cada fila solo se guardan los coeficientes no nulos:
+#   * índice disperso: máscara de bits de no nulos (np.packbits). En orden
+#     zigzag los retenidos se agrupan al principio de cada bloque y la
+#     máscara queda llena de rachas que zlib comprime muy bien;
+#   * valores: cuantizados uniformemente a `bits` bits con el paso
+#     max|c| / (2^(bits-1) - 1). Se guardan con signo en zigzag
+#     (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...) y separados en planos de bytes
+#     (todos los bytes bajos, luego los altos), también con zlib.
+# Las filas se agrupan en tramos de ~COEF_POR_TRAMO coeficientes (4096
+# bloques 8x8, 256 tramas de M = 1024). Cada tramo se comprime
+# por separado y tiene su propio paso, así que se puede escribir por flujo
+# (sin conocer el máximo global) y leer cualquier tramo sin descomprimir
+# los demás.
+#
+# Disposición del archivo:
+#   "DCTC" | tramos ... | tabla (un registro por tramo) | meta (JSON) | pie
+#   pie = inicio de la tabla (u8), tramos (u4), bytes de meta (u4),
+#         versión (u2), "DCTC"
+# La lectura usa np.memmap: solo se traen del disco el pie, la tabla y
+# los tramos que se piden.
+# --------------------------------------------------------
+
+import json
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from dct_bloques import vista_bloques
+
+MAGICO = b"DCTC"
+VERSION = 1
+EXTENSION = ".dctc"
+COEF_POR_TRAMO = 1 << 18  # coeficientes (densos) por tramo: 2 MiB al decodificarlo
+BITS = 12  # bits de cuantización de los valores (2..16)
+NIVEL_ZLIB = 9
+
+REGISTRO = np.dtype([("inicio", "<u8"), ("bytes_mascara", "<u4"), ("bytes_valores", "<u4"),
+                     ("filas", "<u4"), ("no_nulos", "<u4"), ("paso", "<f8")])
+PIE = np.dtype([("tabla", "<u8"), ("tramos", "<u4"), ("bytes_meta", "<u4"),
+                ("version", "<u2"), ("magico", "S4")])
+
+
+# -------------------------------
+# Codificación de un tramo
+# -------------------------------
+def _codificar_valores(q):
+    """Enteros con signo -> bytes: zigzag de signo y planos de bytes."""
+    q = q.astype(np.int32)
+    u = ((q << 1) ^ (q >> 31)).astype("<u2")
+    return u.view(np.uint8).reshape(-1, 2).T.tobytes()
+
+
+def _decodificar_valores(datos, n):
+    planos = np.frombuffer(datos, dtype=np.uint8).reshape(2, n)
+    u = (planos[0].astype(np.int32) | (planos[1].astype(np.int32) << 8))
+    return (u >> 1) ^ -(u & 1)
+
+
+def _codificar_tramo(filas, bits):
+    filas = np.asarray(filas, dtype=float)
+    maximo = float(np.max(np.abs(filas))) if filas.size else 0.0
+    paso = maximo / (2 ** (bits - 1) - 1) if maximo > 0 else 1.0
+    q = np.rint(filas / paso).astype(np.int32)
+    # Un retenido muy chico puede cuantizarse a 0: ya no se guarda
+    mascara = q != 0
+    mascara_z = zlib.compress(np.packbits(mascara, axis=None).tobytes(), NIVEL_ZLIB)
+    valores_z = zlib.compress(_codificar_valores(q[mascara]), NIVEL_ZLIB)
+    return mascara_z, valores_z, int(np.count_nonzero(mascara)), paso
+
+
+def _decodificar_tramo(datos, registro, L):
+    filas = int(registro["filas"])
+    inicio = int(registro["inicio"])
+    fin_mascara = inicio + int(registro["bytes_mascara"])
+    fin_valores = fin_mascara + int(registro["bytes_valores"])
+    bits_mascara = np.frombuffer(zlib.decompress(datos[inicio:fin_mascara]), dtype=np.uint8)
+    mascara = np.unpackbits(bits_mascara, count=filas * L).astype(bool).reshape(filas, L)
+    valores = _decodificar_valores(zlib.decompress(datos[fin_mascara:fin_valores]), int(registro["no_nulos"]))
+    salida = np.zeros((filas, L))
+    salida[mascara] = valores * float(registro["paso"])
+    return salida
+
+
+# -------------------------------
+# Escritura y lectura
+# -------------------------------
+def filas_por_tramo(L):
+    """Filas de largo L que entran en un tramo."""
+    return max(1, COEF_POR_TRAMO // int(L))
+
+
+def en_tramos(filas):
+    """Divide un arreglo (n, L) en memoria en tramos."""
+    tramo = filas_por_tramo(filas.shape[1])
+    for i in range(0, len(filas), tramo):
+        yield filas[i:i + tramo]
+
+
+def escribir_coeficientes(ruta, tramos, L, meta, bits=BITS):
+    """
+    Escribe los tramos (arreglos (n_i, L), ver en_tramos) en ruta a medida
+    que llegan; meta (dict JSON) se guarda al final.
+    Devuelve {"bytes", "filas", "no_nulos"}.
+    """
+    if not 2 <= bits <= 16:
+        raise ValueError(f"bits debe estar entre 2 y 16 (se pidió {bits})")
+    registros = []
+    with open(ruta, "wb") as f:
+        f.write(MAGICO)
+        for filas in tramos:
+            mascara_z, valores_z, no_nulos, paso = _codificar_tramo(filas, bits)
+            registros.append((f.tell(), len(mascara_z), len(valores_z), len(filas), no_nulos, paso))
+            f.write(mascara_z)
+            f.write(valores_z)
+
+        tabla = np.array(registros, dtype=REGISTRO)
+        inicio_tabla = f.tell()
+        f.write(tabla.tobytes())
+        meta = dict(meta, L=int(L), bits=int(bits))
+        meta_b = json.dumps(meta).encode("utf-8")
+        f.write(meta_b)
+        f.write(np.array([(inicio_tabla, len(tabla), len(meta_b), VERSION, MAGICO)], dtype=PIE).tobytes())
+        total = f.tell()
+    return {"bytes": total, "filas": int(tabla["filas"].sum()), "no_nulos": int(tabla["no_nulos"].sum())}
+
+
+def abrir_coeficientes(ruta):
+    """
+    Abre un .dctc con np.memmap sin leer los tramos.
+    Devuelve (meta, tabla, datos); datos es el memmap del archivo completo.
+    """
+    datos = np.memmap(ruta, dtype=np.uint8, mode="r")
+    if datos.size < len(MAGICO) + PIE.itemsize or bytes(datos[:4]) != MAGICO:
+        raise ValueError(f"{ruta} no es un archivo {EXTENSION}")
+    pie = np.frombuffer(datos[-PIE.itemsize:], dtype=PIE)[0]
+    if pie["magico"] != MAGICO:
+        raise ValueError(f"{ruta}: archivo {EXTENSION} truncado")
+    if int(pie["version"]) > VERSION:
+        raise ValueError(f"{ruta}: versión {int(pie['version'])} no soportada (máxima {VERSION})")
+    inicio_tabla = int(pie["tabla"])
+    fin_tabla = inicio_tabla + int(pie["tramos"]) * REGISTRO.itemsize
+    tabla = np.frombuffer(datos[inicio_tabla:fin_tabla], dtype=REGISTRO)
+    meta = json.loads(bytes(datos[fin_tabla:fin_tabla + int(pie["bytes_meta"])]).decode("utf-8"))
+    return meta, tabla, datos
+
+
+def leer_tramos(ruta, desde=0, hasta=None):
+    """Genera los tramos desde..hasta (índices de tramo) ya decuantizados, (n_i, L)."""
+    meta, tabla, datos = abrir_coeficientes(ruta)
+    for registro in tabla[desde:hasta]:
+        yield _decodificar_tramo(datos, registro, meta["L"])
+
+
+def leer_coeficientes(ruta):
+    """(meta, filas (n, L)) con todos los tramos del archivo."""
+    meta, _, _ = abrir_coeficientes(ruta)
+    filas = list(leer_tramos(ruta))
+    return meta, (np.vstack(filas) if filas else np.zeros((0, meta["L"])))
+
+
+# -------------------------------
+# Imágenes: bloques en orden zigzag
+# -------------------------------
+@lru_cache(maxsize=8)
+def orden_zigzag(b):
+    """Índices (en el bloque b x b aplanado) en el orden zigzag de JPEG. Solo lectura."""
+    celdas = sorted(((i, j) for i in range(b) for j in range(b)),
+                    key=lambda c: (c[0] + c[1], c[0] if (c[0] + c[1]) % 2 else c[1]))
+    orden = np.array([i * b + j for i, j in celdas])
+    orden.setflags(write=False)
+    return orden
+
+
+def guardar_imagen_dct(ruta, coef, forma_original=None, bloque=8, bits=BITS):
+    """
+    Guarda los coeficientes DCT por bloques de una imagen (h, w múltiplos de
+    bloque, con ceros en los descartados). forma_original es la forma antes
+    del relleno a bloques.
+    """
+    h, w = coef.shape
+    filas = vista_bloques(np.asarray(coef, dtype=float), bloque).reshape(-1, bloque * bloque)[:, orden_zigzag(bloque)]
+    meta = {"tipo": "imagen", "bloque": bloque, "forma": [h, w],
+            "forma_original": list(forma_original or (h, w))}
+    return escribir_coeficientes(ruta, en_tramos(filas), bloque * bloque, meta, bits)
+
+
+def cargar_imagen_dct(ruta):
+    """(coef (h, w), forma_original) leídos de un .dctc de imagen."""
+    meta, filas = leer_coeficientes(ruta)
+    if meta.get("tipo") != "imagen":
+        raise ValueError(f"{ruta} no contiene coeficientes de imagen")
+    b = meta["bloque"]
+    h, w = meta["forma"]
+    bloques = np.empty_like(filas)
+    bloques[:, orden_zigzag(b)] = filas
+    coef = bloques.reshape(h // b, w // b, b, b).swapaxes(1, 2).reshape(h, w)
+    return coef, tuple(meta["forma_original"])
+
+
+# -------------------------------
+# Audio: tramas MDCT (codec_mdct)
+# -------------------------------
+def guardar_audio_mdct(ruta, tramas, M, fs, longitud=None, bits=BITS):
+    """
+    Guarda por flujo las tramas (índices, valores) de codec_mdct.codificar.
+    longitud (muestras de la señal) permite cortar la cola al decodificar.
+    """
+    tramo = filas_por_tramo(M)
+
+    def _tramos():
+        lote = []
+        for indices, valores in tramas:
+            lote.append((indices, valores))
+            if len(lote) == tramo:
+                yield _densas(lote, M)
+                lote = []
+        if lote:
+            yield _densas(lote, M)
+
+    meta = {"tipo": "audio", "M": int(M), "fs": int(fs)}
+    if longitud is not None:
+        meta["longitud"] = int(longitud)
+    return escribir_coeficientes(ruta, _tramos(), M, meta, bits)
+
+
+def guardar_mdct_senal(ruta, coef, fs, longitud, bits=BITS):
+    """Guarda los coeficientes (F, M) de codec_mdct.mdct_senal ya filtrados."""
+    meta = {"tipo": "audio", "M": int(coef.shape[1]), "fs": int(fs), "longitud": int(longitud)}
+    return escribir_coeficientes(ruta, en_tramos(coef), coef.shape[1], meta, bits)
+
+
+def cargar_mdct_senal(ruta):
+    """(coef (F, M), meta) de un .dctc de audio; imdct_senal(coef, meta["longitud"]) reconstruye."""
+    meta, filas = leer_coeficientes(ruta)
+    if meta.get("tipo") != "audio":
+        raise ValueError(f"{ruta} no contiene coeficientes de audio")
+    return filas, meta
+
+
+def _densas(lote, M):
+    filas = np.zeros((len(lote), M))
+    for fila, (indices, valores) in zip(filas, lote):
+        fila[indices] = valores
+    return filas
+
+
+def iterar_tramas_audio(ruta):
+    """Genera las tramas (índices, valores) de un .dctc de audio, tramo por tramo."""
+    for filas in leer_tramos(ruta):
+        for fila in filas:
+            indices = np.flatnonzero(fila)
+            yield indices, fila[indices]
+
+
+def codificar_archivo_audio(entrada, salida, porcentaje_retenido, M=None, bits=BITS, bloque=None):
+    """
+    WAV -> .dctc por flujo (memoria acotada): MDCT por tramas con el
+    porcentaje_retenido % de los coeficientes de cada trama, cuantizados.
+    """
+    import soundfile as sf
+    from codec_mdct import BLOQUE_LECTURA, TAM_TRAMA, codificar
+
+    M = M or TAM_TRAMA
+    info = sf.info(entrada)
+    bloques = (b.mean(axis=1) for b in sf.blocks(entrada, blocksize=bloque or BLOQUE_LECTURA,
+                                                 dtype="float64", always_2d=True))
+    return guardar_audio_mdct(salida, codificar(bloques, porcentaje_retenido, M), M,
+                              info.samplerate, info.frames, bits)
+
+
+def decodificar_archivo_audio(entrada, salida):
+    """.dctc -> WAV (float) por flujo. Devuelve {"fs", "muestras"}."""
+    import soundfile as sf
+    from codec_mdct import decodificar
+
+    meta, _, _ = abrir_coeficientes(entrada)
+    if meta.get("tipo") != "audio":
+        raise ValueError(f"{entrada} no contiene coeficientes de audio")
+    n = 0
+    with sf.SoundFile(salida, "w", samplerate=meta["fs"], channels=1, subtype="FLOAT") as destino:
+        for rec in decodificar(iterar_tramas_audio(entrada), meta["M"], longitud=meta.get("longitud")):
+            destino.write(rec)
+            n += len(rec)
+    return {"fs": meta["fs"], "muestras": n}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    from codec_mdct import comprimir_senal_mdct, imdct_senal, mdct_senal, retener_por_trama
+    from dct_bloques import dct2_bloques, idct2_bloques
+    from seleccion_coeficientes import retener_k_mayores
+
+    assert orden_zigzag(4).tolist() == [0, 1, 4, 8, 5, 2, 3, 6, 9, 12, 13, 10, 7, 11, 14, 15]
+    q = np.array([0, -1, 1, -2, 2, -2047, 2047, -32768, 32767])
+    assert np.array_equal(_decodificar_valores(_codificar_valores(q), q.size), q)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as d:
+        # Imagen suave 1920x1080 con el 10 % de los coeficientes
+        y, x = np.mgrid[0:1080, 0:1920]
+        img = 128 + 60 * np.sin(x / 97.0) * np.cos(y / 53.0) + 20 * np.sin((x + y) / 13.0) + rng.normal(0, 2, x.shape)
+        img = np.clip(img, 0, 255)
+        coef = retener_k_mayores(dct2_bloques(img), img.size // 10)
+        ruta = os.path.join(d, "img" + EXTENSION)
+        r = guardar_imagen_dct(ruta, coef, img.shape)
+        t0 = time.perf_counter()
+        leido, forma = cargar_imagen_dct(ruta)
+        t_img = time.perf_counter() - t0
+        assert forma == img.shape and np.array_equal(leido != 0, coef != 0)
+        paso = float(abrir_coeficientes(ruta)[1]["paso"].max())
+        assert np.abs(leido - coef).max() <= paso / 2 + 1e-9
+        mse_q = np.mean((idct2_bloques(leido) - img) ** 2)
+        mse_f = np.mean((idct2_bloques(coef) - img) ** 2)
+        print(f"Imagen 1920x1080 (10 %): {r['bytes'] / 1024:.0f} KiB en disco "
+              f"(crudo uint8 {img.size / 1024:.0f} KiB, denso float64 {coef.nbytes / 1024:.0f} KiB), "
+              f"{r['bytes'] * 8 / img.size:.2f} bits/píxel | MSE {mse_f:.2f} -> {mse_q:.2f} cuantizado | "
+              f"lectura {img.size / t_img / 1e6:.0f} Mpx/s")
+
+        # Audio: 3 min a 16 kHz parecidos a voz, por flujo
+        fs = 16000
+        t = np.arange(180 * fs) / fs
+        fase = 2 * np.pi * np.cumsum(120 + 80 * np.sin(2 * np.pi * 0.7 * t)) / fs
+        voz = sum(np.sin(h * fase) / h for h in range(1, 8)) / 3
+        s = (voz * (np.sin(2 * np.pi * 1.5 * t) > 0.2) + 0.001 * rng.standard_normal(t.size)).astype(np.float32)
+
+        import soundfile as sf
+        wav, dctc, rec_wav = (os.path.join(d, n) for n in ("voz.wav", "voz" + EXTENSION, "rec.wav"))
+        sf.write(wav, s, fs, subtype="PCM_16")
+        r = codificar_archivo_audio(wav, dctc, 10)
+        t0 = time.perf_counter()
+        dec = decodificar_archivo_audio(dctc, rec_wav)
+        t_dec = time.perf_counter() - t0
+        original, _ = sf.read(wav)
+        rec, _ = sf.read(rec_wav)
+        assert dec["muestras"] == original.size == rec.size
+        # La cuantización casi no agrega error a la del descarte de coeficientes
+        ref = comprimir_senal_mdct(original, 10)
+        mse_ref, mse_rec = np.mean((original - ref) ** 2), np.mean((original - rec) ** 2)
+        assert mse_rec < 1.5 * mse_ref
+        print(f"Audio 180 s (10 %): {r['bytes'] / 1024:.0f} KiB en disco "
+              f"(WAV PCM16 {os.path.getsize(wav) / 1024:.0f} KiB), {r['bytes'] * 8 / 180 / 1000:.1f} kbit/s | "
+              f"MSE {mse_ref:.2e} -> {mse_rec:.2e} cuantizado | "
+              f"decodificación {original.size / fs / t_dec:.0f}x tiempo real")
+
+        # En memoria: mismo contenido que por flujo; un tramo se lee sin tocar los demás
+        coef = retener_por_trama(mdct_senal(original), 102)
+        _, filas = leer_coeficientes(dctc)
+        assert np.allclose(imdct_senal(filas, original.size), rec, atol=1e-6)
+        meta, tabla, _ = abrir_coeficientes(dctc)
+        assert len(tabla) > 1 and np.array_equal(next(leer_tramos(dctc, 1, 2)), filas[filas_por_tramo(meta["L"]):2 * filas_por_tramo(meta["L"])])
+        assert np.abs(filas - coef).max() <= tabla["paso"].max() / 2 + 1e-9
+    print("OK")
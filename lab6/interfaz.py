@@ -13,16 +13,17 @@ from procesador_imagen_dct import (
     leer_imagen_grises,
     aplicar_dct_bloques,
     aplicar_idct_bloques,
-    filtrar_coeficientes_pequenos_imagen,
 )
 
 from procesador_audio_dct import (
     cargar_audio,
-    dct_audio,
-    idct_audio,
-    filtrar_coeficientes_pequenos_audio,
+    mdct_audio,
+    imdct_audio,
 )
 
+from barrido_dct import barrido_compresion
+from codec_mdct import energia_error_relleno
+
 
 class AplicacionDCT(ttk.Window):
     def __init__(self):
@@ -144,13 +145,12 @@ class AplicacionDCT(ttk.Window):
             messagebox.showerror("Error", "No se pudo leer la imagen.")
             return
 
+        # Una sola DCT para todos los porcentajes; las reconstrucciones van en paralelo
         dct_total, shape_original = aplicar_dct_bloques(img)
-
-        reconstrucciones = []
-        for p in porcentajes:
-            dct_filtrada = filtrar_coeficientes_pequenos_imagen(dct_total, p)
-            rec = aplicar_idct_bloques(dct_filtrada, original_shape=shape_original)
-            reconstrucciones.append((p, dct_filtrada, rec))
+        niveles = barrido_compresion(dct_total, porcentajes,
+                                     lambda c: aplicar_idct_bloques(c, original_shape=shape_original),
+                                     img, 255.0)
+        reconstrucciones = [(r["porcentaje"], r["coef"], r["reconstruccion"], r["mse"], r["psnr"]) for r in niveles]
 
         # Tab de resumen
         resumen = ttk.Frame(self.notebook)
@@ -182,7 +182,7 @@ class AplicacionDCT(ttk.Window):
         resumen_canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
 
         # Tabs individuales para cada porcentaje
-        for p, dct_filtrada, rec in reconstrucciones:
+        for p, dct_filtrada, rec, mse, psnr in reconstrucciones:
             k = f"Imagen {p}%"
             tab = ttk.Frame(self.notebook)
             self.notebook.add(tab, text=k)
@@ -199,7 +199,7 @@ class AplicacionDCT(ttk.Window):
             ax1.grid(True, alpha=0.3)
 
             ax2.imshow(rec, cmap="gray", interpolation='nearest')
-            ax2.set_title(f"Reconstruida ({p}% coef. eliminados)", fontsize=12, fontweight='bold')
+            ax2.set_title(f"Reconstruida ({p}% coef. eliminados)\nMSE={mse:.2f} | PSNR={psnr:.2f} dB", fontsize=12, fontweight='bold')
             ax2.axis("on")
             ax2.grid(True, alpha=0.3)
 
@@ -242,13 +242,14 @@ class AplicacionDCT(ttk.Window):
         self.audio_fs = fs
         self.audio_original = senal
 
-        coef = dct_audio(senal)
-
-        reconstrucciones = []
-        for p in porcentajes:
-            coef_f = filtrar_coeficientes_pequenos_audio(coef, p)
-            rec = idct_audio(coef_f)
-            reconstrucciones.append((p, rec))
+        # Una sola MDCT por tramas para todos los porcentajes (cada porcentaje se
+        # aplica a cada trama). El MSE sale de los coeficientes descartados; las
+        # reconstrucciones (para graficar y reproducir) van en paralelo
+        coef = mdct_audio(senal)
+        niveles = barrido_compresion(coef, porcentajes, lambda c: imdct_audio(c, len(senal)), senal,
+                                     float(np.max(np.abs(senal))), por_trama=True, mse_en_coeficientes=True,
+                                     energia_fuera=lambda c, cf: energia_error_relleno(c, cf, len(senal)))
+        reconstrucciones = [(r["porcentaje"], r["reconstruccion"], r["mse"], r["psnr"]) for r in niveles]
 
         resumen = ttk.Frame(self.notebook)
         self.notebook.add(resumen, text="Resumen audio")
@@ -256,7 +257,7 @@ class AplicacionDCT(ttk.Window):
         controles_resumen.pack(side="top", fill="x", padx=10, pady=5)
         ttk.Button(controles_resumen, text="Reproducir original",
                    command=lambda s=senal: self._play_audio(s, fs)).pack(side="left", padx=5)
-        for p, rec in reconstrucciones:
+        for p, rec, _, _ in reconstrucciones:
             ttk.Button(controles_resumen, text=f"Reproducir {p}%",
                        command=lambda r=rec: self._play_audio(r, fs)).pack(side="left", padx=5)
         ttk.Button(controles_resumen, text="Detener",
@@ -265,14 +266,14 @@ class AplicacionDCT(ttk.Window):
         fig_resumen = plt.Figure(figsize=(10, 4))
         ax_res = fig_resumen.add_subplot(1, 1, 1)
         ax_res.plot(senal, label="Original")
-        for p, rec in reconstrucciones:
+        for p, rec, _, _ in reconstrucciones:
             ax_res.plot(rec, label=f"{p}%")
         ax_res.legend()
         resumen_canvas = FigureCanvasTkAgg(fig_resumen, master=resumen)
         resumen_canvas.draw()
         resumen_canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
 
-        for p, rec in reconstrucciones:
+        for p, rec, mse, psnr in reconstrucciones:
             titulo = f"Audio {p}%"
             tab = ttk.Frame(self.notebook)
             self.notebook.add(tab, text=titulo)
@@ -290,6 +291,7 @@ class AplicacionDCT(ttk.Window):
             ax = fig.add_subplot(1, 1, 1)
             ax.plot(senal, label="Original")
             ax.plot(rec, label="Reconstruida")
+            ax.set_title(f"{p}% coef. eliminados — MSE={mse:.3e} | PSNR={psnr:.2f} dB")
             ax.legend()
             fig_canvas = FigureCanvasTkAgg(fig, master=tab)
             fig_canvas.draw()
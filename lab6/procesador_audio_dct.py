@@ -1,7 +1,9 @@
-import numpy as np
 import soundfile as sf
 from scipy.fftpack import dct, idct
 
+from codec_mdct import TAM_TRAMA, imdct_senal, mdct_senal
+from seleccion_coeficientes import eliminar_k_menores
+
 
 def cargar_audio(ruta):
     senal, fs = sf.read(ruta)
@@ -18,14 +20,19 @@ def idct_audio(coef):
     return idct(coef, norm='ortho')
 
 
+# Versión por tramas (codec_mdct): coeficientes (F, M), una trama por fila
+def mdct_audio(senal, tam_trama=TAM_TRAMA):
+    return mdct_senal(senal, tam_trama)
+
+
+def imdct_audio(coef, longitud):
+    return imdct_senal(coef, longitud)
+
+
 def filtrar_coeficientes_pequenos_audio(coef, porcentaje):
     total = len(coef)
     k = int((porcentaje / 100.0) * total)
     if k < 1:
         return coef.copy()
 
-    idx = np.argsort(np.abs(coef))  # de menor a mayor
-    filtrado = coef.copy()
-    filtrado[idx[:k]] = 0
-
-    return filtrado
+    return eliminar_k_menores(coef, k)
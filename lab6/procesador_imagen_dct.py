@@ -1,6 +1,8 @@
 import numpy as np
 import cv2
-from scipy.fftpack import dct, idct
+
+from dct_bloques import dct2_bloques, idct2_bloques, rellenar_a_bloques
+from seleccion_coeficientes import eliminar_k_menores
 
 
 def leer_imagen_grises(ruta):
@@ -21,35 +23,14 @@ def leer_imagen_grises(ruta):
 
 
 def aplicar_dct_bloques(img, bloque=8):
-    h, w = img.shape
-    original_shape = img.shape
-
-    pad_h = (bloque - (h % bloque)) % bloque
-    pad_w = (bloque - (w % bloque)) % bloque
-    img = np.pad(img, ((0, pad_h), (0, pad_w)), mode="edge")
-
-    dct_total = np.zeros_like(img)
-
-    for i in range(0, img.shape[0], bloque):
-        for j in range(0, img.shape[1], bloque):
-            b = img[i:i+bloque, j:j+bloque]
-            d1 = dct(dct(b.T, norm='ortho').T, norm='ortho')
-            dct_total[i:i+bloque, j:j+bloque] = d1
-
-    return dct_total, original_shape
+    img, original_shape = rellenar_a_bloques(img, bloque)
+    return dct2_bloques(img, bloque), original_shape
 
 
 def aplicar_idct_bloques(dct_img, bloque=8, original_shape=None):
-    h, w = dct_img.shape
-    rec = np.zeros_like(dct_img)
-
-    for i in range(0, h, bloque):
-        for j in range(0, w, bloque):
-            b = dct_img[i:i+bloque, j:j+bloque]
-            id1 = idct(idct(b.T, norm='ortho').T, norm='ortho')
-            rec[i:i+bloque, j:j+bloque] = id1
-
-    rec = np.clip(rec, 0, 255).astype(np.uint8)
+    rec = idct2_bloques(dct_img, bloque)
+    # Redondear (no truncar): el ruido de punto flotante no debe restar 1 nivel
+    rec = np.clip(np.rint(rec), 0, 255).astype(np.uint8)
 
     if original_shape is not None:
         rec = rec[: original_shape[0], : original_shape[1]]
@@ -58,16 +39,10 @@ def aplicar_idct_bloques(dct_img, bloque=8, original_shape=None):
 
 
 def filtrar_coeficientes_pequenos_imagen(dct_img, porcentaje):
-    plano = dct_img.flatten()
-    total = len(plano)
+    total = dct_img.size
 
     k = int((porcentaje / 100.0) * total)
     if k < 1:
         return dct_img.copy()
 
-    idx = np.argsort(np.abs(plano))
-
-    filtrada = plano.copy()
-    filtrada[idx[:k]] = 0  # eliminar los k coeficientes más pequeños
-
-    return filtrada.reshape(dct_img.shape)
+    return eliminar_k_menores(dct_img, k)  # eliminar los k coeficientes más pequeños
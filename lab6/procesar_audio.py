@@ -4,7 +4,9 @@ import os
 import numpy as np
 import soundfile as sf
 import matplotlib.pyplot as plt
-from scipy.fftpack import dct, idct
+
+from codec_mdct import coeficientes_por_trama, imdct_senal, mdct_senal, retener_por_trama
+from formato_coeficientes import EXTENSION, cargar_mdct_senal, guardar_mdct_senal
 
 
 def comprimir_senal_audio(ruta_audio, porcentaje_retenido):
@@ -14,32 +16,20 @@ def comprimir_senal_audio(ruta_audio, porcentaje_retenido):
     if hasattr(senal, 'ndim') and senal.ndim > 1:
         senal = senal.mean(axis=1)
 
-    # Normalización segura
-    max_abs = float(np.max(np.abs(senal)))
-    if max_abs > 0:
-        senal_norm = senal / max_abs
-    else:
-        senal_norm = senal
-
-    # Aplicar DCT con scipy
-    coeficientes = dct(senal_norm, norm='ortho')
-
-    total = len(coeficientes)
-    cantidad_retenida = int((porcentaje_retenido / 100.0) * total)
-    cantidad_retenida = max(1, min(total, cantidad_retenida))
-
-    indices_ordenados = np.argsort(np.abs(coeficientes))[::-1]
-    coef_filtrados = np.zeros_like(coeficientes)
-    coef_filtrados[indices_ordenados[:cantidad_retenida]] = coeficientes[indices_ordenados[:cantidad_retenida]]
-
-    # Reconstrucción con IDCT de scipy
-    senal_rec = idct(coef_filtrados, norm='ortho')
-
-    # Des-normalizamos
-    if max_abs > 0:
-        senal_rec = senal_rec * max_abs
+    # MDCT por tramas: se conserva porcentaje_retenido % de los coeficientes de
+    # cada trama (la selección por magnitud no depende de la escala, así que
+    # no hace falta normalizar)
+    coef = mdct_senal(senal)
+    coef = retener_por_trama(coef, coeficientes_por_trama(porcentaje_retenido, coef.shape[1]))
 
+    # Se guardan solo los coeficientes retenidos y se reconstruye desde ese
+    # archivo, así el MSE incluye la cuantización
     os.makedirs('resultados', exist_ok=True)
+    archivo_coef = 'resultados/voz_coeficientes' + EXTENSION
+    escritos = guardar_mdct_senal(archivo_coef, coef, fs, len(senal))
+    coef_leidos, _ = cargar_mdct_senal(archivo_coef)
+    senal_rec = imdct_senal(coef_leidos, len(senal))
+
     salida = 'resultados/voz_reconstruida.wav'
     sf.write(salida, senal_rec, fs)
 
@@ -54,5 +44,8 @@ def comprimir_senal_audio(ruta_audio, porcentaje_retenido):
     plt.show()
 
     print(f'Archivo de salida: {salida}')
+    print(f'Coeficientes: {archivo_coef} ({escritos["bytes"] / 1024:.1f} KiB, '
+          f'{escritos["bytes"] * 8 / (len(senal) / fs) / 1000:.1f} kbit/s; '
+          f'WAV PCM16 {len(senal) * 2 / 1024:.1f} KiB)')
     print(f'Error cuadrático medio (MSE): {mse:.6f}')
     return senal_rec, fs, mse
@@ -4,23 +4,21 @@ import os
 import numpy as np
 import cv2
 import matplotlib.pyplot as plt
-from scipy.fftpack import dct, idct
+
+from dct_bloques import dct2_bloques, idct2_bloques
+from formato_coeficientes import EXTENSION, cargar_imagen_dct, guardar_imagen_dct
+from seleccion_coeficientes import retener_k_mayores
 
 
 def aplicar_dct_por_bloques(imagen, tamano_bloque=8):
     alto, ancho = imagen.shape
     dct_total = np.zeros_like(imagen, dtype=float)
 
-    for i in range(0, alto, tamano_bloque):
-        for j in range(0, ancho, tamano_bloque):
-            bloque = imagen[i:i+tamano_bloque, j:j+tamano_bloque]
-            if bloque.shape != (tamano_bloque, tamano_bloque):
-                continue
-
-            # DCT 2D separable con scipy (filas luego columnas)
-            dct_bloque = dct(dct(bloque.T, norm='ortho').T, norm='ortho')
-
-            dct_total[i:i+tamano_bloque, j:j+tamano_bloque] = dct_bloque
+    # Solo bloques completos (los bordes incompletos quedan en cero);
+    # todos los bloques se transforman a la vez (ver dct_bloques)
+    h = alto - alto % tamano_bloque
+    w = ancho - ancho % tamano_bloque
+    dct_total[:h, :w] = dct2_bloques(imagen[:h, :w], tamano_bloque)
 
     return dct_total
 
@@ -29,18 +27,12 @@ def aplicar_idct_por_bloques(imagen_dct, tamano_bloque=8):
     alto, ancho = imagen_dct.shape
     reconstruida = np.zeros_like(imagen_dct, dtype=float)
 
-    for i in range(0, alto, tamano_bloque):
-        for j in range(0, ancho, tamano_bloque):
-            bloque = imagen_dct[i:i+tamano_bloque, j:j+tamano_bloque]
-            if bloque.shape != (tamano_bloque, tamano_bloque):
-                continue
-
-            # IDCT 2D separable con scipy (columnas luego filas)
-            idct_bloque = idct(idct(bloque.T, norm='ortho').T, norm='ortho')
+    h = alto - alto % tamano_bloque
+    w = ancho - ancho % tamano_bloque
+    reconstruida[:h, :w] = idct2_bloques(imagen_dct[:h, :w], tamano_bloque)
 
-            reconstruida[i:i+tamano_bloque, j:j+tamano_bloque] = idct_bloque
-
-    return np.clip(reconstruida, 0, 255).astype(np.uint8)
+    # Redondear (no truncar): el ruido de punto flotante no debe restar 1 nivel
+    return np.clip(np.rint(reconstruida), 0, 255).astype(np.uint8)
 
 
 def _leer_imagen_grises(ruta_imagen: str):
@@ -79,18 +71,20 @@ def comprimir_imagen(ruta_imagen, porcentaje_retenido):
     cantidad_retenida = int((porcentaje_retenido / 100.0) * total)
     cantidad_retenida = max(1, min(total, cantidad_retenida))
 
-    plano = dct_img.flatten()
-    indices = np.argsort(np.abs(plano))[::-1]
-    plano_filtrado = np.zeros_like(plano)
-    plano_filtrado[indices[:cantidad_retenida]] = plano[indices[:cantidad_retenida]]
-    dct_filtrada = plano_filtrado.reshape(dct_img.shape)
+    dct_filtrada = retener_k_mayores(dct_img, cantidad_retenida)
+
+    # Se guardan solo los coeficientes retenidos y se reconstruye desde ese
+    # archivo, así el MSE incluye la cuantización
+    os.makedirs('resultados', exist_ok=True)
+    archivo_coef = 'resultados/imagen_coeficientes' + EXTENSION
+    escritos = guardar_imagen_dct(archivo_coef, dct_filtrada, (alto, ancho), tamano_bloque)
+    dct_filtrada, _ = cargar_imagen_dct(archivo_coef)
 
     reconstruida_padded = aplicar_idct_por_bloques(dct_filtrada, tamano_bloque=tamano_bloque)
     reconstruida = reconstruida_padded[:alto, :ancho]
 
     mse = float(np.mean((imagen.astype(np.float32) - reconstruida.astype(np.float32)) ** 2))
 
-    os.makedirs('resultados', exist_ok=True)
     cv2.imwrite('resultados/imagen_reconstruida.png', reconstruida)
 
     # Grafico comparativo y mapa de calor de coeficientes
@@ -114,5 +108,7 @@ def comprimir_imagen(ruta_imagen, porcentaje_retenido):
     plt.tight_layout()
     plt.show()
 
+    print(f'Coeficientes: {archivo_coef} ({escritos["bytes"] / 1024:.1f} KiB, '
+          f'{escritos["bytes"] * 8 / imagen.size:.2f} bits/píxel; sin comprimir {imagen.size / 1024:.1f} KiB)')
     print(f'Error cuadrático medio (MSE): {mse:.6f}')
     return reconstruida, mse
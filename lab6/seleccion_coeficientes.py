@@ -0,0 +1,132 @@
+# seleccion_coeficientes.py
+# --------------------------------------------------------
+# Selección de los k coeficientes de mayor magnitud en tiempo lineal.
+# En lugar de ordenar todo el arreglo (argsort, O(n log n)) se usa
+# np.argpartition (introselect, O(n)) para hallar la k-ésima magnitud
+# y con ella la máscara de coeficientes que se conservan.
+# Los empates en la magnitud umbral se resuelven por índice (se conservan
+# los primeros), así el resultado es siempre el mismo.
+# --------------------------------------------------------
+
+import numpy as np
+
+
+def mascara_k_mayores(coef, k):
+    """
+    Máscara booleana (misma forma que coef) con exactamente k valores True:
+    los coeficientes de mayor |coef|.
+    """
+    coef = np.asarray(coef)
+    mag = np.abs(coef).ravel()
+    n = mag.size
+    k = int(k)
+    if k <= 0:
+        return np.zeros(coef.shape, dtype=bool)
+    if k >= n:
+        return np.ones(coef.shape, dtype=bool)
+
+    # k-ésima magnitud más grande (quickselect)
+    umbral = mag[np.argpartition(mag, n - k)[n - k]]
+    return mascara_desde_umbral(mag, umbral, k).reshape(coef.shape)
+
+
+def mascara_desde_umbral(mag, umbral, k):
+    """Máscara plana de los k mayores dado el umbral (k-ésima magnitud); empates por índice."""
+    mascara = mag > umbral
+    faltan = int(k) - int(np.count_nonzero(mascara))
+    if faltan > 0:
+        empates = np.flatnonzero(mag == umbral)[:faltan]
+        mascara[empates] = True
+    return mascara
+
+
+def umbrales_k_mayores(mag, ks):
+    """
+    k-ésima magnitud más grande para cada k de ks (1 <= k <= mag.size).
+    Para varios k se ordenan una sola vez los valores (sin índices, que
+    NumPy ordena con SIMD) y cada umbral es una lectura; para uno solo
+    basta un quickselect.
+    """
+    mag = np.asarray(mag).ravel()
+    n = mag.size
+    if len(ks) == 1:
+        return [np.partition(mag, n - int(ks[0]))[n - int(ks[0])]]
+    ordenadas = np.sort(mag)
+    return [ordenadas[n - int(k)] for k in ks]
+
+
+def mascara_k_mayores_por_fila(coef, k):
+    """
+    Como mascara_k_mayores, pero fila por fila de un arreglo 2D (p. ej. una
+    trama por fila): exactamente k valores True en cada fila.
+    """
+    mag = np.abs(np.asarray(coef))
+    n = mag.shape[1]
+    k = int(k)
+    if k <= 0:
+        return np.zeros(mag.shape, dtype=bool)
+    if k >= n:
+        return np.ones(mag.shape, dtype=bool)
+    umbrales = np.partition(mag, n - k, axis=1)[:, n - k]
+    return mascara_desde_umbrales_por_fila(mag, umbrales, k)
+
+
+def mascara_desde_umbrales_por_fila(mag, umbrales, k):
+    """mascara_desde_umbral aplicada a cada fila de mag con su umbral; empates por índice dentro de la fila."""
+    mascara = mag > umbrales[:, None]
+    faltan = int(k) - np.count_nonzero(mascara, axis=1)
+    if faltan.any():
+        empates = mag == umbrales[:, None]
+        mascara |= empates & (np.cumsum(empates, axis=1) <= faltan[:, None])
+    return mascara
+
+
+def retener_k_mayores(coef, k):
+    """Copia de coef con todo en cero salvo los k coeficientes de mayor magnitud."""
+    coef = np.asarray(coef)
+    return np.where(mascara_k_mayores(coef, k), coef, 0).astype(coef.dtype, copy=False)
+
+
+def eliminar_k_menores(coef, k):
+    """Copia de coef con los k coeficientes de menor magnitud en cero."""
+    coef = np.asarray(coef)
+    return retener_k_mayores(coef, coef.size - int(k))
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    for n, k in [(1000, 0), (1000, 1), (1000, 437), (1000, 1000), (7, 3)]:
+        c = rng.standard_normal(n)
+        orden = np.argsort(np.abs(c))[::-1]
+        ref = np.zeros(n, dtype=bool)
+        ref[orden[:k]] = True
+        assert np.array_equal(mascara_k_mayores(c, k), ref)
+        assert np.count_nonzero(eliminar_k_menores(c, k)) == n - k
+        if k:
+            umbral = umbrales_k_mayores(np.abs(c), [k, max(1, k // 2)])[0]
+            assert np.array_equal(mascara_desde_umbral(np.abs(c), umbral, k), ref)
+
+    # Empates (p. ej. muchos ceros exactos en bloques planos): exactamente k y determinista
+    c = np.array([0.0, 3.0, -3.0, 0.0, 1.0, 3.0])
+    assert mascara_k_mayores(c, 2).tolist() == [False, True, True, False, False, False]
+    assert np.count_nonzero(mascara_k_mayores(np.zeros(50), 20)) == 20
+
+    # Por fila: igual que mascara_k_mayores aplicada a cada fila, empates incluidos
+    filas = np.vstack([rng.standard_normal((5, 64)), np.zeros((2, 64)), np.round(rng.standard_normal((3, 64)))])
+    for k in (0, 1, 10, 64):
+        m = mascara_k_mayores_por_fila(filas, k)
+        assert np.array_equal(m, np.array([mascara_k_mayores(f, k) for f in filas]))
+
+    c = rng.standard_normal(10 * 60 * 44100)  # 10 min a 44.1 kHz
+    k = c.size // 10
+    t0 = time.perf_counter()
+    idx = np.argsort(np.abs(c))[::-1]
+    t_sort = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    m = mascara_k_mayores(c, k)
+    t_sel = time.perf_counter() - t0
+    assert np.array_equal(np.flatnonzero(m), np.sort(idx[:k]))
+    print(f"{c.size} coeficientes, k={k}: argsort {t_sort*1e3:.0f} ms | argpartition {t_sel*1e3:.0f} ms")
+    print("OK")